@@ -1,6 +1,11 @@
 from django.contrib import admin
-from .models import Appointment, Notification
+from .models import Appointment, Notification, WorkingHours
 
 # Register your models here.
 admin.site.register(Appointment)
-admin.site.register(Notification)
\ No newline at end of file
+admin.site.register(WorkingHours)
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_select_related = ('sender', 'receiver')
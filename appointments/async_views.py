@@ -0,0 +1,53 @@
+"""
+Async variants of the appointments read endpoints, see profiles.async_views.
+"""
+from django.views.decorators.http import require_GET
+from rest_framework import status
+
+from profiles.async_views import json_response, sparse_serializer
+from timelycare.optimizers import optimize_queryset
+from .models import Appointment
+from .pagination import APPOINTMENT_ORDERING, InvalidCursor, akeyset_page, parse_page_size
+from .serializers import AppointmentSerializer
+from .streaming import STREAM_FORMATS, astreaming_response
+
+
+@require_GET
+async def appointments(request, appointment_id=None):
+    """
+    Retrieve appointments by appointment_id.
+    If no appointment ID is provided, return all appointments, with the same
+    ?page_size/?cursor pagination, ?stream= formats and ?fields=/?expand= as
+    the sync view.
+    """
+    if appointment_id is None:
+        appointment_serializer = sparse_serializer(request, AppointmentSerializer, many=True)
+        appointments = optimize_queryset(
+            Appointment.objects.all(), appointment_serializer, required=(*APPOINTMENT_ORDERING, 'updated_at')
+        )
+        stream_format = request.GET.get('stream')
+        cursor = request.GET.get('cursor')
+        page_size = request.GET.get('page_size')
+
+        if stream_format is not None:
+            if stream_format not in STREAM_FORMATS:
+                return json_response({"message": "Unsupported stream format."}, status=status.HTTP_400_BAD_REQUEST)
+            return astreaming_response(appointments.order_by(*APPOINTMENT_ORDERING), appointment_serializer, stream_format)
+
+        if cursor is not None or page_size is not None:
+            try:
+                page, next_cursor = await akeyset_page(appointments, cursor, parse_page_size(page_size))
+            except InvalidCursor as exc:
+                return json_response({"message": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            appointment_serializer.instance = page
+            return json_response({"results": appointment_serializer.data, "next_cursor": next_cursor})
+
+        appointment_serializer.instance = [row async for row in appointments]
+        return json_response(appointment_serializer.data)
+
+    appointment_serializer = sparse_serializer(request, AppointmentSerializer)
+    try:
+        appointment_serializer.instance = await Appointment.objects.aget(appointment_id=appointment_id)
+    except Appointment.DoesNotExist:
+        return json_response({"message": "Appointment not found."}, status=status.HTTP_404_NOT_FOUND)
+    return json_response(appointment_serializer.data)
@@ -0,0 +1,100 @@
+import bisect
+import datetime
+import heapq
+from collections import defaultdict
+
+from django.utils import timezone
+
+from profiles.models import Specialization
+from .models import Appointment, WorkingHours
+
+MAX_SEARCH_DAYS = 90
+MAX_SLOTS = 100
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _time(minutes):
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def _free_starts(specialist_id, start, end, step, booked):
+    """
+    Yield (minute, specialist_id) for every slot in [start, end) that does not overlap a booking.
+
+    A booking at minute b occupies [b, b + step), so a slot starting at s is taken
+    when s - step < b < s + step. `booked` is sorted, so each slot is a bisect
+    instead of a scan over the day's appointments.
+    """
+    for slot in range(start, end - step + 1, step):
+        i = bisect.bisect_right(booked, slot - step)
+        if i < len(booked) and booked[i] < slot + step:
+            continue
+        yield slot, specialist_id
+
+
+def _slots_for_day(day, templates, booked, not_before=None):
+    """
+    Merge every specialist's free slots for one day into a single time-ordered stream.
+    """
+    streams = []
+    for specialist_id, start, end, step in templates:
+        if not_before is not None and not_before > start:
+            # Stay on the template's grid: skip to the first slot at or after not_before.
+            start += -(-(not_before - start) // step) * step
+        streams.append(_free_starts(specialist_id, start, end, step, booked.get(specialist_id, [])))
+    for slot, specialist_id in heapq.merge(*streams):
+        yield {"specialist": specialist_id, "date": day, "time": _time(slot)}
+
+
+def find_free_slots(start_date, end_date, specialization=None, specialist_id=None, limit=10, now=None):
+    """
+    Return the next `limit` free slots between start_date and end_date (inclusive).
+
+    Working-hour templates for the candidate specialists are loaded once and
+    grouped by weekday. Bookings are then fetched one day at a time through the
+    (specialist, date, time) index, so the search stops reading as soon as
+    enough slots have been found.
+    """
+    specialists = None
+    if specialization is not None:
+        specialists = Specialization.objects.filter(title=specialization).values('specialist_id')
+    templates = WorkingHours.objects.all()
+    if specialists is not None:
+        templates = templates.filter(specialist_id__in=specialists)
+    if specialist_id is not None:
+        templates = templates.filter(specialist_id=specialist_id)
+
+    by_weekday = defaultdict(list)
+    for row in templates.values_list('specialist_id', 'weekday', 'start_time', 'end_time', 'slot_minutes'):
+        template_specialist, weekday, start, end, step = row
+        by_weekday[weekday].append((template_specialist, _minutes(start), _minutes(end), step))
+    if not by_weekday:
+        return []
+
+    now = timezone.localtime(now or timezone.now())
+    slots = []
+    day = max(start_date, now.date())
+    while day <= end_date and len(slots) < limit:
+        day_templates = by_weekday.get(day.weekday())
+        if day_templates:
+            booked = defaultdict(list)
+            bookings = (
+                Appointment.objects
+                .filter(date=day, specialist_id__in={t[0] for t in day_templates})
+                .exclude(status='Canceled')
+                .order_by('time')
+                .values_list('specialist_id', 'time')
+            )
+            for booked_specialist, time in bookings:
+                booked[booked_specialist].append(_minutes(time))
+
+            not_before = _minutes(now) + 1 if day == now.date() else None
+            for slot in _slots_for_day(day, day_templates, booked, not_before):
+                slots.append(slot)
+                if len(slots) == limit:
+                    break
+        day += datetime.timedelta(days=1)
+    return slots
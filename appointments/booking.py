@@ -0,0 +1,39 @@
+from django.db import IntegrityError, transaction
+
+from profiles.models import Specialist
+from .models import Appointment
+
+
+class SlotTaken(Exception):
+    pass
+
+
+def slot_is_taken(specialist, date, time, exclude=None):
+    bookings = Appointment.objects.filter(specialist=specialist, date=date, time=time).exclude(status='Canceled')
+    if exclude is not None:
+        bookings = bookings.exclude(pk=exclude)
+    return bookings.exists()
+
+
+def book_appointment(serializer):
+    """
+    Save a validated AppointmentSerializer, raising SlotTaken if the
+    specialist already has a live booking at that date and time.
+
+    Bookings for the same specialist are serialized by locking the specialist
+    row; bookings for different specialists never wait on each other. The
+    appointment_unique_active_slot constraint is the backstop for databases
+    without row locks and for writes that bypass this function.
+    """
+    data = serializer.validated_data
+    try:
+        with transaction.atomic():
+            if data.get('status') != 'Canceled':
+                Specialist.objects.select_for_update().filter(pk=data['specialist'].pk).exists()
+                if slot_is_taken(data['specialist'], data['date'], data['time']):
+                    raise SlotTaken
+            return serializer.save()
+    except IntegrityError:
+        if slot_is_taken(data['specialist'], data['date'], data['time']):
+            raise SlotTaken
+        raise
@@ -0,0 +1,85 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions
+from urllib.parse import parse_qs
+
+from profiles.authentication import CachedTokenAuthentication
+from .models import Notification
+from .serializers import NotificationSerializer
+
+# Upper bound on notifications replayed after a reconnect; clients fall back to
+# the HTTP inbox for anything older.
+REPLAY_LIMIT = 500
+
+
+def notification_group(user_id):
+    return f"notifications.{user_id}"
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Push new notifications to their receiver.
+
+    Clients connect to ws/notifications/<user_id>/ and may pass ?since=<sent_at>
+    (or later send {"since": "<sent_at>"}) to replay what they missed while
+    disconnected.
+
+    Only the user themselves may connect, with their knox token in ?token=
+    since browsers cannot set headers on a WebSocket. The session user that
+    AuthMiddlewareStack puts in the scope is a django.contrib.auth user, not a
+    profiles.User, so it is not used.
+    """
+    group_name = None
+
+    async def connect(self):
+        self.user_id = self.scope['url_route']['kwargs']['user_id']
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        if not await self.is_receiver(query.get('token', [None])[0]):
+            await self.close()
+            return
+
+        self.group_name = notification_group(self.user_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        if 'since' in query:
+            await self.replay(query['since'][0])
+
+    async def disconnect(self, code):
+        if self.group_name is not None:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    @database_sync_to_async
+    def is_receiver(self, token):
+        if not token:
+            return False
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(token.encode())
+        except exceptions.AuthenticationFailed:
+            return False
+        return user.pk == self.user_id
+
+    async def receive_json(self, content, **kwargs):
+        if 'since' in content:
+            await self.replay(content['since'])
+
+    async def replay(self, since):
+        since = parse_datetime(since or '')
+        if since is None:
+            await self.send_json({"error": "Invalid since cursor."})
+            return
+        for notification in await self.missed_notifications(since):
+            await self.send_json(notification)
+
+    @database_sync_to_async
+    def missed_notifications(self, since):
+        notifications = (
+            Notification.objects
+            .filter(receiver_id=self.user_id, sent_at__gt=since)
+            .order_by('sent_at')[:REPLAY_LIMIT]
+        )
+        return NotificationSerializer(notifications, many=True).data
+
+    async def notification_message(self, event):
+        await self.send_json(event['notification'])
@@ -0,0 +1,50 @@
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from .consumers import notification_group
+from .inbox import adjust_unread_count
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+def push(notifications):
+    """
+    Send notifications to their receivers' WebSocket groups once the current
+    transaction commits, so a replay can never miss or duplicate them.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    messages = [
+        (notification_group(notification.receiver_id), {
+            'type': 'notification.message',
+            'notification': dict(NotificationSerializer(notification).data),
+        })
+        for notification in notifications
+    ]
+
+    def send():
+        for group, message in messages:
+            async_to_sync(channel_layer.group_send)(group, message)
+
+    transaction.on_commit(send)
+
+
+def deliver_notifications(notifications):
+    """
+    Insert notifications with one bulk_create, then push them and update the
+    cached unread counts as the post_save handlers do for single saves.
+    """
+    created = Notification.objects.bulk_create(notifications)
+    push(created)
+    unread = Counter(notification.receiver_id for notification in created if not notification.is_read)
+
+    def count():
+        for receiver_id, delta in unread.items():
+            adjust_unread_count(receiver_id, delta)
+
+    transaction.on_commit(count)
+    return created
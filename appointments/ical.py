@@ -0,0 +1,183 @@
+"""
+iCalendar (RFC 5545) feeds of a specialist's or patient's appointments.
+
+Calendar clients poll their feed every few minutes. Each user has a
+modification marker in the cache, moved forward whenever one of their
+appointments changes; it is the feed's Last-Modified and part of its ETag
+and cache key, so a poll is answered from the marker (304) or from the
+cached body without touching the database.
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from profiles.models import Patient, Specialist
+from .models import Appointment
+from .pagination import STREAM_CHUNK_SIZE
+
+ROLES = {
+    # role: (appointment field holding the user, prefix of the other party's name fields)
+    'specialist': ('specialist_id', 'patient__user__'),
+    'patient': ('patient_id', 'specialist__user__'),
+}
+
+PROFILES = {'specialist': Specialist, 'patient': Patient}
+
+STATUSES = {
+    'Pending': 'TENTATIVE',
+    'Confirmed': 'CONFIRMED',
+    'Completed': 'CONFIRMED',
+    'Canceled': 'CANCELLED',
+}
+
+
+def marker_key(user_id):
+    return f'appointments:ical:marker:{user_id}'
+
+
+def feed_modified(role, user_id):
+    """
+    When the user's appointments last changed, in whole seconds (Last-Modified
+    has no finer resolution), or None when there is no such specialist or
+    patient.
+
+    An unknown or expired marker starts at the current time, which at worst
+    makes clients download the feed once more. Markers are only created for
+    existing users, so made-up ids cannot fill the cache.
+    """
+    key = marker_key(user_id)
+    marker = cache.get(key)
+    if marker is None:
+        if not PROFILES[role].objects.filter(pk=user_id).exists():
+            return None
+        cache.add(key, int(time.time()), timeout=settings.ICAL_MARKER_TIMEOUT)
+        marker = cache.get(key)
+    return marker
+
+
+def touch_feeds(user_ids):
+    """
+    Move the markers of these users past both the current second and their
+    previous value, so a client that fetched the feed earlier in the same
+    second does not get a 304 for the old one.
+    """
+    keys = [marker_key(user_id) for user_id in set(user_ids)]
+    if not keys:
+        return
+    now = int(time.time())
+    current = cache.get_many(keys)
+    cache.set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, timeout=settings.ICAL_MARKER_TIMEOUT)
+
+
+def escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """
+    Split a content line into CRLF-terminated lines of at most 75 octets,
+    continuation lines starting with a space, without cutting a UTF-8 sequence.
+    """
+    data = line.encode()
+    parts = []
+    limit = 75
+    while len(data) > limit:
+        cut = limit
+        while cut and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        limit = 74
+    parts.append(data)
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def _utc(moment):
+    return moment.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(row, name_prefix):
+    # Appointment dates and times are wall-clock times in the current time zone.
+    start = timezone.make_aware(datetime.datetime.combine(row['date'], row['time']))
+    end = start + datetime.timedelta(minutes=settings.ICAL_EVENT_MINUTES)
+    other = f"{row[name_prefix + 'first_name']} {row[name_prefix + 'last_name']}"
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:{row['appointment_id']}@careme",
+        f"DTSTAMP:{_utc(row['updated_at'])}",
+        f"LAST-MODIFIED:{_utc(row['updated_at'])}",
+        f'DTSTART:{_utc(start)}',
+        f'DTEND:{_utc(end)}',
+        f"SEQUENCE:{row['version']}",
+        f"STATUS:{STATUSES[row['status']]}",
+        f"SUMMARY:{escape(row['symptom_type'])} appointment with {escape(other)}",
+        'END:VEVENT',
+    ]
+    return b''.join(fold(line) for line in lines)
+
+
+def feed_queryset(role, user_id, today=None):
+    """
+    The user's appointments from ICAL_PAST_DAYS ago to ICAL_FUTURE_DAYS ahead,
+    read through the (specialist|patient, date, time) index.
+    """
+    field, name_prefix = ROLES[role]
+    today = today or timezone.localdate()
+    return (
+        Appointment.objects
+        .filter(**{field: user_id})
+        .filter(date__range=(
+            today - datetime.timedelta(days=settings.ICAL_PAST_DAYS),
+            today + datetime.timedelta(days=settings.ICAL_FUTURE_DAYS),
+        ))
+        .order_by('date', 'time')
+        .values(
+            'appointment_id', 'date', 'time', 'status', 'symptom_type', 'version', 'updated_at',
+            name_prefix + 'first_name', name_prefix + 'last_name',
+        )
+    )
+
+
+def _chunks(role, user_id, today, chunk_size):
+    _, name_prefix = ROLES[role]
+    yield b''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//CAREME//Appointments//EN',
+        'CALSCALE:GREGORIAN', 'METHOD:PUBLISH', 'X-WR-CALNAME:CAREME appointments',
+    ))
+    chunk = []
+    for row in feed_queryset(role, user_id, today).iterator(chunk_size=chunk_size):
+        chunk.append(_event(row, name_prefix))
+        if len(chunk) == chunk_size:
+            yield b''.join(chunk)
+            chunk = []
+    yield b''.join(chunk) + fold('END:VCALENDAR')
+
+
+def _cached_as_streamed(chunks, key):
+    # Keep what was sent and cache it once the whole feed went out; a feed
+    # cut short by a disconnecting client is not cached.
+    sent = []
+    for chunk in chunks:
+        sent.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(sent), timeout=settings.ICAL_CACHE_TIMEOUT)
+
+
+def feed_response(role, user_id, modified, today, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    The feed as of marker `modified` for the window around `today`: from the
+    cache, or streamed from the database and cached on the way out.
+    """
+    key = f'appointments:ical:{role}:{user_id}:{today.isoformat()}:{modified}'
+    content_type = 'text/calendar; charset=utf-8'
+    body = cache.get(key)
+    if body is not None:
+        return HttpResponse(body, content_type=content_type)
+    return StreamingHttpResponse(_cached_as_streamed(_chunks(role, user_id, today, chunk_size), key), content_type=content_type)
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Notification
+
+INBOX_ORDERING = ('-sent_at', '-notification_id')
+
+
+def unread_count_key(user_id):
+    return f'appointments:unread:{user_id}'
+
+
+def unread_count(user_id):
+    """
+    Number of unread notifications of a user.
+
+    The count is kept in the cache and adjusted as notifications are created and
+    marked read, so the badge poll is a single cache read. On a miss it is
+    recomputed from the (receiver, is_read, sent_at) index.
+    """
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(receiver_id=user_id, is_read=False).count()
+        cache.add(key, count, timeout=settings.UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+def adjust_unread_count(user_id, delta):
+    try:
+        cache.incr(unread_count_key(user_id), delta)
+    except ValueError:
+        # Not cached: the next read recomputes it.
+        pass
+
+
+def forget_unread_count(user_id):
+    cache.delete(unread_count_key(user_id))
+
+
+def mark_read(user_id, notification_ids=None):
+    """
+    Mark a user's notifications read with a single UPDATE and return how many changed.
+
+    With notification_ids=None every unread notification of the user is marked.
+    """
+    notifications = Notification.objects.filter(receiver_id=user_id, is_read=False)
+    if notification_ids is not None:
+        notifications = notifications.filter(notification_id__in=notification_ids)
+    updated = notifications.update(is_read=True, updated_at=timezone.now())
+    if updated:
+        adjust_unread_count(user_id, -updated)
+    return updated
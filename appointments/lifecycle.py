@@ -0,0 +1,122 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .booking import SlotTaken, slot_is_taken
+from .models import Appointment
+from .signals import appointments_changed
+
+# action: (statuses it applies to, status it sets)
+TRANSITIONS = {
+    'confirm': (('Pending',), 'Confirmed'),
+    'cancel': (('Pending', 'Confirmed'), 'Canceled'),
+    'complete': (('Confirmed',), 'Completed'),
+}
+RESCHEDULABLE = ('Pending', 'Confirmed')
+
+# Values returned for a changed appointment and passed to appointments_changed.
+CHANGE_FIELDS = ('appointment_id', 'specialist_id', 'patient_id', 'date', 'time', 'status', 'version')
+
+
+class AppointmentNotFound(Exception):
+    pass
+
+
+class TransitionConflict(Exception):
+    """
+    The appointment is not in a state the change applies to, or it changed
+    since the version the client last saw.
+    """
+    def __init__(self, message, current=None):
+        super().__init__(message)
+        self.current = current
+
+
+def _conflict(appointment_id, message):
+    current = Appointment.objects.filter(pk=appointment_id).values('status', 'version').first()
+    if current is None:
+        return AppointmentNotFound(appointment_id)
+    return TransitionConflict(message, current)
+
+
+def _changes(**values):
+    # Every lifecycle UPDATE bumps the version and the modification time.
+    return dict(values, version=F('version') + 1, updated_at=timezone.now())
+
+
+def transition(appointment_id, action, version=None):
+    """
+    Apply a status change with one conditional UPDATE per allowed source status
+    (WHERE status = <source> [AND version = <version>]) and return the changed
+    row. Nothing is read before writing: a lost race shows up as an UPDATE that
+    matched no row.
+    """
+    sources, target = TRANSITIONS[action]
+    appointment = Appointment.objects.filter(pk=appointment_id)
+    if version is not None:
+        appointment = appointment.filter(version=version)
+    with transaction.atomic():
+        for source in sources:
+            if appointment.filter(status=source).update(**_changes(status=target)):
+                break
+        else:
+            raise _conflict(appointment_id, f"Only {' or '.join(sources)} appointments can be {target.lower()}"
+                            + (f" at version {version}." if version is not None else "."))
+        row = Appointment.objects.values(*CHANGE_FIELDS).get(pk=appointment_id)
+        appointments_changed.send(sender=Appointment, changes=[(row, {'status': source})])
+    return row
+
+
+def bulk_transition(specialist_id, date, action):
+    """
+    Apply a status change to every matching appointment of a specialist on a
+    day, e.g. confirm a whole day at once. Returns the changed rows.
+    """
+    sources, target = TRANSITIONS[action]
+    day = Appointment.objects.filter(specialist_id=specialist_id, date=date)
+    changes = []
+    with transaction.atomic():
+        for source in sources:
+            values = _changes(status=target)
+            if day.filter(status=source).update(**values):
+                # The exact modification time marks the rows this UPDATE changed.
+                rows = day.filter(status=target, updated_at=values['updated_at']).values(*CHANGE_FIELDS)
+                changes.extend((row, {'status': source}) for row in rows)
+        if changes:
+            appointments_changed.send(sender=Appointment, changes=changes)
+    return [row for row, _ in changes]
+
+
+def reschedule(appointment_id, date, time, version=None):
+    """
+    Move an appointment to another slot and return the changed row.
+
+    The previous date and time are needed to keep the rollups right, so this
+    reads the row once and then writes it with a compare-and-set on its
+    version; a concurrent change makes the UPDATE match nothing.
+    """
+    current = None
+    try:
+        with transaction.atomic():
+            current = Appointment.objects.values(*CHANGE_FIELDS).filter(pk=appointment_id).first()
+            if current is None:
+                raise AppointmentNotFound(appointment_id)
+            if version is not None and current['version'] != version:
+                raise TransitionConflict(f"The appointment is no longer at version {version}.", current)
+            if current['status'] not in RESCHEDULABLE:
+                raise TransitionConflict(f"{current['status']} appointments cannot be rescheduled.", current)
+            updated = Appointment.objects.filter(
+                pk=appointment_id, version=current['version'], status=current['status'],
+            ).update(**_changes(date=date, time=time, reminder_sent_at=None))
+            if not updated:
+                raise _conflict(appointment_id, "The appointment changed while it was being rescheduled.")
+            row = dict(current, date=date, time=time, version=current['version'] + 1)
+            appointments_changed.send(
+                sender=Appointment, changes=[(row, {'date': current['date'], 'time': current['time']})]
+            )
+    except IntegrityError:
+        # Only a clash with another live booking is the client's conflict.
+        if current is not None and slot_is_taken(current['specialist_id'], date, time, exclude=appointment_id):
+            raise SlotTaken
+        raise
+    return row
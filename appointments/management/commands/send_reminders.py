@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from appointments.reminders import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Send reminders before confirmed appointments. Safe to run in several processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single tick, then exit.")
+        parser.add_argument('--interval', type=float, default=settings.REMINDER_INTERVAL, help="Seconds between ticks.")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                sent = send_due_reminders()
+                if sent:
+                    self.stdout.write(f"Sent {sent} reminders.")
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
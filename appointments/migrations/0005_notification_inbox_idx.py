@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_notification_replay_idx'),
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['receiver', 'is_read', 'sent_at'], name='notification_inbox_idx'),
+        ),
+    ]
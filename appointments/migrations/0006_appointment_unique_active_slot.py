@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_notification_inbox_idx'),
+        ('profiles', '0002_auth_token'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'Canceled'), _negated=True), fields=('specialist', 'date', 'time'), name='appointment_unique_active_slot'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_notification_updated_at'),
+        ('profiles', '0003_specialist_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient', 'date', 'time'], name='appointment_patient_idx'),
+        ),
+    ]
@@ -10,6 +10,15 @@ class Notification(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     notification_type = models.CharField(max_length=255)
     is_read = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Resuming a push stream replays a receiver's notifications after a sent_at cursor.
+            models.Index(fields=['receiver', 'sent_at'], name='notification_replay_idx'),
+            # Unread inbox pages and the unread count.
+            models.Index(fields=['receiver', 'is_read', 'sent_at'], name='notification_inbox_idx'),
+        ]
 
     def __str__(self):
         return f"From: {self.sender.email} To: {self.receiver.email} Content: {self.content}"
@@ -30,8 +39,87 @@ class Appointment(models.Model):
     date = models.DateField()
     time = models.TimeField()
     status = models.CharField(max_length=10, choices=APPOINTMENT_STATUS_CHOICES, default='Pending')
+    # Set when the reminder notification was written; guards against sending it twice.
+    reminder_sent_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Bumped by every lifecycle change, for optimistic concurrency control.
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
     #notes = models.TextField(blank=True, null=True)
 
+    # Status as last read from or written to the database, so signal handlers
+    # can tell a status change from other saves. None when unknown.
+    _loaded_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
+    class Meta:
+        indexes = [
+            # Keyset pagination walks appointments in this order.
+            models.Index(fields=['date', 'time', 'appointment_id'], name='appointment_cursor_idx'),
+            # Availability search looks up a specialist's bookings for a given day.
+            models.Index(fields=['specialist', 'date', 'time'], name='appointment_specialist_idx'),
+            # A patient's calendar feed reads their appointments by date range.
+            models.Index(fields=['patient', 'date', 'time'], name='appointment_patient_idx'),
+            # The reminder scheduler reads confirmed appointments by start time.
+            models.Index(fields=['status', 'date', 'time'], name='appointment_reminder_idx'),
+        ]
+        constraints = [
+            # A specialist can hold one live booking per slot; canceled ones free it up again.
+            models.UniqueConstraint(
+                fields=['specialist', 'date', 'time'],
+                condition=~models.Q(status='Canceled'),
+                name='appointment_unique_active_slot',
+            ),
+        ]
+
+class ReminderCursor(models.Model):
+    """
+    High-water mark of the reminder scheduler: reminders are sent for every
+    confirmed appointment starting up to `position` plus the lead time.
+    """
+    name = models.CharField(max_length=64, unique=True)
+    position = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.position}"
+
+class WorkingHours(models.Model):
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    specialist = models.ForeignKey(Specialist, related_name='working_hours', on_delete=models.CASCADE)
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=30)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['weekday', 'specialist'], name='working_hours_weekday_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(check=models.Q(end_time__gt=models.F('start_time')), name='working_hours_end_after_start'),
+            models.CheckConstraint(check=models.Q(slot_minutes__gt=0), name='working_hours_positive_slot'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
 
 def __str__(self):
     return f"Patient: {self.patient.user.email} Specialist: {self.specialist.user.email} Date: {self.date} Time: {self.time} Status: {self.status}"
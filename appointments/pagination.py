@@ -0,0 +1,109 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+
+# Appointments are always walked in (date, time, appointment_id) order so that a
+# cursor identifies a unique position in the table.
+APPOINTMENT_ORDERING = ('date', 'time', 'appointment_id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _field_names(ordering):
+    return [name.lstrip('-') for name in ordering]
+
+
+def _cursor_value(value):
+    # Full-precision ISO strings: DjangoJSONEncoder would drop microseconds.
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def encode_cursor(instance, ordering=APPOINTMENT_ORDERING):
+    """
+    Build an opaque cursor pointing just after the given row.
+    """
+    payload = [getattr(instance, name) for name in _field_names(ordering)]
+    return base64.urlsafe_b64encode(json.dumps(payload, default=_cursor_value).encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering=APPOINTMENT_ORDERING):
+    """
+    Decode a cursor produced by encode_cursor into the row's ordering values.
+    """
+    names = _field_names(ordering)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(payload, list) or len(payload) != len(names):
+            raise ValueError
+        return [model._meta.get_field(name).to_python(value) for name, value in zip(names, payload)]
+    except (ValueError, TypeError, UnicodeError, ValidationError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """
+    Clamp a page_size query parameter to 1..MAX_PAGE_SIZE.
+    """
+    if value in (None, ''):
+        return default
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor("page_size must be an integer.")
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def _after(ordering, values):
+    # (a, b, c) > (x, y, z)  <=>  a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+    # with > flipped to < for descending fields.
+    condition = Q()
+    equal = {}
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        lookup = f'{field}__lt' if name.startswith('-') else f'{field}__gt'
+        condition |= Q(**equal, **{lookup: value})
+        equal[field] = value
+    return condition
+
+
+def _page_queryset(queryset, cursor, page_size, ordering):
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, queryset.model, ordering)))
+    # Fetch one extra row to find out whether there is a next page.
+    return queryset[:page_size + 1]
+
+
+def _split_page(rows, page_size, ordering):
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1], ordering)
+    return rows, None
+
+
+def keyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, ordering=APPOINTMENT_ORDERING):
+    """
+    Return (rows, next_cursor) for the page of rows following the cursor.
+
+    `ordering` must end with a unique field. The filter is a row comparison on
+    the ordering fields, so every page is a single index range scan no matter
+    how deep the client is.
+    """
+    rows = list(_page_queryset(queryset, cursor, page_size, ordering))
+    return _split_page(rows, page_size, ordering)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, ordering=APPOINTMENT_ORDERING):
+    """
+    Async version of keyset_page.
+    """
+    rows = [row async for row in _page_queryset(queryset, cursor, page_size, ordering)]
+    return _split_page(rows, page_size, ordering)
@@ -0,0 +1,105 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .delivery import deliver_notifications
+from .models import Appointment, Notification, ReminderCursor
+
+CURSOR_NAME = 'appointment-reminders'
+BATCH_SIZE = 1000
+
+
+def lead_time():
+    return datetime.timedelta(hours=settings.REMINDER_LEAD_HOURS)
+
+
+def _date_time(moment):
+    # Appointment dates and times are wall-clock values in the project's time zone.
+    moment = timezone.localtime(moment)
+    return moment.date(), moment.time()
+
+
+def _starts_after(moment):
+    date, time = _date_time(moment)
+    return Q(date__gt=date) | Q(date=date, time__gt=time)
+
+
+def _starts_by(moment):
+    date, time = _date_time(moment)
+    return Q(date__lt=date) | Q(date=date, time__lte=time)
+
+
+def _reminder(appointment):
+    # Patient and Specialist primary keys are their user ids.
+    return Notification(
+        sender_id=appointment.specialist_id,
+        receiver_id=appointment.patient_id,
+        content=f"Reminder: your appointment is on {appointment.date} at {appointment.time:%H:%M}.",
+        notification_type='Reminder',
+    )
+
+
+def _send(appointments, now):
+    """
+    Mark and notify the confirmed, not yet reminded appointments of a queryset.
+    Must run inside a transaction.
+    """
+    # Locking the rows makes a concurrent sender skip them once this commits.
+    appointments = list(
+        appointments.select_for_update()
+        .filter(status='Confirmed', reminder_sent_at__isnull=True)
+        .only('appointment_id', 'specialist_id', 'patient_id', 'date', 'time')
+        .order_by()
+    )
+    for start in range(0, len(appointments), BATCH_SIZE):
+        batch = appointments[start:start + BATCH_SIZE]
+        Appointment.objects.filter(pk__in=[appointment.pk for appointment in batch]).update(
+            reminder_sent_at=now, updated_at=timezone.now()
+        )
+        deliver_notifications([_reminder(appointment) for appointment in batch])
+    return len(appointments)
+
+
+def send_due_reminders(now=None):
+    """
+    Send reminders for the confirmed appointments that entered the reminder
+    window since the previous tick, and move the high-water mark to now.
+
+    Each tick reads only (previous tick, now] shifted by the lead time, through
+    the (status, date, time) index. Returns the number of reminders sent, or
+    None when another scheduler process is in the middle of a tick.
+    """
+    now = now or timezone.now()
+    lead = lead_time()
+    with transaction.atomic():
+        # A new cursor starts one lead time back, so the first tick also
+        # catches confirmed appointments already inside the window.
+        ReminderCursor.objects.get_or_create(name=CURSOR_NAME, defaults={'position': now - lead})
+        cursor = ReminderCursor.objects.select_for_update(skip_locked=True).filter(name=CURSOR_NAME).first()
+        if cursor is None:
+            return None
+        if cursor.position >= now:
+            return 0
+        sent = _send(
+            Appointment.objects.filter(_starts_after(cursor.position + lead), _starts_by(now + lead)),
+            now,
+        )
+        cursor.position = now
+        cursor.save(update_fields=['position', 'updated_at'])
+    return sent
+
+
+def send_late_reminders(appointment_ids, now=None):
+    """
+    Remind right away about appointments confirmed when they were already
+    inside the reminder window, which the scheduler's cursor may have passed.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        return _send(
+            Appointment.objects.filter(_starts_after(now), _starts_by(now + lead_time()), pk__in=appointment_ids),
+            now,
+        )
@@ -1,12 +1,65 @@
 from rest_framework import serializers
-from .models import Appointment, Notification
+from profiles.serializers import PatientSerializer, SpecialistSerializer, UserSerializer
+from timelycare.serializers import SparseFieldsMixin
+from .availability import MAX_SEARCH_DAYS, MAX_SLOTS
+from .models import Appointment, Notification, WorkingHours
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = '__all__'
+        expandable_fields = {'sender': UserSerializer, 'receiver': UserSerializer}
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class MarkReadSerializer(serializers.Serializer):
+    # {"all": true} for every unread notification, or {"ids": [...]}.
+    all = serializers.BooleanField(required=False, default=False)
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False, max_length=1000)
+
+    def validate(self, data):
+        if not data['all'] and 'ids' not in data:
+            raise serializers.ValidationError({'ids': "This field is required unless all is true."})
+        return data
+
+class AppointmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Appointment
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        read_only_fields = ['version']
+        expandable_fields = {'specialist': SpecialistSerializer, 'patient': PatientSerializer}
+
+class TransitionSerializer(serializers.Serializer):
+    # The version the client last saw; omit it to apply the change whatever the version.
+    version = serializers.IntegerField(required=False, min_value=1)
+
+class RescheduleSerializer(TransitionSerializer):
+    date = serializers.DateField()
+    time = serializers.TimeField()
+
+class BulkTransitionSerializer(serializers.Serializer):
+    date = serializers.DateField()
+
+class WorkingHoursSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = WorkingHours
+        fields = '__all__'
+
+    def validate(self, data):
+        start_time = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and end_time <= start_time:
+            raise serializers.ValidationError("end_time must be after start_time.")
+        return data
+
+class AvailabilitySearchSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    specialization = serializers.CharField(required=False)
+    specialist = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(required=False, default=10, min_value=1, max_value=MAX_SLOTS)
+
+    def validate(self, data):
+        if data['end'] < data['start']:
+            raise serializers.ValidationError("end must not be before start.")
+        if (data['end'] - data['start']).days > MAX_SEARCH_DAYS:
+            raise serializers.ValidationError(f"Search range cannot exceed {MAX_SEARCH_DAYS} days.")
+        return data
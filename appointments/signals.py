@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from django.db.models import Q
+
+from jobs.queue import enqueue, enqueue_many
+from profiles.models import User
+from .delivery import push
+from .ical import touch_feeds
+from .inbox import adjust_unread_count, forget_unread_count
+from .models import Appointment, Notification
+
+# Sent with changes=[(row, previous), ...] after appointments are changed with
+# queryset.update(), which skips post_save. row holds the new values of
+# appointments.lifecycle.CHANGE_FIELDS, previous the old values of the fields
+# that changed.
+appointments_changed = Signal()
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    if created:
+        push([instance])
+
+
+@receiver(post_save, sender=Notification)
+def track_unread_count(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            transaction.on_commit(lambda: adjust_unread_count(instance.receiver_id, 1))
+    else:
+        # The previous is_read value is unknown here, so recount on the next read.
+        transaction.on_commit(lambda: forget_unread_count(instance.receiver_id))
+
+
+@receiver(post_delete, sender=Notification)
+def forget_deleted_unread_count(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_unread_count(instance.receiver_id))
+
+
+@receiver(post_save, sender=Appointment)
+def notify_status_change(sender, instance, created, **kwargs):
+    # The notification is written by a background job; enqueueing it here keeps
+    # the job in the same transaction as the status change.
+    changed = instance._loaded_status is not None and instance.status != instance._loaded_status
+    if created or changed:
+        enqueue('appointments.notify_appointment_status', {
+            'appointment_id': instance.appointment_id,
+            'status': instance.status,
+            'created': created,
+        })
+    instance._loaded_status = instance.status
+
+
+@receiver(appointments_changed)
+def notify_lifecycle_changes(sender, changes, **kwargs):
+    enqueue_many('appointments.notify_appointment_status', [
+        {
+            'appointment_id': row['appointment_id'],
+            'status': row['status'],
+            'created': False,
+            'rescheduled': 'date' in previous or 'time' in previous,
+        }
+        for row, previous in changes
+    ])
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def touch_calendar_feeds(sender, instance, **kwargs):
+    user_ids = (instance.specialist_id, instance.patient_id)
+    transaction.on_commit(lambda: touch_feeds(user_ids))
+
+
+@receiver(appointments_changed)
+def touch_changed_calendar_feeds(sender, changes, **kwargs):
+    user_ids = [row[field] for row, _ in changes for field in ('specialist_id', 'patient_id')]
+    transaction.on_commit(lambda: touch_feeds(user_ids))
+
+
+@receiver(post_save, sender=User)
+def touch_counterpart_calendar_feeds(sender, instance, created, **kwargs):
+    # Feed events name the other party, so a rename changes their feeds.
+    name = (instance.first_name, instance.last_name)
+    renamed = not created and instance._loaded_name is not None and name != instance._loaded_name
+    instance._loaded_name = name
+    if not renamed:
+        return
+    rows = Appointment.objects.filter(Q(specialist_id=instance.pk) | Q(patient_id=instance.pk))
+    user_ids = {user_id for pair in rows.values_list('specialist_id', 'patient_id').distinct() for user_id in pair}
+    transaction.on_commit(lambda: touch_feeds(user_ids))
@@ -0,0 +1,83 @@
+import itertools
+
+from django.http import StreamingHttpResponse
+
+from timelycare.renderers import json_dumps
+from .pagination import STREAM_CHUNK_SIZE
+
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def _serialized_chunks(queryset, serializer, chunk_size):
+    # iterator() keeps only one chunk of model instances alive at a time.
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield serializer.to_representation(chunk)
+
+
+def _ndjson(queryset, serializer, chunk_size):
+    for data in _serialized_chunks(queryset, serializer, chunk_size):
+        yield b''.join(json_dumps(item) + b'\n' for item in data)
+
+
+def _json_array(queryset, serializer, chunk_size):
+    separator = b'['
+    for data in _serialized_chunks(queryset, serializer, chunk_size):
+        # A chunk is a list, so its encoding only needs its brackets swapped.
+        yield separator + json_dumps(data)[1:-1]
+        separator = b','
+    yield b'[]' if separator == b'[' else b']'
+
+
+async def _aserialized_chunks(queryset, serializer, chunk_size):
+    chunk = []
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield serializer.to_representation(chunk)
+            chunk = []
+    if chunk:
+        yield serializer.to_representation(chunk)
+
+
+async def _andjson(queryset, serializer, chunk_size):
+    async for data in _aserialized_chunks(queryset, serializer, chunk_size):
+        yield b''.join(json_dumps(item) + b'\n' for item in data)
+
+
+async def _ajson_array(queryset, serializer, chunk_size):
+    separator = b'['
+    async for data in _aserialized_chunks(queryset, serializer, chunk_size):
+        yield separator + json_dumps(data)[1:-1]
+        separator = b','
+    yield b'[]' if separator == b'[' else b']'
+
+
+def streaming_response(queryset, serializer, stream_format='ndjson', chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Serialize a queryset as NDJSON or a JSON array without materializing it in
+    memory, chunk by chunk through `serializer`, a many=True serializer
+    already narrowed to the requested fields.
+    """
+    if stream_format == 'ndjson':
+        content = _ndjson(queryset, serializer, chunk_size)
+    else:
+        content = _json_array(queryset, serializer, chunk_size)
+    return StreamingHttpResponse(content, content_type=STREAM_FORMATS[stream_format])
+
+
+def astreaming_response(queryset, serializer, stream_format='ndjson', chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Async version of streaming_response, for ASGI views.
+    """
+    if stream_format == 'ndjson':
+        content = _andjson(queryset, serializer, chunk_size)
+    else:
+        content = _ajson_array(queryset, serializer, chunk_size)
+    return StreamingHttpResponse(content, content_type=STREAM_FORMATS[stream_format])
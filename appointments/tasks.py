@@ -0,0 +1,45 @@
+import uuid
+
+from jobs.queue import task
+from .delivery import deliver_notifications
+from .models import Appointment, Notification
+from .reminders import send_late_reminders
+
+STATUS_MESSAGES = {
+    'Pending': "Your appointment request for {date} at {time} is pending.",
+    'Confirmed': "Your appointment on {date} at {time} is confirmed.",
+    'Completed': "Your appointment on {date} at {time} is completed.",
+    'Canceled': "Your appointment on {date} at {time} was canceled.",
+}
+
+
+@task(name='appointments.notify_appointment_status', batch=True)
+def notify_appointment_status(payloads):
+    """
+    Write one notification per appointment status change, all with a single
+    query for the appointments and one bulk insert.
+    """
+    # Patient and Specialist primary keys are their user ids, so no joins are needed.
+    appointments = Appointment.objects.only('specialist_id', 'patient_id', 'date', 'time').in_bulk(
+        [payload['appointment_id'] for payload in payloads]
+    )
+    notifications = []
+    for payload in payloads:
+        appointment = appointments.get(uuid.UUID(payload['appointment_id']))
+        if appointment is None:
+            # Deleted since the job was enqueued.
+            continue
+        if payload.get('rescheduled'):
+            sender, receiver = appointment.specialist_id, appointment.patient_id
+            content = f"Your appointment was moved to {appointment.date} at {appointment.time:%H:%M}."
+        elif payload.get('created'):
+            sender, receiver = appointment.patient_id, appointment.specialist_id
+            content = f"New appointment request for {appointment.date} at {appointment.time:%H:%M}."
+        else:
+            sender, receiver = appointment.specialist_id, appointment.patient_id
+            content = STATUS_MESSAGES[payload['status']].format(date=appointment.date, time=f'{appointment.time:%H:%M}')
+        notifications.append(Notification(
+            sender_id=sender, receiver_id=receiver, content=content, notification_type='Appointment',
+        ))
+    deliver_notifications(notifications)
+    send_late_reminders([payload['appointment_id'] for payload in payloads if payload['status'] == 'Confirmed'])
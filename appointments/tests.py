@@ -1,3 +1,617 @@
-from django.test import TestCase
+import datetime
+import gzip
+import json
+import threading
+import unittest
+import uuid
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from channels.routing import URLRouter
+from django.contrib.auth.models import AnonymousUser, User as AuthUser
+from django.core.cache import cache
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dashboard.models import AppointmentDailyStat
+from jobs.models import Job
+from jobs.queue import run_pending
+from profiles.models import AuthToken, Patient, Specialist, Specialization, User
+from profiles.tests import create_user
+from .availability import find_free_slots
+from .ical import marker_key
+from .lifecycle import reschedule
+from .models import Appointment, Notification, ReminderCursor, WorkingHours
+from .reminders import send_due_reminders
+from .routing import websocket_urlpatterns
+from .serializers import AppointmentSerializer, NotificationSerializer
+
+
+class AppointmentTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = Patient.objects.get(user=create_user('patient@example.com', 'Patient'))
+        cls.specialist = Specialist.objects.get(user=create_user('specialist@example.com', 'Specialist'))
+
+    def create_appointment(self, date, time, **extra):
+        return Appointment.objects.create(
+            specialist=self.specialist, patient=self.patient, date=date, time=time, **extra
+        )
+
+
+class AppointmentListTests(AppointmentTestCase):
+    def setUp(self):
+        for day in range(1, 4):
+            for hour in (9, 10):
+                self.create_appointment(datetime.date(2024, 5, day), datetime.time(hour))
+
+    def test_cursor_pagination_walks_every_row_once(self):
+        url = reverse('appointments')
+        seen = []
+        params = {'page_size': 4}
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['appointment_id'] for row in response.json()['results'])
+            if response.json()['next_cursor'] is None:
+                break
+            params['cursor'] = response.json()['next_cursor']
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('appointments'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_streaming_formats(self):
+        response = self.client.get(reverse('appointments'), {'stream': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+
+        response = self.client.get(reverse('appointments'), {'stream': 'json'})
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['date'] for row in rows][:2], ['2024-05-01', '2024-05-01'])
+
+    def test_streams_match_the_pages(self):
+        for params in ({}, {'fields': 'appointment_id,date'}, {'expand': 'patient', 'fields': 'patient.user.email'}):
+            with self.subTest(**params):
+                page = self.client.get(reverse('appointments'), {**params, 'page_size': 100}).json()['results']
+                response = self.client.get(reverse('appointments'), {**params, 'stream': 'json'})
+                self.assertEqual(json.loads(b''.join(response.streaming_content)), page)
+
+    def test_streams_are_compressed_chunk_by_chunk(self):
+        response = self.client.get(reverse('appointments'), {'stream': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+
+
+class BookingTests(AppointmentTestCase):
+    def book(self, **extra):
+        payload = {'specialist': self.specialist.pk, 'patient': self.patient.pk, 'date': '2024-05-06', 'time': '09:00', **extra}
+        return self.client.post(reverse('create_appointment'), payload, content_type='application/json')
+
+    def test_second_booking_of_a_slot_conflicts(self):
+        self.assertEqual(self.book().status_code, 201)
+        response = self.book()
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('message', response.json())
+        self.assertEqual(self.book(time='09:30').status_code, 201)
+
+    def test_canceled_bookings_free_the_slot(self):
+        self.create_appointment(datetime.date(2024, 5, 6), datetime.time(9), status='Canceled')
+        self.assertEqual(self.book().status_code, 201)
+
+    def test_constraint_rejects_writes_that_skip_the_booking_path(self):
+        self.create_appointment(datetime.date(2024, 5, 6), datetime.time(9))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_appointment(datetime.date(2024, 5, 6), datetime.time(9))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'needs a database with concurrent writers')
+class ConcurrentBookingTests(TransactionTestCase):
+    attempts = 200
+
+    def test_exactly_one_concurrent_booking_wins(self):
+        patient = Patient.objects.get(user=create_user('patient@example.com', 'Patient'))
+        specialist = Specialist.objects.get(user=create_user('specialist@example.com', 'Specialist'))
+        payload = {'specialist': specialist.pk, 'patient': patient.pk, 'date': '2024-05-06', 'time': '09:00'}
+        workers = 50
+        barrier = threading.Barrier(workers)
+
+        def book(attempt):
+            try:
+                if attempt < workers:
+                    barrier.wait()
+                return Client().post(reverse('create_appointment'), payload, content_type='application/json').status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            codes = list(pool.map(book, range(self.attempts)))
+        self.assertEqual(codes.count(201), 1)
+        self.assertEqual(codes.count(409), self.attempts - 1)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+
+class StatusNotificationTests(AppointmentTestCase):
+    def test_status_changes_notify_through_the_job_queue(self):
+        appointment = self.create_appointment(datetime.date(2024, 5, 6), datetime.time(9))
+        appointment.symptom_type = 'Fever'
+        appointment.save()
+        appointment.status = 'Confirmed'
+        appointment.save()
+        self.assertEqual(Job.objects.filter(task='appointments.notify_appointment_status').count(), 2)
+        self.assertFalse(Notification.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        received = dict(Notification.objects.values_list('receiver_id', 'content'))
+        self.assertIn('New appointment request', received[self.specialist.pk])
+        self.assertIn('is confirmed', received[self.patient.pk])
+
+
+@override_settings(REMINDER_LEAD_HOURS=24)
+class ReminderTests(AppointmentTestCase):
+    def setUp(self):
+        self.now = datetime.datetime(2024, 5, 1, 12, tzinfo=datetime.timezone.utc)
+
+    def at(self, hours):
+        return self.now + datetime.timedelta(hours=hours)
+
+    def book_at(self, hours, status='Confirmed'):
+        start = self.at(hours)
+        return self.create_appointment(start.date(), start.time(), status=status)
+
+    def reminded(self):
+        return set(Appointment.objects.filter(reminder_sent_at__isnull=False).values_list('time', flat=True))
+
+    def test_each_tick_only_reads_the_newly_due_window(self):
+        self.assertEqual(send_due_reminders(self.now), 0)
+        due = self.book_at(24.5)
+        self.book_at(25, status='Pending')
+        self.book_at(30)
+        self.assertEqual(send_due_reminders(self.at(1)), 1)
+        self.assertEqual(self.reminded(), {due.time})
+        # Running the same tick again, or from another process, sends nothing new.
+        self.assertEqual(send_due_reminders(self.at(1)), 0)
+        self.assertEqual(send_due_reminders(self.at(6)), 1)
+        self.assertEqual(Notification.objects.filter(notification_type='Reminder', receiver=self.patient.user).count(), 2)
+        self.assertEqual(ReminderCursor.objects.get().position, self.at(6))
+
+    def test_the_first_tick_catches_appointments_already_due(self):
+        due = self.book_at(2)
+        self.book_at(-1)
+        self.assertEqual(send_due_reminders(self.now), 1)
+        self.assertEqual(self.reminded(), {due.time})
+
+    def test_late_confirmations_are_reminded_by_the_job(self):
+        send_due_reminders(self.now)
+        send_due_reminders(self.at(10))
+        appointment = self.book_at(20, status='Pending')
+        appointment.status = 'Confirmed'
+        with mock.patch('django.utils.timezone.now', return_value=self.at(10)):
+            appointment.save()
+            run_pending()
+        self.assertEqual(self.reminded(), {appointment.time})
+        self.assertEqual(send_due_reminders(self.at(11)), 0)
+
+
+class LifecycleTests(AppointmentTestCase):
+    def setUp(self):
+        self.appointment = self.create_appointment(datetime.date(2024, 5, 6), datetime.time(9))
+
+    def post(self, name, appointment=None, **data):
+        url = reverse(name, args=[(appointment or self.appointment).pk])
+        return self.client.post(url, data, content_type='application/json')
+
+    def test_transitions_are_single_conditional_updates(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.post('confirm_appointment')
+        appointment_queries = [query['sql'].split()[0] for query in captured if '"appointments_appointment"' in query['sql']]
+        # Written first, without reading the row beforehand.
+        self.assertEqual(appointment_queries, ['UPDATE', 'SELECT'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['status'], response.json()['version']), ('Confirmed', 2))
+
+        response = self.post('confirm_appointment')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'Confirmed')
+        self.assertEqual(self.post('complete_appointment').json()['status'], 'Completed')
+        self.assertEqual(self.post('cancel_appointment').status_code, 409)
+        self.assertEqual(self.post('cancel_appointment', appointment=Appointment(pk=uuid.uuid4())).status_code, 404)
+
+    def test_stale_versions_are_rejected(self):
+        self.assertEqual(self.post('confirm_appointment', version=1).status_code, 200)
+        response = self.post('cancel_appointment', version=1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 2)
+        self.assertEqual(self.post('reschedule_appointment', date='2024-05-07', time='10:00', version=1).status_code, 409)
+
+    def test_reschedule_respects_bookings_and_resets_reminders(self):
+        self.create_appointment(datetime.date(2024, 5, 7), datetime.time(10))
+        Appointment.objects.filter(pk=self.appointment.pk).update(reminder_sent_at=datetime.datetime(2024, 5, 5, tzinfo=datetime.timezone.utc))
+        self.assertEqual(self.post('reschedule_appointment', date='2024-05-07', time='10:00').status_code, 409)
+        response = self.post('reschedule_appointment', date='2024-05-07', time='11:00')
+        self.assertEqual(response.json()['time'], '11:00:00')
+        self.assertIsNone(Appointment.objects.get(pk=self.appointment.pk).reminder_sent_at)
+
+    def test_reschedule_only_reports_slot_clashes_as_taken(self):
+        with mock.patch('appointments.lifecycle.appointments_changed.send', side_effect=IntegrityError('other')):
+            with self.assertRaises(IntegrityError):
+                reschedule(self.appointment.pk, datetime.date(2024, 5, 7), datetime.time(11))
+
+    def test_confirm_a_whole_day(self):
+        self.create_appointment(datetime.date(2024, 5, 6), datetime.time(10))
+        self.create_appointment(datetime.date(2024, 5, 6), datetime.time(11), status='Canceled')
+        self.create_appointment(datetime.date(2024, 5, 7), datetime.time(9))
+        response = self.client.post(
+            reverse('confirm_day', args=[self.specialist.pk]), {'date': '2024-05-06'}, content_type='application/json'
+        )
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(
+            dict(AppointmentDailyStat.objects.filter(date=datetime.date(2024, 5, 6), count__gt=0).values_list('status', 'count')),
+            {'Confirmed': 2, 'Canceled': 1},
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        self.assertEqual(Notification.objects.filter(receiver=self.patient.user, content__contains='confirmed').count(), 2)
+
+
+class AvailabilityTests(AppointmentTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Specialization.objects.create(title='Dentist', description='Teeth', specialist=cls.specialist)
+        cls.other = Specialist.objects.get(user=create_user('other@example.com', 'Specialist'))
+        Specialization.objects.create(title='Dentist', description='Teeth', specialist=cls.other)
+        # 2024-05-06 is a Monday.
+        cls.monday = datetime.date(2024, 5, 6)
+        WorkingHours.objects.create(specialist=cls.specialist, weekday=0, start_time=datetime.time(9), end_time=datetime.time(11), slot_minutes=30)
+        WorkingHours.objects.create(specialist=cls.other, weekday=0, start_time=datetime.time(10), end_time=datetime.time(11), slot_minutes=60)
+        cls.now = datetime.datetime(2024, 5, 1, tzinfo=datetime.timezone.utc)
+
+    def test_slots_are_merged_in_time_order_and_skip_bookings(self):
+        self.create_appointment(self.monday, datetime.time(9, 30))
+        self.create_appointment(self.monday, datetime.time(10), status='Canceled')
+        slots = find_free_slots(self.monday, self.monday, specialization='Dentist', limit=10, now=self.now)
+        self.assertEqual(
+            [(slot['specialist'], slot['time']) for slot in slots],
+            [
+                (self.specialist.pk, datetime.time(9)),
+                (self.specialist.pk, datetime.time(10)),
+                (self.other.pk, datetime.time(10)),
+                (self.specialist.pk, datetime.time(10, 30)),
+            ],
+        )
+
+    def test_off_grid_booking_blocks_overlapping_slots(self):
+        self.create_appointment(self.monday, datetime.time(9, 15))
+        slots = find_free_slots(self.monday, self.monday, specialist_id=self.specialist.pk, now=self.now)
+        self.assertEqual([slot['time'] for slot in slots], [datetime.time(10), datetime.time(10, 30)])
+
+    def test_limit_stops_the_search(self):
+        slots = find_free_slots(self.monday, self.monday + datetime.timedelta(days=28), specialization='Dentist', limit=2, now=self.now)
+        self.assertEqual(len(slots), 2)
+
+    def test_availability_endpoint_validates_range(self):
+        response = self.client.get(reverse('availability'), {'start': '2024-05-10', 'end': '2024-05-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('availability'), {'start': '2024-05-06', 'end': '2024-05-06', 'specialization': 'Dentist'})
+        self.assertEqual(response.status_code, 200)
+
+
+class ListQueryCountTests(AppointmentTestCase):
+    def test_list_endpoints_do_not_scale_queries_with_rows(self):
+        # One query for the ETag/Last-Modified aggregate, one for the rows.
+        for day in range(1, 6):
+            self.create_appointment(datetime.date(2024, 5, day), datetime.time(9))
+            Notification.objects.create(sender=self.specialist.user, receiver=self.patient.user, content='Hi', notification_type='Info')
+            for name in ('appointments', 'notifications'):
+                with self.subTest(endpoint=name, rows=day), self.assertNumQueries(2):
+                    self.client.get(reverse(name))
+
+
+class ConditionalGetTests(AppointmentTestCase):
+    def setUp(self):
+        self.appointment = self.create_appointment(datetime.date(2024, 5, 1), datetime.time(9))
+
+    def test_list_revalidates_without_serializing(self):
+        url = reverse('appointments')
+        response = self.client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        self.appointment.status = 'Confirmed'
+        self.appointment.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_lists_ignore_if_modified_since(self):
+        # A delete does not move MAX(updated_at), so only the ETag can validate a list.
+        url = reverse('appointments')
+        other = self.create_appointment(datetime.date(2024, 5, 2), datetime.time(9))
+        etag = self.client.get(url)['ETag']
+        last_modified = self.client.get(reverse('appointment', args=[other.pk]))['Last-Modified']
+        self.assertNotIn('Last-Modified', self.client.get(url))
+        self.appointment.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_and_pages_have_their_own_etags(self):
+        detail = self.client.get(reverse('appointment', args=[self.appointment.appointment_id]))
+        page = self.client.get(reverse('appointments'), {'page_size': 1})
+        self.assertNotEqual(detail['ETag'], page['ETag'])
+        response = self.client.get(reverse('appointment', args=[self.appointment.appointment_id]), HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(reverse('appointments'), {'page_size': 1}, HTTP_IF_NONE_MATCH=page['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_expanded_payloads_are_not_validated(self):
+        response = self.client.get(reverse('appointments'), {'expand': 'specialist'})
+        self.assertNotIn('ETag', response)
+
+
+class CalendarFeedTests(AppointmentTestCase):
+    def setUp(self):
+        cache.clear()
+        today = datetime.date.today()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment = self.create_appointment(today + datetime.timedelta(days=1), datetime.time(9), symptom_type='Dental, checkup')
+            self.create_appointment(today + datetime.timedelta(days=800), datetime.time(9))
+        self.url = reverse('specialist_calendar', args=[self.specialist.pk])
+
+    def body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_feed_lists_appointments_in_the_window(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='text/calendar')
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = self.body(response).decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn(f'UID:{self.appointment.appointment_id}@careme', body)
+        self.assertIn('SUMMARY:Dental\\, checkup appointment with Test User', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+
+        patient_feed = self.client.get(reverse('patient_calendar', args=[self.patient.pk]))
+        self.assertIn(b'STATUS:TENTATIVE', self.body(patient_feed))
+        self.assertEqual(self.client.get(reverse('patient_calendar', args=[self.specialist.pk])).status_code, 404)
+
+    def test_polls_cost_no_queries_until_an_appointment_changes(self):
+        first = self.client.get(self.url)
+        body = self.body(first)
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(cached.content, body)
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('confirm_appointment', args=[self.appointment.appointment_id]))
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'STATUS:CONFIRMED', self.body(response))
+
+    def test_unknown_users_leave_no_marker(self):
+        response = self.client.get(reverse('specialist_calendar', args=[999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(cache.get(marker_key(999)))
+
+    def test_the_cached_body_follows_the_day(self):
+        first = self.body(self.client.get(self.url))
+        later = datetime.date.today() + datetime.timedelta(days=500)
+        with mock.patch('django.utils.timezone.localdate', return_value=later):
+            response = self.client.get(self.url)
+            # The window moved past the first appointment and reached the one 800 days out.
+            self.assertTrue(response.streaming)
+            body = self.body(response)
+        self.assertNotIn(f'UID:{self.appointment.appointment_id}'.encode(), body)
+        self.assertIn(f'UID:{self.appointment.appointment_id}'.encode(), first)
+        self.assertEqual(body.count(b'BEGIN:VEVENT'), 1)
+
+    def test_saves_without_a_rename_do_not_scan_appointments(self):
+        user = User.objects.get(pk=self.patient.pk)
+        user.city = 'Cairo'
+        with CaptureQueriesContext(connection) as captured:
+            user.save()
+        self.assertFalse([query for query in captured if '"appointments_appointment"' in query['sql']])
+
+    def test_renaming_the_other_party_changes_the_feed(self):
+        etag = self.client.get(self.url)['ETag']
+        user = self.patient.user
+        user.first_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'with Renamed User', self.body(response))
+
+
+class SparseFieldsTests(AppointmentTestCase):
+    def setUp(self):
+        self.appointment = self.create_appointment(datetime.date(2024, 5, 1), datetime.time(9))
+
+    def test_fields_narrow_output_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('appointments'), {'fields': 'appointment_id,status'})
+        self.assertEqual(response.json(), [{'appointment_id': str(self.appointment.appointment_id), 'status': 'Pending'}])
+        self.assertNotIn('"reason"', queries.captured_queries[0]['sql'])
+
+    def test_expand_nests_related_rows(self):
+        response = self.client.get(reverse('appointments'), {'expand': 'specialist', 'fields': 'appointment_id,specialist.user.email'})
+        self.assertEqual(response.json()[0]['specialist'], {'user': {'email': 'specialist@example.com'}})
+
+        response = self.client.get(reverse('appointments'), {'page_size': 10, 'expand': 'patient', 'fields': 'patient.user.email'})
+        self.assertEqual(response.json()['results'], [{'patient': {'user': {'email': 'patient@example.com'}}}])
+
+    def test_fast_path_matches_serializer(self):
+        from rest_framework.renderers import JSONRenderer
+        from timelycare.serializers import fast_data
+        # The fast path leaves dates and UUIDs to the renderer, so compare rendered JSON.
+        render = JSONRenderer().render
+        Notification.objects.create(sender=self.specialist.user, receiver=self.patient.user, content='Hi', notification_type='Info')
+        for model, serializer_class, expand in (
+            (Appointment, AppointmentSerializer, 'specialist,patient'),
+            (Notification, NotificationSerializer, 'sender'),
+        ):
+            for options in ({}, {'expand': expand}):
+                with self.subTest(model=model.__name__, **options):
+                    queryset = model.objects.all()
+                    expected = serializer_class(queryset, many=True, **options).data
+                    self.assertEqual(render(fast_data(queryset, serializer_class(many=True, **options))), render(expected))
+
+
+class NotificationPushTests(AppointmentTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.patient_token = AuthToken.objects.create(cls.patient.user)[1]
+        cls.specialist_token = AuthToken.objects.create(cls.specialist.user)[1]
+
+    def communicator(self, path, user=None):
+        path, _, query_string = path.partition('?')
+        scope = {
+            'type': 'websocket',
+            'path': path,
+            'query_string': query_string.encode(),
+            'headers': [],
+            'subprotocols': [],
+            # What AuthMiddlewareStack puts there: a django.contrib.auth user.
+            'user': user or AnonymousUser(),
+        }
+        return ApplicationCommunicator(URLRouter(websocket_urlpatterns), scope)
+
+    def notify(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                sender=self.specialist.user, receiver=self.patient.user, content=content, notification_type='Info'
+            )
+
+    async def connect(self, path, user=None, accepted='websocket.accept'):
+        communicator = self.communicator(path, user)
+        await communicator.send_input({'type': 'websocket.connect'})
+        self.assertEqual((await communicator.receive_output())['type'], accepted)
+        return communicator
+
+    async def receive_json(self, communicator):
+        return json.loads((await communicator.receive_output())['text'])
+
+    async def test_new_notifications_are_pushed_to_their_receiver(self):
+        communicator = await self.connect(f'ws/notifications/{self.patient.pk}/?token={self.patient_token}')
+        await sync_to_async(self.notify)('Hello')
+        self.assertEqual((await self.receive_json(communicator))['content'], 'Hello')
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait()
+
+    async def test_reconnect_replays_missed_notifications(self):
+        first = await sync_to_async(self.notify)('Seen')
+        await sync_to_async(self.notify)('Missed')
+        since = first.sent_at.isoformat().replace('+', '%2B')
+        communicator = await self.connect(f'ws/notifications/{self.patient.pk}/?since={since}&token={self.patient_token}')
+        self.assertEqual((await self.receive_json(communicator))['content'], 'Missed')
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait()
+
+    async def test_only_the_receiver_may_subscribe(self):
+        path = f'ws/notifications/{self.patient.pk}/'
+        # A session user whose auth.User id happens to equal the receiver's id.
+        admin = await sync_to_async(AuthUser.objects.create)(pk=self.patient.pk, username='admin', is_staff=True)
+        attempts = [
+            (path, None),
+            (path, admin),
+            (f'{path}?token={self.specialist_token}', None),
+            (f'{path}?token=garbage', None),
+        ]
+        for url, user in attempts:
+            with self.subTest(url=url, user=user):
+                communicator = await self.connect(url, user, accepted='websocket.close')
+                await sync_to_async(self.notify)('Private')
+                self.assertTrue(await communicator.receive_nothing())
+
+
+class InboxTests(AppointmentTestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notifications = [
+                Notification.objects.create(
+                    sender=self.specialist.user, receiver=self.patient.user, content=str(i), notification_type='Info'
+                )
+                for i in range(5)
+            ]
+
+    def test_inbox_pages_newest_first(self):
+        url = reverse('inbox', args=[self.patient.pk])
+        first = self.client.get(url, {'page_size': 3}).json()
+        second = self.client.get(url, {'page_size': 3, 'cursor': first['next_cursor']}).json()
+        contents = [row['content'] for row in first['results'] + second['results']]
+        expected = Notification.objects.order_by('-sent_at', '-notification_id').values_list('content', flat=True)
+        self.assertEqual(contents, list(expected))
+        self.assertIsNone(second['next_cursor'])
+
+    def test_mark_read_updates_the_cached_unread_count(self):
+        count_url = reverse('unread_notifications_count', args=[self.patient.pk])
+        self.assertEqual(self.client.get(count_url).json()['unread'], 5)
+        with self.assertNumQueries(0):
+            self.client.get(count_url)
+
+        ids = [str(n.notification_id) for n in self.notifications[:2]]
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse('mark_notifications_read', args=[self.patient.pk]), {'ids': ids}, content_type='application/json'
+            )
+        self.assertEqual(response.json(), {'updated': 2, 'unread': 3})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(sender=self.specialist.user, receiver=self.patient.user, content='new', notification_type='Info')
+        self.assertEqual(self.client.get(count_url).json()['unread'], 4)
+
+        response = self.client.get(reverse('inbox', args=[self.patient.pk]), {'unread': 'true'})
+        self.assertEqual(len(response.json()['results']), 4)
+
+    def test_mark_read_changes_the_inbox_etag(self):
+        url = reverse('inbox', args=[self.patient.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.post(
+            reverse('mark_notifications_read', args=[self.patient.pk]),
+            {'ids': [str(self.notifications[0].notification_id)]}, content_type='application/json',
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_mark_read_rejects_malformed_bodies(self):
+        url = reverse('mark_notifications_read', args=[self.patient.pk])
+        for body in ([1, 2], 'all', {}, {'all': False}, {'ids': ['not-a-uuid']}):
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post(url, body, content_type='application/json').status_code, 400)
+        response = self.client.post(url, {'all': True}, content_type='application/json')
+        self.assertEqual(response.json(), {'updated': 5, 'unread': 0})
+
+    def test_notification_detail_by_uuid(self):
+        notification = self.notifications[0]
+        response = self.client.get(reverse('notification', args=[notification.notification_id]))
+        self.assertEqual(response.json()['content'], '0')
+
+
+class AsyncAppointmentViewTests(AppointmentTestCase):
+    def test_async_list_matches_sync_list(self):
+        for day in range(1, 4):
+            self.create_appointment(datetime.date(2024, 5, day), datetime.time(9))
+        for params in ({}, {'page_size': 2}, {'page_size': 2, 'fields': 'date,time'}, {'fields': 'appointment_id'}):
+            expected = self.client.get(reverse('appointments'), params).json()
+            self.assertEqual(self.client.get(reverse('async_appointments'), params).json(), expected)
+
+    async def test_async_stream(self):
+        for day in range(1, 4):
+            await sync_to_async(self.create_appointment)(datetime.date(2024, 5, day), datetime.time(9))
+        response = await self.async_client.get(reverse('async_appointments'), {'stream': 'json'})
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(json.loads(content)), 3)
@@ -1,19 +1,28 @@
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('appointments/', views.appointments, name='appointments'),
     path('appointments/<uuid:appointment_id>/', views.appointments, name='appointment'),
     path('appointments/create/', views.create_appointment, name='create_appointment'),
+    path('appointments/<uuid:appointment_id>/confirm/', views.change_appointment_status, {'action': 'confirm'}, name='confirm_appointment'),
+    path('appointments/<uuid:appointment_id>/cancel/', views.change_appointment_status, {'action': 'cancel'}, name='cancel_appointment'),
+    path('appointments/<uuid:appointment_id>/complete/', views.change_appointment_status, {'action': 'complete'}, name='complete_appointment'),
+    path('appointments/<uuid:appointment_id>/reschedule/', views.reschedule_appointment, name='reschedule_appointment'),
+    path('specialists/<int:user_id>/appointments/confirm/', views.change_day_status, {'action': 'confirm'}, name='confirm_day'),
+    path('specialists/<int:user_id>/appointments/cancel/', views.change_day_status, {'action': 'cancel'}, name='cancel_day'),
+    path('async/appointments/', async_views.appointments, name='async_appointments'),
+    path('async/appointments/<uuid:appointment_id>/', async_views.appointments, name='async_appointment'),
     path('notifications/', views.notifications, name='notifications'),
     path('notifications/create/', views.create_notification, name='create_notification'),
-    path('notifications/<int:notification_id>/', views.notifications, name='notification'),
+    path('notifications/<uuid:notification_id>/', views.notifications, name='notification'),
+    path('notifications/inbox/<int:user_id>/', views.inbox, name='inbox'),
+    path('notifications/inbox/<int:user_id>/read/', views.mark_notifications_read, name='mark_notifications_read'),
+    path('notifications/inbox/<int:user_id>/unread-count/', views.unread_notifications_count, name='unread_notifications_count'),
+    path('availability/', views.availability, name='availability'),
+    path('specialists/<int:user_id>/calendar.ics', views.calendar_feed, {'role': 'specialist'}, name='specialist_calendar'),
+    path('patients/<int:user_id>/calendar.ics', views.calendar_feed, {'role': 'patient'}, name='patient_calendar'),
+    path('specialists/<int:user_id>/working-hours/', views.working_hours, name='working_hours'),
 ]
-# Additional paths can be added here
-# For example, to add a path for updating an appointment, you could use:
-#path('appointments/<int:appointment_id>/update/', views.update_appointment, name='update_appointment'),
-
-# Similarly, to add a path for deleting an appointment, you could use:
-#path('appointments/<int:appointment_id>/delete/', views.delete_appointment, name='delete_appointment'),
\ No newline at end of file
@@ -1,9 +1,25 @@
+import datetime
+
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Appointment, Notification
-from .serializers import AppointmentSerializer, NotificationSerializer
+from profiles.models import Specialist
+from .models import Appointment, Notification, WorkingHours
+from .serializers import AppointmentSerializer, NotificationSerializer, MarkReadSerializer, WorkingHoursSerializer, AvailabilitySearchSerializer, TransitionSerializer, RescheduleSerializer, BulkTransitionSerializer
+from .availability import find_free_slots
+from .booking import SlotTaken, book_appointment
+from .ical import PROFILES, feed_modified, feed_response
+from .inbox import INBOX_ORDERING, mark_read, unread_count
+from .lifecycle import AppointmentNotFound, TransitionConflict, bulk_transition, reschedule, transition
+from .pagination import APPOINTMENT_ORDERING, InvalidCursor, keyset_page, parse_page_size
+from .streaming import STREAM_FORMATS, streaming_response
+from timelycare.conditional import conditional_response, expanded, list_version, page_version, row_version
+from timelycare.optimizers import optimize_queryset
+from timelycare.serializers import serialize_list
 
 # Create your views here.
 
@@ -19,18 +35,52 @@ def appointments(request, appointment_id=None):
     """
     Retrieve appointments by appointment_id.
     If no appointment ID is provided, return all appointments.
+
+    The list can be paged with ?page_size=N and ?cursor=<next_cursor>, or
+    streamed with ?stream=ndjson or ?stream=json. ?fields= and ?expand= pick
+    the fields to return. Except for streams and expanded payloads, a
+    matching If-None-Match (and, for one appointment, If-Modified-Since) is
+    answered with 304 before serializing.
     """
     if appointment_id is None:
         appointments = Appointment.objects.all()
-        appointment_serializer = AppointmentSerializer(appointments, many=True)
-        return Response(appointment_serializer.data)
+        stream_format = request.query_params.get('stream')
+        cursor = request.query_params.get('cursor')
+        page_size = request.query_params.get('page_size')
+
+        if stream_format is not None:
+            if stream_format not in STREAM_FORMATS:
+                return Response({"message": "Unsupported stream format."}, status=status.HTTP_400_BAD_REQUEST)
+            appointment_serializer = AppointmentSerializer(many=True, context={'request': request})
+            appointments = optimize_queryset(appointments, appointment_serializer, required=APPOINTMENT_ORDERING)
+            return streaming_response(appointments.order_by(*APPOINTMENT_ORDERING), appointment_serializer, stream_format)
+
+        if cursor is not None or page_size is not None:
+            appointment_serializer = AppointmentSerializer(many=True, context={'request': request})
+            appointments = optimize_queryset(appointments, appointment_serializer, required=(*APPOINTMENT_ORDERING, 'updated_at'))
+            try:
+                page, next_cursor = keyset_page(appointments, cursor, parse_page_size(page_size))
+            except InvalidCursor as exc:
+                return Response({"message": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            appointment_serializer.instance = page
+
+            def render():
+                return Response({"results": appointment_serializer.data, "next_cursor": next_cursor})
+
+            return conditional_response(request, None if expanded(request) else page_version(page), render, last_modified=False)
+
+        def render():
+            return Response(serialize_list(appointments, AppointmentSerializer, {'request': request}))
+
+        return conditional_response(request, None if expanded(request) else list_version(appointments), render, last_modified=False)
     
     try:
         appointment = Appointment.objects.get(appointment_id=appointment_id)
-        appointment_serializer = AppointmentSerializer(appointment)
-        return Response(appointment_serializer.data)
     except Appointment.DoesNotExist:
         return Response({"message": "Appointment not found."}, status=status.HTTP_404_NOT_FOUND)
+    appointment_serializer = AppointmentSerializer(appointment, context={'request': request})
+    version = None if expanded(request) else row_version(appointment)
+    return conditional_response(request, version, lambda: Response(appointment_serializer.data))
 
 @api_view(['POST'])
 def create_appointment(request):
@@ -38,19 +88,140 @@ def create_appointment(request):
     Create a new appointment.
     """
     appointment_serializer = AppointmentSerializer(data=request.data)
-    if appointment_serializer.is_valid():
-        appointment_serializer.save()
-        return Response(appointment_serializer.data, status=status.HTTP_201_CREATED)
-    return Response(appointment_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not appointment_serializer.is_valid():
+        return Response(appointment_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        book_appointment(appointment_serializer)
+    except SlotTaken:
+        return Response({"message": "This specialist is already booked at that time."}, status=status.HTTP_409_CONFLICT)
+    return Response(appointment_serializer.data, status=status.HTTP_201_CREATED)
+
+def _conflict_response(exc):
+    return Response({"message": str(exc), **(exc.current or {})}, status=status.HTTP_409_CONFLICT)
+
+
+@api_view(['POST'])
+def change_appointment_status(request, appointment_id, action):
+    """
+    Confirm, cancel or complete an appointment.
+    Pass {"version": n} to only apply the change to the version last seen.
+    """
+    transition_serializer = TransitionSerializer(data=request.data)
+    if not transition_serializer.is_valid():
+        return Response(transition_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        row = transition(appointment_id, action, transition_serializer.validated_data.get('version'))
+    except AppointmentNotFound:
+        return Response({"message": "Appointment not found."}, status=status.HTTP_404_NOT_FOUND)
+    except TransitionConflict as exc:
+        return _conflict_response(exc)
+    return Response(row)
+
+
+@api_view(['POST'])
+def reschedule_appointment(request, appointment_id):
+    """
+    Move an appointment to {"date": ..., "time": ...}, optionally only at {"version": n}.
+    """
+    reschedule_serializer = RescheduleSerializer(data=request.data)
+    if not reschedule_serializer.is_valid():
+        return Response(reschedule_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = reschedule_serializer.validated_data
+    try:
+        row = reschedule(appointment_id, data['date'], data['time'], data.get('version'))
+    except AppointmentNotFound:
+        return Response({"message": "Appointment not found."}, status=status.HTTP_404_NOT_FOUND)
+    except TransitionConflict as exc:
+        return _conflict_response(exc)
+    except SlotTaken:
+        return Response({"message": "This specialist is already booked at that time."}, status=status.HTTP_409_CONFLICT)
+    return Response(row)
+
+
+@api_view(['POST'])
+def change_day_status(request, user_id, action):
+    """
+    Confirm or cancel every applicable appointment of a specialist on {"date": ...}.
+    """
+    bulk_serializer = BulkTransitionSerializer(data=request.data)
+    if not bulk_serializer.is_valid():
+        return Response(bulk_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    rows = bulk_transition(user_id, bulk_serializer.validated_data['date'], action)
+    return Response({"updated": len(rows), "appointment_ids": [row['appointment_id'] for row in rows]})
+
 
 @api_view(['GET'])
-def notifications(request):
+def notifications(request, notification_id=None):
     """
-    Retrieve all notifications.
+    Retrieve notifications by notification_id.
+    If no notification ID is provided, return all notifications.
+    Unless ?expand= is given, a matching If-None-Match (and, for one
+    notification, If-Modified-Since) is answered with 304 before serializing.
     """
-    notifications = Notification.objects.all()
-    notification_serializer = NotificationSerializer(notifications, many=True)
-    return Response(notification_serializer.data)
+    if notification_id is None:
+        notifications = Notification.objects.all()
+
+        def render():
+            return Response(serialize_list(notifications, NotificationSerializer, {'request': request}))
+
+        return conditional_response(request, None if expanded(request) else list_version(notifications), render, last_modified=False)
+
+    try:
+        notification = Notification.objects.get(notification_id=notification_id)
+    except Notification.DoesNotExist:
+        return Response({"message": "Notification not found."}, status=status.HTTP_404_NOT_FOUND)
+    notification_serializer = NotificationSerializer(notification, context={'request': request})
+    version = None if expanded(request) else row_version(notification)
+    return conditional_response(request, version, lambda: Response(notification_serializer.data))
+
+@api_view(['GET'])
+def inbox(request, user_id):
+    """
+    Retrieve a user's notifications, newest first, one page at a time.
+    Pass ?unread=true for unread notifications only and ?cursor=<next_cursor>
+    for the following page.
+    """
+    notifications = Notification.objects.filter(receiver_id=user_id)
+    if request.query_params.get('unread') in ('1', 'true'):
+        notifications = notifications.filter(is_read=False)
+    notification_serializer = NotificationSerializer(many=True, context={'request': request})
+    notifications = optimize_queryset(notifications, notification_serializer, required=(*INBOX_ORDERING, 'updated_at'))
+    try:
+        page, next_cursor = keyset_page(
+            notifications,
+            request.query_params.get('cursor'),
+            parse_page_size(request.query_params.get('page_size')),
+            ordering=INBOX_ORDERING,
+        )
+    except InvalidCursor as exc:
+        return Response({"message": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    notification_serializer.instance = page
+
+    def render():
+        return Response({"results": notification_serializer.data, "next_cursor": next_cursor})
+
+    return conditional_response(request, None if expanded(request) else page_version(page), render, last_modified=False)
+
+@api_view(['POST'])
+def mark_notifications_read(request, user_id):
+    """
+    Mark notifications read. Send {"ids": [...]} for specific notifications,
+    or {"all": true} for every unread notification of the user.
+    """
+    mark_read_serializer = MarkReadSerializer(data=request.data)
+    if not mark_read_serializer.is_valid():
+        return Response(mark_read_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = mark_read_serializer.validated_data
+    notification_ids = None if data['all'] else data['ids']
+    updated = mark_read(user_id, notification_ids)
+    return Response({"updated": updated, "unread": unread_count(user_id)})
+
+@api_view(['GET'])
+def unread_notifications_count(request, user_id):
+    """
+    Number of unread notifications of a user, served from the cache.
+    """
+    return Response({"unread": unread_count(user_id)})
 
 @api_view(['POST'])
 def create_notification(request):
@@ -62,4 +233,72 @@ def create_notification(request):
         notification_serializer.save()
         return Response(notification_serializer.data, status=status.HTTP_201_CREATED)
     else:
-        return Response(notification_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(notification_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET', 'POST'])
+def working_hours(request, user_id):
+    """
+    List or add the weekly working-hour templates of a specialist.
+    """
+    if not Specialist.objects.filter(user_id=user_id).exists():
+        return Response({"message": "Specialist not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        templates = WorkingHours.objects.filter(specialist_id=user_id).order_by('weekday', 'start_time')
+        return Response(WorkingHoursSerializer(templates, many=True).data)
+
+    data = request.data.copy()
+    data['specialist'] = user_id
+    working_hours_serializer = WorkingHoursSerializer(data=data)
+    if working_hours_serializer.is_valid():
+        working_hours_serializer.save()
+        return Response(working_hours_serializer.data, status=status.HTTP_201_CREATED)
+    return Response(working_hours_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+def availability(request):
+    """
+    Find the next free slots between ?start and ?end (inclusive), optionally
+    restricted to a ?specialization title or a single ?specialist.
+    """
+    search_serializer = AvailabilitySearchSerializer(data=request.query_params)
+    if not search_serializer.is_valid():
+        return Response(search_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    search = search_serializer.validated_data
+    slots = find_free_slots(
+        search['start'],
+        search['end'],
+        specialization=search.get('specialization'),
+        specialist_id=search.get('specialist'),
+        limit=search['limit'],
+    )
+    return Response(slots)
+
+# A plain Django view: DRF's content negotiation would refuse the
+# Accept: text/calendar that calendar clients send.
+@require_GET
+def calendar_feed(request, user_id, role):
+    """
+    iCal feed of a specialist's or patient's appointments, for calendar apps.
+
+    Polls are answered from the per-user marker: 304 for a matching
+    If-None-Match/If-Modified-Since, otherwise the cached feed, with the
+    database read only after one of the user's appointments changed.
+    """
+    modified = feed_modified(role, user_id)
+    if modified is None:
+        return JsonResponse({"message": f"{role.capitalize()} not found."}, status=status.HTTP_404_NOT_FOUND)
+    # The window of days covered moves at midnight, so the date is part of
+    # the ETag and of the cached body's key.
+    today = timezone.localdate()
+
+    def render():
+        response = feed_response(role, user_id, modified, today)
+        if response.streaming and not PROFILES[role].objects.filter(pk=user_id).exists():
+            # The marker is per user: it may exist for this id in its other role.
+            return JsonResponse({"message": f"{role.capitalize()} not found."}, status=status.HTTP_404_NOT_FOUND)
+        return response
+
+    version = (role, today, datetime.datetime.fromtimestamp(modified, datetime.timezone.utc))
+    return conditional_response(request, version, render)
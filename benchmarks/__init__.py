@@ -0,0 +1,6 @@
+"""
+Benchmarks for the timelycare API.
+
+Each module is runnable with ``python -m benchmarks.<name>`` and works against a
+throwaway test database, so it is safe to point at a configured DATABASE_URL.
+"""
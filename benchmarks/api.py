@@ -0,0 +1,261 @@
+"""
+Benchmark every URL in timelycare/urls.py against a synthetic dataset.
+
+    python -m benchmarks.api --users 2000 --iterations 50 --output before.json
+    python -m benchmarks.api --load --concurrency 16 --output after.json
+
+Each endpoint is measured with Django's test client (latency percentiles,
+queries and response bytes per request). With --load, the project is also
+served from a live server thread and hammered by a concurrent HTTP load
+generator. Reports are JSON so two runs can be diffed.
+"""
+import argparse
+import datetime
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from . import harness
+
+# Method and sample body for the endpoints that change data; keys are URL
+# names. Each body factory gets the seeded ids and the iteration number.
+WRITE_REQUESTS = {
+    'add_user': ('post', lambda ids, i: {
+        'email': f'bench{i}@example.com', 'password': 'benchmark', 'first_name': 'Bench', 'last_name': 'User',
+        'date_of_birth': '1990-01-01', 'gender': 'Male', 'phone_number': '0100000000', 'user_type': 'Patient',
+    }),
+    'bulk_add_users': ('post', lambda ids, i: [
+        {
+            'email': f'bulk{i}-{n}@example.com', 'password': 'benchmark', 'first_name': 'Bulk', 'last_name': 'User',
+            'date_of_birth': '1990-01-01', 'gender': 'Female', 'phone_number': '0100000000', 'user_type': 'Patient',
+        }
+        for n in range(10)
+    ]),
+    'update_user': ('put', lambda ids, i: {'phone_number': f'011{i:08d}'}),
+    'login': ('post', lambda ids, i: {'email': 'user0@example.com', 'password': 'benchmark', 'user_type': 'Specialist'}),
+    'create_appointment': ('post', lambda ids, i: {
+        'specialist': ids['specialist_id'], 'patient': ids['patient_id'],
+        'date': str(datetime.date(2030, 1, 1) + datetime.timedelta(days=i // 600)), 'time': f'{8 + i // 60 % 10:02d}:{i % 60:02d}',
+    }),
+    'confirm_appointment': ('post', lambda ids, i: {}),
+    'cancel_appointment': ('post', lambda ids, i: {}),
+    'complete_appointment': ('post', lambda ids, i: {}),
+    'reschedule_appointment': ('post', lambda ids, i: {
+        'date': str(datetime.date(2031, 1, 1) + datetime.timedelta(days=i // 600)), 'time': f'{8 + i // 60 % 10:02d}:{i % 60:02d}',
+    }),
+    'confirm_day': ('post', lambda ids, i: {'date': str(datetime.date.today())}),
+    'cancel_day': ('post', lambda ids, i: {'date': str(datetime.date.today())}),
+    'create_notification': ('post', lambda ids, i: {
+        'sender': ids['specialist_id'], 'receiver': ids['patient_id'], 'content': 'Benchmark', 'notification_type': 'Info',
+    }),
+    'mark_notifications_read': ('post', lambda ids, i: {'all': True}),
+}
+
+# Transitions only apply once per appointment: each request gets its own,
+# created in this status before the clock starts.
+FRESH_APPOINTMENTS = {
+    'confirm_appointment': 'Pending',
+    'cancel_appointment': 'Pending',
+    'complete_appointment': 'Confirmed',
+    'reschedule_appointment': 'Pending',
+}
+
+# Endpoints left out: logout revokes the token it is called with.
+SKIPPED = {'logout'}
+
+# Seeded ids used for URL parameters, by (URL name, parameter) or parameter name.
+PARAMETER_IDS = {
+    ('get_patient', 'user_id'): 'patient_id',
+    ('async_get_patient', 'user_id'): 'patient_id',
+    ('patient_calendar', 'user_id'): 'patient_id',
+    'user_id': 'specialist_id',
+    'specialization_id': 'specialization_id',
+    'appointment_id': 'appointment_id',
+    'notification_id': 'notification_id',
+}
+
+# Query strings for endpoints that need one, by URL name.
+QUERY_STRINGS = {
+    'availability': lambda: f'?specialization=Doctor&start={datetime.date.today()}&end={datetime.date.today() + datetime.timedelta(days=30)}',
+    'search_specialist': lambda: '?specialization=Doctor&city=Cairo&name=last1',
+    'patients_by_entry': lambda: '?category=diagnosis&code=J45',
+}
+
+
+def endpoints(ids):
+    """
+    Yield (name, path) for every concrete URL of the project, admin excluded.
+    """
+    from django.urls import URLPattern, URLResolver, get_resolver
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                if pattern.app_name == 'admin':
+                    continue
+                yield from walk(pattern.url_patterns, prefix + str(pattern.pattern))
+            elif isinstance(pattern, URLPattern):
+                route = prefix + str(pattern.pattern)
+                converters = pattern.pattern.converters
+                kwargs = {}
+                for name in converters:
+                    key = PARAMETER_IDS.get((pattern.name, name), PARAMETER_IDS.get(name))
+                    if key is None or ids.get(key) is None:
+                        break
+                    kwargs[name] = ids[key]
+                else:
+                    for name, value in kwargs.items():
+                        route = route.replace(f'<{_converter_name(converters[name])}:{name}>', str(value))
+                    query = QUERY_STRINGS[pattern.name]() if pattern.name in QUERY_STRINGS else ''
+                    yield pattern.name or route, '/' + route + query
+
+    yield from walk(get_resolver().url_patterns, '')
+
+
+def _converter_name(converter):
+    from django.urls.converters import get_converters
+
+    return next(name for name, value in get_converters().items() if type(value) is type(converter))
+
+
+def fresh_appointment_paths(name, path, ids, iterations):
+    """
+    One path per iteration, each on a new appointment in the status the
+    transition starts from.
+    """
+    from appointments.models import Appointment
+
+    # A year of free slots per endpoint, after those create_appointment and reschedule use.
+    start = datetime.date(2032, 1, 1) + datetime.timedelta(days=366 * list(FRESH_APPOINTMENTS).index(name))
+    appointments = Appointment.objects.bulk_create([
+        Appointment(
+            specialist_id=ids['specialist_id'], patient_id=ids['patient_id'], status=FRESH_APPOINTMENTS[name],
+            date=start + datetime.timedelta(days=i // 20), time=datetime.time(8 + i % 20 // 2, i % 2 * 30),
+        )
+        for i in range(iterations)
+    ])
+    return [path.replace(str(ids['appointment_id']), str(appointment.appointment_id)) for appointment in appointments]
+
+
+def measure(client, paths, iterations, method='get', payload=None):
+    """
+    Request paths[i] (or the same path every time) `iterations` times, with
+    `payload(i)` as the JSON body for writes.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    latencies, queries, sizes, statuses = [], [], [], set()
+    for i in range(iterations):
+        path = paths if isinstance(paths, str) else paths[i]
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            if payload is None:
+                response = getattr(client, method)(path)
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+            else:
+                response = getattr(client, method)(path, payload(i), content_type='application/json')
+                body = response.content
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(captured))
+        sizes.append(len(body))
+        statuses.add(response.status_code)
+    return {
+        **harness.percentiles(latencies),
+        'queries_per_request': max(queries),
+        'response_bytes': max(sizes),
+        'statuses': sorted(statuses),
+    }
+
+
+def load(base_url, path, total, concurrency):
+    def one(_):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + path) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    return {
+        **harness.percentiles([latency for latency, _ in results]),
+        'errors': sum(1 for _, status in results if status >= 500),
+        'requests_per_second': total / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--specialist-ratio', type=float, default=0.2)
+    parser.add_argument('--specializations-per-specialist', type=int, default=2)
+    parser.add_argument('--appointments', type=int, default=5000)
+    parser.add_argument('--notifications', type=int, default=5000)
+    parser.add_argument('--iterations', type=int, default=20, help="Test-client requests per endpoint.")
+    parser.add_argument('--load', action='store_true', help="Also run the concurrent HTTP load generator.")
+    parser.add_argument('--load-requests', type=int, default=200, help="HTTP requests per GET endpoint.")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--only', action='append', help="Restrict to these URL names (repeatable).")
+    parser.add_argument('--keepdb', action='store_true', help="Reuse the test database between runs.")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    harness.setup()
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+
+    from .seed import seed
+
+    report = {'config': vars(args), 'revision': harness.git_revision(), 'endpoints': {}, 'skipped': []}
+    with harness.test_database(keepdb=args.keepdb):
+        started = time.perf_counter()
+        ids = seed(
+            users=args.users,
+            specialist_ratio=args.specialist_ratio,
+            specializations_per_specialist=args.specializations_per_specialist,
+            appointments=args.appointments,
+            notifications=args.notifications,
+        )
+        report['dataset'] = {'vendor': connection.vendor, 'seconds': time.perf_counter() - started, **ids['counts']}
+        selected = [(name, path) for name, path in endpoints(ids) if not args.only or name in args.only]
+        report['skipped'] = [f'{name} {path}' for name, path in selected if name in SKIPPED]
+        selected = [(name, path) for name, path in selected if name not in SKIPPED]
+
+        client = Client()
+        get_paths = []
+        for name, path in selected:
+            cache.clear()
+            if name in WRITE_REQUESTS:
+                method, body = WRITE_REQUESTS[name]
+                paths = fresh_appointment_paths(name, path, ids, args.iterations) if name in FRESH_APPOINTMENTS else path
+                result = measure(client, paths, args.iterations, method, lambda i, body=body: body(ids, i))
+            else:
+                method = 'get'
+                result = measure(client, path, args.iterations)
+                if result['statuses'] == [405]:
+                    # A write endpoint without a sample request: no timings to report.
+                    report['skipped'].append(f'{name} {path}')
+                    continue
+                get_paths.append((name, path))
+            result['method'] = method.upper()
+            report['endpoints'][f'{name} {path}'] = {'client': result}
+
+        if args.load:
+            with harness.live_server() as base_url:
+                for name, path in get_paths:
+                    report['endpoints'][f'{name} {path}']['load'] = load(base_url, path, args.load_requests, args.concurrency)
+
+    report['peak_rss_mb'] = harness.peak_rss_mb()
+    harness.write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
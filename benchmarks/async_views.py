@@ -0,0 +1,144 @@
+"""
+Compare the sync DRF read endpoints with their async counterparts under ASGI.
+
+    python -m benchmarks.async_views --concurrency 50 --requests 500
+    python -m benchmarks.async_views --base-url http://127.0.0.1:8000  # running uvicorn/daphne
+
+Without --base-url, requests are driven straight into Django's ASGI handler in
+this process. --client-delay makes every simulated client read its response
+slowly, which is where sync views pin a thread per request.
+"""
+import argparse
+import asyncio
+import time
+
+from . import harness
+
+PAIRS = [
+    ('users', '/users/', '/async/users/'),
+    ('patients', '/patient/', '/async/patient/'),
+    ('specialists', '/specialist/', '/async/specialist/'),
+    ('specializations', '/specialization/', '/async/specialization/'),
+    ('appointments', '/appointments/appointments/?page_size=100', '/appointments/async/appointments/?page_size=100'),
+]
+
+
+def asgi_client(application, client_delay):
+    async def get(url):
+        path, _, query = url.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        request_sent = False
+        disconnected = asyncio.Event()
+        status = None
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif client_delay:
+                await asyncio.sleep(client_delay)
+
+        try:
+            await application(scope, receive, send)
+        finally:
+            disconnected.set()
+        return status
+
+    return get
+
+
+def http_client(base_url, session):
+    async def get(url):
+        async with session.get(base_url.rstrip('/') + url) as response:
+            await response.read()
+            return response.status
+
+    return get
+
+
+async def drive(get, url, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            status = await get(url)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return {**harness.percentiles(latencies), 'errors': errors, 'requests_per_second': total / elapsed}
+
+
+async def compare(get, total, concurrency):
+    results = {}
+    for name, sync_url, async_url in PAIRS:
+        results[name] = {
+            'sync': await drive(get, sync_url, total, concurrency),
+            'async': await drive(get, async_url, total, concurrency),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and variant.")
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--client-delay', type=float, default=0.0, help="Seconds each client spends reading a body chunk.")
+    parser.add_argument('--users', type=int, default=500, help="Size of the seeded dataset.")
+    parser.add_argument('--base-url', help="Benchmark a running server instead of the in-process ASGI handler.")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    harness.setup()
+    report = {'config': vars(args)}
+    if args.base_url:
+        import aiohttp
+
+        async def run():
+            async with aiohttp.ClientSession() as session:
+                return await compare(http_client(args.base_url, session), args.requests, args.concurrency)
+
+        report['results'] = asyncio.run(run())
+    else:
+        from django.core.asgi import get_asgi_application
+
+        from .seed import seed
+
+        with harness.test_database():
+            seed(users=args.users, appointments=args.users * 5, notifications=args.users * 5)
+            client = asgi_client(get_asgi_application(), args.client_delay)
+            report['results'] = asyncio.run(compare(client, args.requests, args.concurrency))
+    report['peak_rss_mb'] = harness.peak_rss_mb()
+    harness.write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure the bytes and CPU time per request of the list endpoints for each
+response encoding (identity, gzip, and brotli when installed), and the time
+DRF's JSONRenderer and FastJSONRenderer take to render the same data.
+
+    python -m benchmarks.encoding --users 2000 --appointments 20000 --iterations 20
+"""
+import argparse
+import time
+
+from . import harness
+
+ENDPOINTS = ('users', 'get_patient', 'get_specialist', 'appointments', 'notifications')
+
+
+def _cpu(function, iterations):
+    """
+    Run function `iterations` times; return (CPU ms per call, last result).
+    """
+    started = time.process_time()
+    for _ in range(iterations):
+        result = function()
+    return (time.process_time() - started) * 1000 / iterations, result
+
+
+def encodings():
+    from timelycare import middleware, renderers
+
+    accepted = {'identity': 'identity', 'gzip': 'gzip'}
+    if middleware.brotli is not None:
+        accepted['br'] = 'br'
+    formats = {'json': 'application/json'}
+    if renderers.msgpack is not None:
+        formats['msgpack'] = 'application/msgpack'
+    return accepted, formats
+
+
+def measure_requests(iterations):
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    accepted, formats = encodings()
+    results = {}
+    for name in ENDPOINTS:
+        url = reverse(name)
+        results[name] = {}
+        for format_name, media_type in formats.items():
+            for coding, header in accepted.items():
+                def get():
+                    return client.get(url, HTTP_ACCEPT=media_type, HTTP_ACCEPT_ENCODING=header)
+
+                cpu_ms, response = _cpu(get, iterations)
+                results[name][f'{format_name}/{coding}'] = {
+                    'cpu_ms': cpu_ms,
+                    'bytes': len(response.content),
+                    'content_encoding': response.get('Content-Encoding', 'identity'),
+                }
+    return results
+
+
+def measure_renderers(iterations):
+    from django.test import Client
+    from django.urls import reverse
+    from rest_framework.renderers import JSONRenderer
+
+    from timelycare.renderers import FastJSONRenderer
+
+    client = Client()
+    results = {}
+    for name in ENDPOINTS:
+        # The decoded payload stands in for the serializer output.
+        data = client.get(reverse(name)).json()
+        results[name] = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            cpu_ms, body = _cpu(lambda: renderer.render(data, 'application/json', {}), iterations)
+            results[name][type(renderer).__name__] = {'cpu_ms': cpu_ms, 'bytes': len(body)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--appointments', type=int, default=5000)
+    parser.add_argument('--notifications', type=int, default=5000)
+    parser.add_argument('--iterations', type=int, default=10, help="Requests per endpoint and encoding.")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    harness.setup()
+    report = {'config': vars(args)}
+    from .seed import seed
+
+    with harness.test_database():
+        seed(users=args.users, appointments=args.appointments, notifications=args.notifications)
+        report['requests'] = measure_requests(args.iterations)
+        report['renderers'] = measure_renderers(args.iterations)
+    report['peak_rss_mb'] = harness.peak_rss_mb()
+    harness.write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import contextlib
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+
+
+def setup():
+    """
+    Configure Django for a standalone benchmark run.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'timelycare.settings')
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    import django
+    django.setup()
+
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    # Endpoints are expected to answer 4xx for some inputs; keep the report readable.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+
+@contextlib.contextmanager
+def test_database(keepdb=False):
+    """
+    Create the test databases for the duration of the block, like the test runner does.
+    """
+    from django.test.utils import setup_databases, teardown_databases
+
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+
+
+@contextlib.contextmanager
+def live_server(host='127.0.0.1'):
+    """
+    Serve the project over HTTP from a thread, sharing this process's test
+    database (including in-memory SQLite), and yield its base URL.
+    """
+    from django.db import connections
+    from django.test.testcases import LiveServerThread, _StaticFilesHandler
+
+    connections_override = {
+        conn.alias: conn for conn in connections.all() if conn.vendor == 'sqlite' and conn.is_in_memory_db()
+    }
+    for conn in connections_override.values():
+        conn.inc_thread_sharing()
+    server = LiveServerThread(host, _StaticFilesHandler, connections_override=connections_override)
+    server.daemon = True
+    server.start()
+    server.is_ready.wait()
+    if server.error:
+        raise server.error
+    try:
+        yield f'http://{host}:{server.port}'
+    finally:
+        server.terminate()
+        for conn in connections_override.values():
+            conn.dec_thread_sharing()
+
+
+def percentiles(samples):
+    """
+    Summarize latency samples (seconds) in milliseconds.
+    """
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(report, path=None):
+    """
+    Write a JSON report to path, or to stdout when no path is given.
+    """
+    text = json.dumps(report, indent=2, sort_keys=True, default=str)
+    if path:
+        with open(path, 'w') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
@@ -0,0 +1,107 @@
+import datetime
+import random
+
+# Half-hour slots from 08:00 to 18:00 over the year around today.
+SLOTS_PER_SPECIALIST = 360 * 20
+
+
+def seed(users=1000, specialist_ratio=0.2, specializations_per_specialist=2, appointments=5000, notifications=5000, random_seed=0):
+    """
+    Fill the current database with a synthetic dataset and return the ids used.
+
+    Everything is written with bulk_create and every user shares one password
+    hash, so seeding is dominated by inserts rather than PBKDF2.
+    """
+    from django.contrib.auth.hashers import make_password
+
+    from appointments.models import Appointment, Notification
+    from dashboard.rollups import rebuild
+    from profiles.models import SPECIALIZATION_CHOICES, User, Patient, Specialization, Specialist
+
+    rng = random.Random(random_seed)
+    password = make_password('benchmark')
+    specialist_count = max(1, int(users * specialist_ratio))
+    cities = ['Cairo', 'Alexandria', 'Giza', 'Luxor', 'Aswan']
+
+    created = User.objects.bulk_create(
+        [
+            User(
+                email=f'user{i}@example.com',
+                password=password,
+                first_name=f'First{i}',
+                last_name=f'Last{i}',
+                date_of_birth=datetime.date(1950, 1, 1) + datetime.timedelta(days=rng.randrange(20000)),
+                gender=rng.choice(['Male', 'Female']),
+                phone_number=f'010{i:08d}',
+                city=rng.choice(cities),
+                country='Egypt',
+                user_type='Specialist' if i < specialist_count else 'Patient',
+            )
+            for i in range(users)
+        ],
+        batch_size=1000,
+    )
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    specialist_ids = user_ids[:specialist_count]
+    patient_ids = user_ids[specialist_count:]
+    Specialist.objects.bulk_create([Specialist(user_id=pk) for pk in specialist_ids], batch_size=1000)
+    Patient.objects.bulk_create([Patient(user_id=pk) for pk in patient_ids], batch_size=1000)
+
+    titles = [title for title, _ in SPECIALIZATION_CHOICES]
+    Specialization.objects.bulk_create(
+        [
+            Specialization(title=rng.choice(titles), description='Synthetic', specialist_id=pk)
+            for pk in specialist_ids
+            for _ in range(specializations_per_specialist)
+        ],
+        batch_size=1000,
+    )
+
+    start = datetime.date.today()
+    statuses = [status for status, _ in Appointment.APPOINTMENT_STATUS_CHOICES]
+    if patient_ids:
+        # Distinct (specialist, date, time) slots: bookings may not overlap.
+        slots = rng.sample(range(len(specialist_ids) * SLOTS_PER_SPECIALIST), min(appointments, len(specialist_ids) * SLOTS_PER_SPECIALIST))
+        Appointment.objects.bulk_create(
+            [
+                Appointment(
+                    specialist_id=specialist_ids[slot // SLOTS_PER_SPECIALIST],
+                    patient_id=rng.choice(patient_ids),
+                    date=start + datetime.timedelta(days=slot % SLOTS_PER_SPECIALIST // 20 - 180),
+                    time=datetime.time(8 + slot % 20 // 2, slot % 2 * 30),
+                    status=rng.choice(statuses),
+                )
+                for slot in slots
+            ],
+            batch_size=1000,
+        )
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                sender_id=rng.choice(user_ids),
+                receiver_id=rng.choice(user_ids),
+                content='Synthetic notification',
+                notification_type='Info',
+                is_read=rng.random() < 0.5,
+            )
+            for _ in range(notifications)
+        ],
+        batch_size=1000,
+    )
+    # bulk_create skips the signals that maintain the dashboard rollups.
+    rebuild()
+
+    return {
+        'user_id': user_ids[-1],
+        'specialist_id': specialist_ids[0],
+        'patient_id': patient_ids[0] if patient_ids else None,
+        'specialization_id': Specialization.objects.values_list('id', flat=True).first(),
+        'appointment_id': Appointment.objects.values_list('appointment_id', flat=True).first(),
+        'notification_id': Notification.objects.values_list('notification_id', flat=True).first(),
+        'counts': {
+            'users': len(created),
+            'specialists': len(specialist_ids),
+            'appointments': Appointment.objects.count(),
+            'notifications': Notification.objects.count(),
+        },
+    }
@@ -0,0 +1,98 @@
+"""
+Compare the ways a list endpoint can serialize rows: the plain DRF
+serializer, the same serializer on an optimized queryset, and the values()
+fast path, each with all fields and with a sparse fieldset.
+
+    python -m benchmarks.serialization --appointments 20000 --repeat 5
+"""
+import argparse
+import time
+
+from . import harness
+
+CASES = [
+    # (name, model path, serializer path, fields, expand)
+    ('appointments', 'appointments.models.Appointment', 'appointments.serializers.AppointmentSerializer', None, None),
+    ('appointments_sparse', 'appointments.models.Appointment', 'appointments.serializers.AppointmentSerializer', 'appointment_id,date,time,status', None),
+    ('appointments_expanded', 'appointments.models.Appointment', 'appointments.serializers.AppointmentSerializer', None, 'specialist'),
+    ('notifications', 'appointments.models.Notification', 'appointments.serializers.NotificationSerializer', None, None),
+    ('specialists', 'profiles.models.Specialist', 'profiles.serializers.SpecialistSerializer', None, None),
+]
+
+
+def _import(path):
+    from django.utils.module_loading import import_string
+    return import_string(path)
+
+
+def _time(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return harness.percentiles(samples)
+
+
+def _count_queries(function):
+    from django.db import connection
+
+    count = 0
+
+    def counter(execute, sql, params, many, context):
+        nonlocal count
+        count += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(counter):
+        result = function()
+    return result, count
+
+
+def compare(repeat):
+    from timelycare.optimizers import optimize_queryset
+    from timelycare.serializers import fast_data
+
+    results = {}
+    for name, model_path, serializer_path, fields, expand in CASES:
+        model, serializer_class = _import(model_path), _import(serializer_path)
+        options = {'fields': fields, 'expand': expand}
+        variants = {
+            'drf': lambda: serializer_class(model.objects.all(), many=True, **options).data,
+            'drf_optimized': lambda: serializer_class(
+                optimize_queryset(model.objects.all(), serializer_class(**options)), many=True, **options
+            ).data,
+            'fast_path': lambda: fast_data(model.objects.all(), serializer_class(**options)),
+        }
+        results[name] = {}
+        for variant, function in variants.items():
+            rows, queries = _count_queries(function)
+            if rows is None:
+                results[name][variant] = 'unsupported'
+                continue
+            results[name][variant] = {**_time(function, repeat), 'rows': len(rows), 'queries': queries}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--appointments', type=int, default=5000)
+    parser.add_argument('--notifications', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per case and variant.")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    harness.setup()
+    report = {'config': vars(args)}
+    from .seed import seed
+
+    with harness.test_database():
+        seed(users=args.users, appointments=args.appointments, notifications=args.notifications)
+        report['results'] = compare(args.repeat)
+    report['peak_rss_mb'] = harness.peak_rss_mb()
+    harness.write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
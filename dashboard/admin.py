@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import AppointmentDailyStat, SignupDailyStat
+# Register your models here.
+
+
+@admin.register(AppointmentDailyStat)
+class AppointmentDailyStatAdmin(admin.ModelAdmin):
+    list_display = ('date', 'specialist', 'status', 'count')
+    list_filter = ('status',)
+    list_select_related = ('specialist__user',)
+
+
+@admin.register(SignupDailyStat)
+class SignupDailyStatAdmin(admin.ModelAdmin):
+    list_display = ('date', 'user_type', 'count')
+    list_filter = ('user_type',)
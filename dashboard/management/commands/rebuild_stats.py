@@ -0,0 +1,19 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from dashboard.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard rollup tables from appointments and users."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=datetime.date.fromisoformat, help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--end', type=datetime.date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        written = rebuild(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written['appointments']} appointment and {written['signups']} signup rollup rows."
+        ))
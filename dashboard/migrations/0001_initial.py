@@ -0,0 +1,47 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('profiles', '0003_specialist_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignupDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('user_type', models.CharField(choices=[('Patient', 'Patient'), ('Specialist', 'Specialist')], max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AppointmentDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Confirmed', 'Confirmed'), ('Completed', 'Completed'), ('Canceled', 'Canceled')], max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('specialist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='profiles.specialist')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='signupdailystat',
+            constraint=models.UniqueConstraint(fields=('date', 'user_type'), name='signup_daily_stat_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentdailystat',
+            index=models.Index(fields=['date', 'status'], name='appointment_stat_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointmentdailystat',
+            constraint=models.UniqueConstraint(fields=('specialist', 'date', 'status'), name='appointment_daily_stat_unique'),
+        ),
+    ]
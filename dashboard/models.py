@@ -0,0 +1,43 @@
+from django.db import models
+from appointments.models import Appointment
+from profiles.models import User, Specialist
+
+# Create your models here.
+
+class AppointmentDailyStat(models.Model):
+    """
+    Number of appointments per specialist, day and status. Maintained by
+    dashboard.rollups as appointments are written.
+    """
+    specialist = models.ForeignKey(Specialist, related_name='daily_stats', on_delete=models.CASCADE)
+    date = models.DateField()
+    status = models.CharField(max_length=10, choices=Appointment.APPOINTMENT_STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['specialist', 'date', 'status'], name='appointment_daily_stat_unique'),
+        ]
+        indexes = [
+            # Clinic-wide stats read every specialist's rows for a date range.
+            models.Index(fields=['date', 'status'], name='appointment_stat_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.count}"
+
+class SignupDailyStat(models.Model):
+    """
+    Number of users created per day and user type.
+    """
+    date = models.DateField()
+    user_type = models.CharField(max_length=10, choices=User.USER_TYPES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user_type'], name='signup_daily_stat_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.user_type}: {self.count}"
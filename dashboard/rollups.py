@@ -0,0 +1,114 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from appointments.models import Appointment
+from profiles.models import User
+from .models import AppointmentDailyStat, SignupDailyStat
+
+BATCH_SIZE = 1000
+
+
+def _bump(model, delta, **key):
+    """
+    Add delta to the rollup row identified by key, creating it if needed.
+
+    Runs in the caller's transaction, so the rollup commits or rolls back
+    together with the row that changed it.
+    """
+    if not delta:
+        return
+    # Clamped at zero: an undercounted rollup (e.g. before rebuild_stats has
+    # run) must not fail the write that changed the row with a CHECK violation.
+    if model.objects.filter(**key).update(count=Greatest(F('count') + delta, 0)):
+        return
+    if delta < 0:
+        # Nothing to decrement: the rollups predate this row. rebuild_stats fixes them.
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **key)
+    except IntegrityError:
+        # A concurrent writer created the row first.
+        model.objects.filter(**key).update(count=F('count') + delta)
+
+
+def appointment_key(appointment):
+    return appointment.specialist_id, appointment.date, appointment.status
+
+
+def count_appointment(key, delta):
+    specialist_id, date, status = key
+    _bump(AppointmentDailyStat, delta, specialist_id=specialist_id, date=date, status=status)
+
+
+def move_appointment(old_key, new_key):
+    if old_key != new_key:
+        count_appointment(old_key, -1)
+        count_appointment(new_key, 1)
+
+
+def signup_key(user):
+    return user.created_on, user.user_type
+
+
+def count_signup(key, delta):
+    date, user_type = key
+    _bump(SignupDailyStat, delta, date=date, user_type=user_type)
+
+
+def count_signups(users):
+    """
+    Record users created without post_save, e.g. by bulk_create.
+    """
+    totals = {}
+    for user in users:
+        totals[signup_key(user)] = totals.get(signup_key(user), 0) + 1
+    for key, delta in totals.items():
+        count_signup(key, delta)
+
+
+def rebuild(start=None, end=None):
+    """
+    Recompute the rollups from the source tables, optionally only for days in
+    [start, end]. Returns the number of rollup rows written per table.
+    """
+    appointments = Appointment.objects.all()
+    users = User.objects.all()
+    appointment_stats = AppointmentDailyStat.objects.all()
+    signup_stats = SignupDailyStat.objects.all()
+    if start is not None:
+        appointments, appointment_stats = appointments.filter(date__gte=start), appointment_stats.filter(date__gte=start)
+        users, signup_stats = users.filter(created_on__gte=start), signup_stats.filter(date__gte=start)
+    if end is not None:
+        appointments, appointment_stats = appointments.filter(date__lte=end), appointment_stats.filter(date__lte=end)
+        users, signup_stats = users.filter(created_on__lte=end), signup_stats.filter(date__lte=end)
+
+    appointment_rows = (
+        AppointmentDailyStat(specialist_id=row['specialist'], date=row['date'], status=row['status'], count=row['total'])
+        for row in appointments.values('specialist', 'date', 'status').annotate(total=Count('pk')).order_by().iterator()
+    )
+    signup_rows = (
+        SignupDailyStat(date=row['created_on'], user_type=row['user_type'], count=row['total'])
+        for row in users.values('created_on', 'user_type').annotate(total=Count('pk')).order_by().iterator()
+    )
+    with transaction.atomic():
+        appointment_stats.delete()
+        signup_stats.delete()
+        return {
+            'appointments': _insert(AppointmentDailyStat, appointment_rows),
+            'signups': _insert(SignupDailyStat, signup_rows),
+        }
+
+
+def _insert(model, rows):
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            written += len(model.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        written += len(model.objects.bulk_create(batch))
+    return written
@@ -0,0 +1,26 @@
+import datetime
+
+from rest_framework import serializers
+from profiles.models import User
+
+MAX_RANGE_DAYS = 366
+
+class StatsRangeSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        end = data.get('end') or datetime.date.today()
+        start = data.get('start') or end - datetime.timedelta(days=29)
+        if end < start:
+            raise serializers.ValidationError("end must not be before start.")
+        if (end - start).days >= MAX_RANGE_DAYS:
+            raise serializers.ValidationError(f"The range may not exceed {MAX_RANGE_DAYS} days.")
+        data.update(start=start, end=end)
+        return data
+
+class AppointmentStatsSerializer(StatsRangeSerializer):
+    specialist = serializers.IntegerField(required=False)
+
+class SignupStatsSerializer(StatsRangeSerializer):
+    user_type = serializers.ChoiceField(choices=User.USER_TYPES, required=False)
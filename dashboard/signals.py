@@ -0,0 +1,67 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from appointments.models import Appointment
+from appointments.signals import appointments_changed
+from profiles.models import User
+from profiles.signals import users_bulk_created
+from .rollups import appointment_key, count_appointment, count_signup, count_signups, move_appointment, signup_key
+
+
+def _stored_key(instance, fields):
+    # The values the rollups currently count this row under, before the save.
+    return type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_appointment_key(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._rollup_key = _stored_key(instance, ('specialist_id', 'date', 'status'))
+
+
+@receiver(post_save, sender=Appointment)
+def count_saved_appointment(sender, instance, created, **kwargs):
+    old_key = None if created else getattr(instance, '_rollup_key', None)
+    if old_key is None:
+        count_appointment(appointment_key(instance), 1)
+    else:
+        move_appointment(old_key, appointment_key(instance))
+
+
+@receiver(post_delete, sender=Appointment)
+def count_deleted_appointment(sender, instance, **kwargs):
+    count_appointment(appointment_key(instance), -1)
+
+
+@receiver(appointments_changed)
+def count_changed_appointments(sender, changes, **kwargs):
+    for row, previous in changes:
+        new_key = (row['specialist_id'], row['date'], row['status'])
+        old_key = (row['specialist_id'], previous.get('date', row['date']), previous.get('status', row['status']))
+        move_appointment(old_key, new_key)
+
+
+@receiver(pre_save, sender=User)
+def remember_signup_key(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._rollup_key = _stored_key(instance, ('created_on', 'user_type'))
+
+
+@receiver(post_save, sender=User)
+def count_saved_user(sender, instance, created, **kwargs):
+    old_key = None if created else getattr(instance, '_rollup_key', None)
+    if old_key is None:
+        count_signup(signup_key(instance), 1)
+    elif old_key != signup_key(instance):
+        count_signup(old_key, -1)
+        count_signup(signup_key(instance), 1)
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    count_signup(signup_key(instance), -1)
+
+
+@receiver(users_bulk_created)
+def count_bulk_signups(sender, users, **kwargs):
+    count_signups(users)
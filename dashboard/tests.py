@@ -0,0 +1,83 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from appointments.models import Appointment
+from profiles.bulk import import_users
+from profiles.models import Patient, Specialist
+from profiles.tests import create_user
+from .models import AppointmentDailyStat, SignupDailyStat
+from .rollups import rebuild
+
+# Create your tests here.
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = Patient.objects.get(user=create_user('patient@example.com', 'Patient'))
+        cls.specialist = Specialist.objects.get(user=create_user('specialist@example.com', 'Specialist'))
+        cls.day = datetime.date(2024, 5, 6)
+
+    def book(self, time, **extra):
+        return Appointment.objects.create(
+            specialist=self.specialist, patient=self.patient, date=self.day, time=time, **extra
+        )
+
+    def snapshot(self):
+        return (
+            sorted(AppointmentDailyStat.objects.filter(count__gt=0).values_list('specialist_id', 'date', 'status', 'count')),
+            sorted(SignupDailyStat.objects.filter(count__gt=0).values_list('date', 'user_type', 'count')),
+        )
+
+    def test_signals_keep_rollups_equal_to_a_rebuild(self):
+        first = self.book(datetime.time(9))
+        self.book(datetime.time(10))
+        first.status = 'Canceled'
+        first.save()
+        second_day = self.book(datetime.time(11))
+        second_day.date = self.day + datetime.timedelta(days=1)
+        second_day.save()
+        self.book(datetime.time(12)).delete()
+        import_users([{
+            'email': 'bulk@example.com', 'password': 'secret', 'first_name': 'Bulk', 'last_name': 'User',
+            'date_of_birth': '1990-01-01', 'gender': 'Male', 'phone_number': '0100000000', 'user_type': 'Patient',
+        }])
+
+        incremental = self.snapshot()
+        self.assertIn((self.specialist.pk, self.day, 'Canceled', 1), incremental[0])
+        self.assertIn((self.specialist.pk, self.day, 'Pending', 1), incremental[0])
+        self.assertEqual(sum(row[2] for row in incremental[1]), 3)
+        rebuild()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_undercounted_rollups_do_not_fail_writes(self):
+        appointment = self.book(datetime.time(9))
+        AppointmentDailyStat.objects.update(count=0)
+        response = self.client.post(reverse('confirm_appointment', args=[appointment.appointment_id]))
+        self.assertEqual(response.status_code, 200)
+        stat = AppointmentDailyStat.objects.get(specialist=self.specialist, date=self.day, status='Pending')
+        self.assertEqual(stat.count, 0)
+
+    def test_stats_endpoints_read_the_rollups(self):
+        self.book(datetime.time(9))
+        self.book(datetime.time(10), status='Confirmed')
+        params = {'start': '2024-05-01', 'end': '2024-05-31'}
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('appointment_stats'), {**params, 'specialist': self.specialist.pk})
+        self.assertEqual(response.json()['totals'], {'Confirmed': 1, 'Pending': 1})
+
+        AppointmentDailyStat.objects.all().delete()
+        self.assertEqual(self.client.get(reverse('appointment_stats'), params).json()['totals'], {})
+        call_command('rebuild_stats', start=datetime.date(2024, 5, 1), stdout=io.StringIO())
+        self.assertEqual(self.client.get(reverse('appointment_stats'), params).json()['totals'], {'Confirmed': 1, 'Pending': 1})
+
+        response = self.client.get(reverse('signup_stats'), {'user_type': 'Specialist'})
+        self.assertEqual(response.json()['totals'], {'Specialist': 1})
+
+    def test_range_is_bounded(self):
+        response = self.client.get(reverse('appointment_stats'), {'start': '2020-01-01', 'end': '2024-01-01'})
+        self.assertEqual(response.status_code, 400)
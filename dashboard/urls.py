@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('stats/appointments/', views.appointment_stats, name='appointment_stats'),
+    path('stats/signups/', views.signup_stats, name='signup_stats'),
+]
@@ -0,0 +1,60 @@
+from django.db.models import Sum
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from .models import AppointmentDailyStat, SignupDailyStat
+from .serializers import AppointmentStatsSerializer, SignupStatsSerializer
+
+# Create your views here.
+
+def _totals(rows, key):
+    totals = {}
+    for row in rows:
+        totals[row[key]] = totals.get(row[key], 0) + row['count']
+    return totals
+
+
+@api_view(['GET'])
+def appointment_stats(request):
+    """
+    Appointments per day and status between ?start= and ?end= (the last 30
+    days by default), for one ?specialist= or the whole clinic.
+    Read from the daily rollups only.
+    """
+    params = AppointmentStatsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = params.validated_data
+    stats = AppointmentDailyStat.objects.filter(date__range=(data['start'], data['end']), count__gt=0)
+    if 'specialist' in data:
+        stats = stats.filter(specialist_id=data['specialist'])
+    rows = list(stats.values('date', 'status').annotate(count=Sum('count')).order_by('date', 'status'))
+    return Response({
+        "start": data['start'],
+        "end": data['end'],
+        "days": rows,
+        "totals": _totals(rows, 'status'),
+    })
+
+
+@api_view(['GET'])
+def signup_stats(request):
+    """
+    New users per day and user type between ?start= and ?end= (the last 30
+    days by default), optionally for one ?user_type=.
+    Read from the daily rollups only.
+    """
+    params = SignupStatsSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = params.validated_data
+    stats = SignupDailyStat.objects.filter(date__range=(data['start'], data['end']), count__gt=0)
+    if 'user_type' in data:
+        stats = stats.filter(user_type=data['user_type'])
+    rows = list(stats.values('date', 'user_type', 'count').order_by('date', 'user_type'))
+    return Response({
+        "start": data['start'],
+        "end": data['end'],
+        "days": rows,
+        "totals": _totals(rows, 'user_type'),
+    })
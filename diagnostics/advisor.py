@@ -0,0 +1,151 @@
+import hashlib
+import re
+
+from django.apps import apps
+from django.db import connections
+
+# Django quotes identifiers as "table"."column" on SQLite and Postgres (and
+# `table`.`column` on MySQL).
+_COLUMN = r'[`"](?P<table>\w+)[`"]\.[`"](?P<column>\w+)[`"]'
+_EQUALITY = re.compile(_COLUMN + r'\s*(?:=|IN\s*\(|IS NULL)', re.IGNORECASE)
+_RANGE = re.compile(_COLUMN + r'\s*(?:<|>|<=|>=|BETWEEN)\s', re.IGNORECASE)
+_CLAUSE_END = re.compile(r'\b(?:ORDER BY|GROUP BY|LIMIT|OFFSET)\b', re.IGNORECASE)
+_ORDER_BY = re.compile(r'\bORDER BY\b(?P<terms>.*?)(?:\bLIMIT\b|\bOFFSET\b|$)', re.IGNORECASE | re.DOTALL)
+
+# SQLite: "SCAN table [USING INDEX ...]" (a SEARCH is an index seek); Postgres:
+# "Seq Scan on table".
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(?P<table>\w+)')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (?P<table>\w+)')
+
+
+def explain(sql, params, using='default'):
+    """
+    Return the plan of a SELECT as a list of text lines.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    if connection.vendor == 'mysql':
+        return [' '.join(str(value) for value in row) for row in rows]
+    return [row[0] for row in rows]
+
+
+def scanned_tables(plan, vendor):
+    """
+    Tables the plan reads in full instead of through an index.
+    """
+    tables = []
+    for line in plan:
+        if vendor == 'sqlite':
+            match = _SQLITE_SCAN.match(line.strip())
+        elif vendor == 'postgresql':
+            match = _POSTGRES_SCAN.search(line)
+        else:
+            match = None
+        if match and match['table'] not in tables:
+            tables.append(match['table'])
+    return tables
+
+
+def _where_clause(sql):
+    _, found, where = sql.partition(' WHERE ')
+    if not found:
+        return ''
+    end = _CLAUSE_END.search(where)
+    return where[:end.start()] if end else where
+
+
+def candidate_columns(sql, table):
+    """
+    Columns of `table` worth indexing for this statement, in index order:
+    equality filters, then one range filter, then the ORDER BY columns.
+    """
+    where = _where_clause(sql)
+    columns = []
+    for match in _EQUALITY.finditer(where):
+        if match['table'] == table and match['column'] not in columns:
+            columns.append(match['column'])
+    for match in _RANGE.finditer(where):
+        if match['table'] == table and match['column'] not in columns:
+            return columns + [match['column']]
+    order_by = _ORDER_BY.search(sql)
+    if order_by:
+        for match in re.finditer(_COLUMN, order_by['terms']):
+            if match['table'] == table and match['column'] not in columns:
+                columns.append(match['column'])
+    return columns
+
+
+def _model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def _existing_indexes(model):
+    """
+    Column lists of every index the model already has, including the implicit ones.
+    """
+    opts = model._meta
+    column = {field.name: field.column for field in opts.concrete_fields}
+    indexes = [[opts.pk.column]]
+    indexes += [[field.column] for field in opts.concrete_fields if field.db_index or field.unique]
+    indexes += [[column[name.lstrip('-')] for name in index.fields] for index in opts.indexes if index.fields]
+    indexes += [[column[name] for name in fields] for fields in opts.unique_together]
+    indexes += [[column[name] for name in constraint.fields] for constraint in opts.constraints if getattr(constraint, 'fields', None)]
+    return indexes
+
+
+def _index_name(model, fields):
+    name = f"{model._meta.model_name}_{'_'.join(fields)}"
+    if len(name) + 4 > 30:
+        digest = hashlib.md5(name.encode(), usedforsecurity=False).hexdigest()[:6]
+        name = f'{name[:19]}_{digest}'
+    return f'{name}_idx'
+
+
+def suggest_index(sql, table):
+    """
+    Return (model, field names, index name) for an index that would let this
+    statement avoid scanning `table`, or None when there is nothing useful to
+    suggest or an existing index already starts with those columns.
+    """
+    model = _model_for_table(table)
+    if model is None:
+        return None
+    columns = candidate_columns(sql, table)
+    if not columns:
+        return None
+    for existing in _existing_indexes(model):
+        if existing[:len(columns)] == columns:
+            return None
+    field_names = {field.column: field.name for field in model._meta.concrete_fields}
+    fields = [field_names[column] for column in columns if column in field_names]
+    if len(fields) != len(columns):
+        return None
+    return model, fields, _index_name(model, fields)
+
+
+def advise(stats, limit=10, using='default'):
+    """
+    EXPLAIN the `limit` statements with the most total time and collect the
+    indexes that would remove their full-table scans. Statements logged
+    without their parameters are reported but not EXPLAINed.
+    """
+    vendor = connections[using].vendor
+    report = []
+    for normalized, entry in stats.top(limit):
+        item = {'query': normalized, **{key: entry[key] for key in ('count', 'total', 'max', 'params')}, 'plan': [], 'suggestions': []}
+        if entry['params'] is not None and entry['sql'].lstrip().upper().startswith('SELECT'):
+            item['plan'] = explain(entry['sql'], entry['params'], using)
+            for table in scanned_tables(item['plan'], vendor):
+                suggestion = suggest_index(entry['sql'], table)
+                if suggestion is not None:
+                    item['suggestions'].append(suggestion)
+        report.append(item)
+    return report
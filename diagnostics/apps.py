@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+class DiagnosticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'diagnostics'
+
+    def ready(self):
+        if settings.SLOW_QUERY_MS is not None:
+            from .querylog import install_slow_query_hook
+            connection_created.connect(install_slow_query_hook, dispatch_uid='diagnostics.slow_query_hook')
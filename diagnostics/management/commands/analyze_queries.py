@@ -0,0 +1,60 @@
+import contextlib
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from diagnostics.advisor import advise
+from diagnostics.querylog import QueryStats, read_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Aggregate executed SQL (from a SLOW_QUERY_LOG file and/or by requesting "
+        "the given paths), EXPLAIN the costliest statements and suggest indexes "
+        "for the tables they scan in full."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', action='append', default=[], help="SLOW_QUERY_LOG file to read (repeatable).")
+        parser.add_argument('--path', action='append', default=[], help="URL path to GET and capture (repeatable).")
+        parser.add_argument('--top', type=int, default=10, help="Statements to EXPLAIN, by total time.")
+        parser.add_argument('--database', default='default', help="Database alias to EXPLAIN on (queries are captured on every alias).")
+
+    def handle(self, *args, **options):
+        if not options['log'] and not options['path']:
+            raise CommandError("Give at least one --log or --path.")
+
+        stats = QueryStats()
+        for path in options['log']:
+            read_log(path, stats)
+        if options['path']:
+            client = Client(SERVER_NAME='localhost')
+            # Every alias: with a replica configured, GETs read from it.
+            with contextlib.ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats))
+                for path in options['path']:
+                    response = client.get(path)
+                    if response.status_code >= 400:
+                        self.stderr.write(f"GET {path} answered {response.status_code}.")
+
+        suggestions = {}
+        for item in advise(stats, options['top'], options['database']):
+            self.stdout.write(
+                f"\n{item['count']} x {item['total'] * 1000:.1f} ms total, {item['max'] * 1000:.1f} ms max\n"
+                f"  {item['query']}"
+            )
+            for line in item['plan']:
+                self.stdout.write(f"    {line}")
+            if not item['plan'] and item['params'] is None:
+                self.stdout.write("    (logged without parameters: not EXPLAINed, see SLOW_QUERY_LOG_PARAMS)")
+            for model, fields, name in item['suggestions']:
+                suggestions[(model._meta.label, name)] = (model, fields, name)
+
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS("\nNo missing indexes found."))
+            return
+        self.stdout.write(self.style.WARNING("\nSuggested indexes (add to Meta.indexes, then run makemigrations):"))
+        for model, fields, name in suggestions.values():
+            self.stdout.write(f"  {model._meta.label}: models.Index(fields={fields!r}, name={name!r}),")
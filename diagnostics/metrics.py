@@ -0,0 +1,100 @@
+import threading
+
+# Upper bounds, in seconds, of the request duration histogram buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class ViewStats:
+    def __init__(self):
+        self.statuses = {}
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_duration = 0.0
+        self.render_duration = 0.0
+        self.response_bytes = 0
+        self.profiles = 0
+
+
+class Registry:
+    """
+    Per-view request metrics for this process, rendered in the Prometheus
+    text format.
+
+    Each worker process keeps its own numbers; Prometheus adds them up when
+    every worker is scraped (or use a single worker per scrape target).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, method, status_code, duration, queries=0, db_duration=0.0,
+                render_duration=0.0, response_bytes=0, profiled=False):
+        with self._lock:
+            stats = self._views.get((view, method))
+            if stats is None:
+                stats = self._views[(view, method)] = ViewStats()
+            stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+                    break
+            stats.count += 1
+            stats.duration += duration
+            stats.queries += queries
+            stats.db_duration += db_duration
+            stats.render_duration += render_duration
+            stats.response_bytes += response_bytes
+            stats.profiles += profiled
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            family('timelycare_requests_total', 'counter', 'Requests handled, by view, method and status.')
+            for (view, method), stats in views:
+                for status_code, count in sorted(stats.statuses.items()):
+                    lines.append(f'timelycare_requests_total{_labels(view=view, method=method, status=status_code)} {count}')
+
+            family('timelycare_request_duration_seconds', 'histogram', 'Wall time from the first middleware to the rendered response.')
+            for (view, method), stats in views:
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'timelycare_request_duration_seconds_bucket{_labels(view=view, method=method, le=bound)} {cumulative}')
+                lines.append(f'timelycare_request_duration_seconds_bucket{_labels(view=view, method=method, le="+Inf")} {stats.count}')
+                lines.append(f'timelycare_request_duration_seconds_sum{_labels(view=view, method=method)} {stats.duration}')
+                lines.append(f'timelycare_request_duration_seconds_count{_labels(view=view, method=method)} {stats.count}')
+
+            for name, attribute, help_text in (
+                ('timelycare_db_queries_total', 'queries', 'Database queries executed.'),
+                ('timelycare_db_duration_seconds_total', 'db_duration', 'Time spent executing database queries.'),
+                ('timelycare_render_duration_seconds_total', 'render_duration', 'Time spent rendering response bodies.'),
+                ('timelycare_response_bytes_total', 'response_bytes', 'Response body bytes, streaming responses excluded.'),
+                ('timelycare_profiles_total', 'profiles', 'Requests run under the sampling profiler.'),
+            ):
+                family(name, 'counter', help_text)
+                for (view, method), stats in views:
+                    lines.append(f'{name}{_labels(view=view, method=method)} {getattr(stats, attribute)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+registry = Registry()
@@ -0,0 +1,143 @@
+import contextlib
+import logging
+import random
+import time
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+from .profiling import Profiler
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """
+    connection.execute_wrapper() hook counting queries and the time spent in them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+@contextlib.contextmanager
+def timed_queries():
+    """
+    Count the queries run on every database alias in the block.
+    """
+    timer = QueryTimer()
+    with contextlib.ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timer))
+        yield timer
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, DB queries and time, render time and response size for
+    each request to a view in settings.METRICS_VIEW_MODULES, for /metrics.
+
+    A PROFILE_SAMPLE_RATE fraction of requests runs under the PROFILER, and
+    traces of those slower than PROFILE_SLOW_MS are saved to PROFILE_DIR.
+    Render time is the renderer turning the view's data into bytes; time
+    spent in serializer.data is part of the view.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.modules = set(settings.METRICS_VIEW_MODULES)
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+        if self.sample_rate:
+            # Fail at startup, not on the first sampled request.
+            Profiler(settings.PROFILER)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with timed_queries() as queries, self.measure(request, queries) as measurement:
+            measurement.response = self.get_response(request)
+        return measurement.response
+
+    async def __acall__(self, request):
+        # Under ASGI the ORM runs in sync_to_async's thread-sensitive thread,
+        # whose connections are not this thread's: count queries there.
+        stack = contextlib.ExitStack()
+        queries = await sync_to_async(stack.enter_context)(timed_queries())
+        try:
+            with self.measure(request, queries) as measurement:
+                measurement.response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return measurement.response
+
+    @contextlib.contextmanager
+    def measure(self, request, queries):
+        request._render_duration = 0.0
+        measurement = SimpleNamespace(response=None)
+        profiler = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            profiler = Profiler(settings.PROFILER)
+
+        started = time.perf_counter()
+        if profiler is None:
+            yield measurement
+        else:
+            profiler.start()
+            try:
+                yield measurement
+            finally:
+                profiler.stop()
+        duration = time.perf_counter() - started
+
+        view = self.view_name(request)
+        if view is None:
+            return
+        if profiler is not None and duration * 1000 >= settings.PROFILE_SLOW_MS:
+            path = profiler.save(settings.PROFILE_DIR, view)
+            logger.warning("Slow request to %s took %.0f ms; profile saved to %s", view, duration * 1000, path)
+        response = measurement.response
+        registry.observe(
+            view,
+            request.method,
+            response.status_code,
+            duration,
+            queries=queries.count,
+            db_duration=queries.duration,
+            render_duration=request._render_duration,
+            response_bytes=0 if response.streaming else len(response.content),
+            profiled=profiler is not None,
+        )
+
+    def view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.func.__module__ not in self.modules:
+            return None
+        # @api_view functions are wrapped in a view class named after them.
+        return f'{match.func.__module__}.{getattr(match.func, "view_class", match.func).__name__}'
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after the last template-response hook.
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
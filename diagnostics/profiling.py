@@ -0,0 +1,54 @@
+import cProfile
+import os
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+
+class Profiler:
+    """
+    Run a request under cProfile (saved as .prof, for pstats or snakeviz) or
+    pyinstrument (saved as .html; the package is optional).
+    """
+
+    def __init__(self, kind='cprofile'):
+        if kind not in PROFILERS:
+            raise ImproperlyConfigured(f"PROFILER must be one of {', '.join(PROFILERS)}.")
+        self.kind = kind
+        if kind == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler as InstrumentProfiler
+            except ImportError:
+                raise ImproperlyConfigured("PROFILER=pyinstrument needs the pyinstrument package.")
+            self._profiler = InstrumentProfiler()
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def save(self, directory, view):
+        """
+        Write the trace to `directory` and return its path.
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = f'{view}-{time.strftime("%Y%m%dT%H%M%S")}-{time.perf_counter_ns()}'
+        if self.kind == 'pyinstrument':
+            path = os.path.join(directory, name + '.html')
+            with open(path, 'w') as output:
+                output.write(self._profiler.output_html())
+        else:
+            path = os.path.join(directory, name + '.prof')
+            self._profiler.dump_stats(path)
+        return path
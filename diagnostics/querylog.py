@@ -0,0 +1,121 @@
+import json
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w".])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """
+    Reduce a statement to its shape: literals and parameters become ?, and an
+    IN list of any length becomes (...), so that executions of the same query
+    aggregate together.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryStats:
+    """
+    Executed statements aggregated by normalized SQL, each with one example
+    (sql, params) that EXPLAIN can be run on.
+
+    Times cover cursor.execute() only: on SQLite, rows fetched later are not
+    included.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = {}
+
+    def add(self, sql, params, duration):
+        key = normalize(sql)
+        with self._lock:
+            entry = self.queries.get(key)
+            if entry is None:
+                entry = self.queries[key] = {'sql': sql, 'params': params, 'count': 0, 'total': 0.0, 'max': 0.0}
+            entry['count'] += 1
+            entry['total'] += duration
+            if duration >= entry['max']:
+                entry['max'] = duration
+                entry['sql'], entry['params'] = sql, params
+
+    def top(self, limit):
+        """
+        The `limit` statements with the highest total time, as (normalized sql, entry).
+        """
+        with self._lock:
+            return sorted(self.queries.items(), key=lambda item: item[1]['total'], reverse=True)[:limit]
+
+    def __call__(self, execute, sql, params, many, context):
+        # Usable as a connection.execute_wrapper() hook.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not many:
+                self.add(sql, params, time.perf_counter() - started)
+
+
+_log_lock = threading.Lock()
+
+
+def slow_query_hook(execute, sql, params, many, context):
+    """
+    execute_wrapper() hook that logs statements slower than SLOW_QUERY_MS and,
+    when SLOW_QUERY_LOG is set, appends them to that file as JSON lines for
+    the analyze_queries command.
+
+    Only the normalized statement is written: parameters hold emails, token
+    digests and medical history. With SLOW_QUERY_LOG_PARAMS the raw statement
+    and its parameters are written instead, so that the command can EXPLAIN it.
+    """
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= settings.SLOW_QUERY_MS and not many:
+            alias = context['connection'].alias
+            logger.warning("Slow query on %s (%.1f ms): %s", alias, duration_ms, normalize(sql))
+            if settings.SLOW_QUERY_LOG:
+                entry = {'alias': alias, 'sql': normalize(sql), 'duration_ms': duration_ms}
+                if settings.SLOW_QUERY_LOG_PARAMS:
+                    entry.update(sql=sql, params=params)
+                line = json.dumps(entry, cls=DjangoJSONEncoder)
+                with _log_lock, open(settings.SLOW_QUERY_LOG, 'a') as log:
+                    log.write(line + '\n')
+
+
+def install_slow_query_hook(sender, connection, **kwargs):
+    """
+    connection_created receiver: watch every query on the new connection.
+    """
+    if slow_query_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_hook)
+
+
+def read_log(path, stats):
+    """
+    Add the statements of a SLOW_QUERY_LOG file to `stats`.
+    """
+    with open(path) as log:
+        for line in log:
+            if line.strip():
+                entry = json.loads(line)
+                # Without parameters the statement can be aggregated but not EXPLAINed.
+                stats.add(entry['sql'], entry.get('params'), entry['duration_ms'] / 1000)
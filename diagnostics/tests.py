@@ -0,0 +1,114 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from appointments.models import Appointment
+from profiles.models import Patient, Specialist, User
+from profiles.tests import create_user
+from .advisor import advise
+from .metrics import registry
+from .querylog import QueryStats, normalize, slow_query_hook
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        create_user('patient@example.com', 'Patient')
+
+    def metric(self, text, prefix):
+        return [line for line in text.splitlines() if line.startswith(prefix)]
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(reverse('users'))
+        self.client.get(reverse('users'))
+        text = self.client.get(reverse('metrics')).content.decode()
+
+        labels = '{view="profiles.views.users",method="GET"'
+        self.assertIn('timelycare_requests_total' + labels + ',status="200"} 2', text)
+        self.assertIn('timelycare_request_duration_seconds_count' + labels + '} 2', text)
+        self.assertIn('timelycare_db_queries_total' + labels + '} 4', text)
+        [response_bytes] = self.metric(text, 'timelycare_response_bytes_total' + labels)
+        self.assertGreater(int(response_bytes.split()[-1]), 0)
+        # The metrics endpoint itself is not instrumented.
+        self.assertNotIn('diagnostics', text)
+
+    async def test_async_views_are_recorded(self):
+        await self.async_client.get(reverse('async_users'))
+        # The list version, then the list.
+        self.assertIn('timelycare_db_queries_total{view="profiles.async_views.users",method="GET"} 2', registry.render())
+
+    def test_metrics_are_local_only(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 404)
+
+    def test_slow_sampled_requests_save_a_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_SLOW_MS=0, PROFILE_DIR=directory), \
+                    self.assertLogs('diagnostics.middleware', 'WARNING'):
+                self.client.get(reverse('users'))
+            [name] = os.listdir(directory)
+            self.assertTrue(name.startswith('profiles.views.users-') and name.endswith('.prof'))
+
+
+class QueryAdvisorTests(TestCase):
+    def setUp(self):
+        patient = Patient.objects.get(user=create_user('patient@example.com', 'Patient'))
+        specialist = Specialist.objects.get(user=create_user('specialist@example.com', 'Specialist'))
+        for day in range(1, 4):
+            Appointment.objects.create(specialist=specialist, patient=patient, date=datetime.date(2024, 5, day), time=datetime.time(9))
+
+    def capture(self, *querysets):
+        stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            for queryset in querysets:
+                list(queryset)
+        return stats
+
+    def test_normalize_merges_executions_of_the_same_query(self):
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE a = 'x' AND b IN (1, 2, 3) LIMIT 21"),
+            normalize("SELECT * FROM t WHERE a = 'yy' AND b IN (4) LIMIT 1"),
+        )
+        stats = self.capture(User.objects.filter(email='a@example.com'), User.objects.filter(email='b@example.com'))
+        [(query, entry)] = stats.top(10)
+        self.assertEqual(entry['count'], 2)
+
+    def test_full_scans_get_an_index_suggestion(self):
+        stats = self.capture(Appointment.objects.filter(symptom_type='Flu').order_by('date'))
+        [item] = advise(stats)
+        [(model, fields, name)] = item['suggestions']
+        self.assertEqual((model, fields), (Appointment, ['symptom_type', 'date']))
+        self.assertLessEqual(len(name), 30)
+
+    def test_indexed_lookups_get_no_suggestion(self):
+        stats = self.capture(User.objects.filter(email='patient@example.com'), Appointment.objects.filter(status='Confirmed'))
+        self.assertEqual([item['suggestions'] for item in advise(stats)], [[], []])
+
+    def test_slow_query_log_feeds_the_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.jsonl')
+            with override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_LOG=path), \
+                    connection.execute_wrapper(slow_query_hook), self.assertLogs('diagnostics.querylog', 'WARNING'):
+                list(Appointment.objects.filter(symptom_type='Flu'))
+            with open(path) as log:
+                text = log.read()
+            self.assertNotIn('Flu', text)
+            self.assertNotIn('params', json.loads(text))
+            os.remove(path)
+
+            with override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_LOG=path, SLOW_QUERY_LOG_PARAMS=True), \
+                    connection.execute_wrapper(slow_query_hook), self.assertLogs('diagnostics.querylog', 'WARNING'):
+                list(Appointment.objects.filter(symptom_type='Flu'))
+            with open(path) as log:
+                self.assertIn('Flu', json.loads(log.readline())['params'])
+
+            output = io.StringIO()
+            call_command('analyze_queries', log=[path], path=[reverse('users')], stdout=output)
+        self.assertIn("models.Index(fields=['symptom_type'], name='appointment_symptom_type_idx')", output.getvalue())
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # No trailing slash: /metrics is where Prometheus looks by default.
+    path('metrics', views.metrics, name='metrics'),
+]
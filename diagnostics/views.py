@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from .metrics import registry
+
+
+def metrics(request):
+    """
+    Request metrics in the Prometheus text format, for METRICS_ALLOWED_IPS only.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Job
+# Register your models here.
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'run_at', 'attempts', 'locked_by')
+    list_filter = ('status', 'task')
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import run_pending, worker_id
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs. Any number of workers may run at once."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run the jobs due now, then exit.")
+        parser.add_argument('--batch-size', type=int, default=settings.JOB_BATCH_SIZE, help="Jobs claimed at a time.")
+        parser.add_argument('--sleep', type=float, default=settings.JOB_POLL_INTERVAL, help="Seconds to wait when idle.")
+
+    def handle(self, *args, **options):
+        worker = worker_id()
+        total = 0
+        try:
+            while True:
+                claimed = run_pending(worker, options['batch_size'])
+                total += claimed
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Ran {total} jobs."))
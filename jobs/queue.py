@@ -0,0 +1,203 @@
+import logging
+import os
+import socket
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Registered tasks by name.
+TASKS = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name=None, max_attempts=5, batch=False):
+    """
+    Register a function as a task that can be enqueued by name.
+
+    A batch task is called once with the list of payloads of every due job for
+    it in a claim, instead of once per payload. It should be all-or-nothing:
+    if it raises, the jobs are run again one payload at a time, so that only
+    the failing ones back off.
+    """
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        TASKS[task_name] = {'func': func, 'max_attempts': max_attempts, 'batch': batch}
+        func.task_name = task_name
+        return func
+    return register
+
+
+def enqueue(task_ref, payload=None, run_at=None, delay=None, key=None):
+    """
+    Store a job for a registered task, to run at run_at (or after delay, or as
+    soon as possible). Call it inside the transaction that makes the job
+    necessary: the job is committed or rolled back with it.
+
+    With a key, a job that was already enqueued under the same key is returned
+    instead of a new one.
+    """
+    task_name = getattr(task_ref, 'task_name', task_ref)
+    if task_name not in TASKS:
+        raise UnknownTask(task_name)
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta(0))
+    job = Job(
+        task=task_name,
+        payload=payload or {},
+        run_at=run_at,
+        max_attempts=TASKS[task_name]['max_attempts'],
+        key=key,
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+        return job
+    except IntegrityError:
+        return Job.objects.get(key=key)
+
+
+def enqueue_many(task_ref, payloads, run_at=None):
+    """
+    Store one job per payload with a single bulk insert.
+    """
+    task_name = getattr(task_ref, 'task_name', task_ref)
+    if task_name not in TASKS:
+        raise UnknownTask(task_name)
+    run_at = run_at or timezone.now()
+    return Job.objects.bulk_create([
+        Job(task=task_name, payload=payload, run_at=run_at, max_attempts=TASKS[task_name]['max_attempts'])
+        for payload in payloads
+    ])
+
+
+def backoff(attempts):
+    """
+    Delay before retrying a job that has failed `attempts` times.
+    """
+    seconds = settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.JOB_RETRY_BACKOFF_MAX))
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _claimable(now):
+    # Due jobs, and running jobs whose worker has not finished them in time
+    # (most likely it died).
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Q(status='queued', run_at__lte=now) | Q(status='running', locked_at__lt=stale)
+
+
+def claim(worker, limit):
+    """
+    Mark up to `limit` due jobs as running for this worker and return them.
+
+    Rows another worker has locked are skipped rather than waited for, and the
+    conditional UPDATE makes claiming safe on databases without row locks too.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(_claimable(now))
+            .order_by('run_at')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(_claimable(now), pk__in=ids).update(
+            status='running', locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(pk__in=ids, status='running', locked_by=worker, locked_at=now).order_by('run_at'))
+
+
+def _finish(jobs, error=None):
+    if error is None:
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='done', locked_by='', locked_at=None, last_error='', updated_at=timezone.now(),
+        )
+        return
+    now = timezone.now()
+    for job in jobs:
+        if job.attempts >= job.max_attempts:
+            changes = {'status': 'failed'}
+        else:
+            changes = {'status': 'queued', 'run_at': now + backoff(job.attempts)}
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            locked_by='', locked_at=None, last_error=error, updated_at=now, **changes
+        )
+
+
+def _call(func, argument, jobs):
+    try:
+        with transaction.atomic():
+            func(argument)
+    except Exception:
+        logger.exception("Job %s failed", ', '.join(str(job.pk) for job in jobs))
+        _finish(jobs, traceback.format_exc())
+        return False
+    _finish(jobs)
+    return True
+
+
+def _call_batch(func, jobs):
+    """
+    Run a batch task on all jobs at once; if that fails, run it on each job
+    alone so that one bad payload does not hold back the rest.
+    """
+    if len(jobs) > 1:
+        try:
+            with transaction.atomic():
+                func([job.payload for job in jobs])
+        except Exception:
+            logger.warning("Batch of %d %s jobs failed; running them one by one", len(jobs), jobs[0].task, exc_info=True)
+        else:
+            _finish(jobs)
+            return len(jobs)
+    return sum(_call(func, [job.payload], [job]) for job in jobs)
+
+
+def run_jobs(jobs):
+    """
+    Run claimed jobs: batch tasks once per task, the others once per job.
+    Returns the number of jobs that succeeded.
+    """
+    succeeded = 0
+    batches = {}
+    for job in jobs:
+        registered = TASKS.get(job.task)
+        if registered is None:
+            job.attempts = job.max_attempts
+            _finish([job], f"Unknown task: {job.task}")
+        elif registered['batch']:
+            batches.setdefault(job.task, []).append(job)
+        elif _call(registered['func'], job.payload, [job]):
+            succeeded += 1
+    for task_name, batch in batches.items():
+        succeeded += _call_batch(TASKS[task_name]['func'], batch)
+    return succeeded
+
+
+def run_pending(worker=None, limit=None):
+    """
+    Claim and run one batch of due jobs. Returns the number of jobs claimed.
+    """
+    jobs = claim(worker or worker_id(), limit or settings.JOB_BATCH_SIZE)
+    run_jobs(jobs)
+    return len(jobs)
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import enqueue, run_pending, task
+
+# Create your tests here.
+
+calls = []
+
+
+@task(name='jobs.tests.record', max_attempts=2)
+def record(payload):
+    calls.append(payload)
+    if payload.get('fail'):
+        raise RuntimeError("boom")
+
+
+@task(name='jobs.tests.record_batch', batch=True)
+def record_batch(payloads):
+    calls.append(payloads)
+    if any(payload.get('fail') for payload in payloads):
+        raise RuntimeError("boom")
+
+
+@override_settings(JOB_RETRY_BACKOFF=30, JOB_RETRY_BACKOFF_MAX=3600, JOB_LOCK_TIMEOUT=600)
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_due_jobs_run_once_and_scheduled_jobs_wait(self):
+        enqueue(record, {'n': 1})
+        later = enqueue('jobs.tests.record', {'n': 2}, delay=timedelta(hours=24))
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(calls, [{'n': 1}])
+        self.assertEqual(Job.objects.get(pk=later.pk).status, 'queued')
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(hours=25)):
+            self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [{'n': 1}, {'n': 2}])
+
+    def test_failures_back_off_then_give_up(self):
+        job = enqueue(record, {'fail': True})
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=25))
+        self.assertIn('boom', job.last_error)
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(minutes=5)), \
+                self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_batch_tasks_get_every_due_payload_at_once(self):
+        for n in range(3):
+            enqueue(record_batch, {'n': n})
+        run_pending()
+        self.assertEqual(calls, [[{'n': 0}, {'n': 1}, {'n': 2}]])
+        self.assertEqual(Job.objects.filter(status='done').count(), 3)
+
+    def test_a_bad_payload_only_fails_its_own_job(self):
+        good = [enqueue(record_batch, {'n': n}) for n in range(2)]
+        bad = enqueue(record_batch, {'fail': True})
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            run_pending()
+        self.assertEqual(calls[1:], [[{'n': 0}], [{'n': 1}], [{'fail': True}]])
+        self.assertEqual(Job.objects.filter(pk__in=[job.pk for job in good], status='done').count(), 2)
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ('queued', 1))
+
+    def test_keys_deduplicate_and_abandoned_jobs_are_reclaimed(self):
+        job = enqueue(record, {'n': 1}, key='once')
+        self.assertEqual(enqueue(record, {'n': 2}, key='once').pk, job.pk)
+        Job.objects.filter(pk=job.pk).update(
+            status='running', locked_by='dead-worker', locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [{'n': 1}])
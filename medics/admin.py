@@ -1,6 +1,18 @@
 from django.contrib import admin
-from .models import MedicalHistory, EmergencyContact
+from .models import MedicalHistory, MedicalHistoryEntry, EmergencyContact
 # Register your models here.
 
-admin.site.register(MedicalHistory)
+
+@admin.register(MedicalHistory)
+class MedicalHistoryAdmin(admin.ModelAdmin):
+    list_select_related = ('user',)
+
+
 admin.site.register(EmergencyContact)
+
+
+@admin.register(MedicalHistoryEntry)
+class MedicalHistoryEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'category', 'code', 'label', 'is_current')
+    list_filter = ('category', 'is_current')
+    list_select_related = ('user',)
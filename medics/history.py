@@ -0,0 +1,73 @@
+from django.db import transaction
+
+from profiles.models import User
+from .models import MedicalHistory, MedicalHistoryEntry
+
+
+def current_history(user_id):
+    """
+    Return (history, entries) for the user's current version, or (None, []).
+
+    Entries carry the user and is_current flag, so this is one query on the
+    (user, is_current) index joined to its version row.
+    """
+    entries = list(
+        MedicalHistoryEntry.objects
+        .filter(user_id=user_id, is_current=True)
+        .select_related('history')
+        .order_by('category', 'code')
+    )
+    if entries:
+        return entries[0].history, entries
+    # A current version with no entries at all (e.g. everything was cleared).
+    return MedicalHistory.objects.filter(user_id=user_id, is_current=True).first(), []
+
+
+def append_version(user_id, entries):
+    """
+    Store a new full snapshot of the user's history and make it current.
+
+    Older versions are never modified beyond clearing their is_current flags.
+    """
+    with transaction.atomic():
+        # Serialize concurrent appends for the same user.
+        User.objects.select_for_update().filter(pk=user_id).exists()
+        latest = (
+            MedicalHistory.objects.filter(user_id=user_id)
+            .order_by('-version')
+            .values_list('version', flat=True)
+            .first()
+        ) or 0
+        MedicalHistory.objects.filter(user_id=user_id, is_current=True).update(is_current=False)
+        MedicalHistoryEntry.objects.filter(user_id=user_id, is_current=True).update(is_current=False)
+
+        summaries = {field: [] for field in MedicalHistoryEntry.LEGACY_FIELDS.values()}
+        for entry in entries:
+            summaries[MedicalHistoryEntry.LEGACY_FIELDS[entry['category']]].append(entry['label'])
+        history = MedicalHistory.objects.create(
+            user_id=user_id,
+            version=latest + 1,
+            is_current=True,
+            **{field: '\n'.join(labels) or None for field, labels in summaries.items()},
+        )
+        created = MedicalHistoryEntry.objects.bulk_create(
+            [MedicalHistoryEntry(history=history, user_id=user_id, is_current=True, **entry) for entry in entries]
+        )
+    return history, sorted(created, key=lambda entry: (entry.category, entry.code))
+
+
+def patients_with(category, code, after=None, limit=100):
+    """
+    User ids whose current history has the given coded entry, in id order.
+
+    Answered entirely from the (category, code, is_current, user) index.
+    """
+    user_ids = (
+        MedicalHistoryEntry.objects
+        .filter(category=category, code=code, is_current=True)
+        .order_by('user_id')
+        .values_list('user_id', flat=True)
+    )
+    if after is not None:
+        user_ids = user_ids.filter(user_id__gt=after)
+    return list(user_ids[:limit])
@@ -0,0 +1,105 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:29
+
+import django.db.models.deletion
+import re
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+LEGACY_FIELDS = {
+    'diagnosis': 'past_diagnoses',
+    'allergy': 'allergies',
+    'medication': 'medications',
+    'immunization': 'immunizations',
+}
+
+
+def version_existing_histories(apps, schema_editor):
+    """
+    Number each user's existing histories by age, keep the newest as current,
+    and split the free-text fields into structured entries.
+    """
+    MedicalHistory = apps.get_model('medics', 'MedicalHistory')
+    MedicalHistoryEntry = apps.get_model('medics', 'MedicalHistoryEntry')
+
+    version = {}
+    histories = list(MedicalHistory.objects.order_by('user_id', 'created_at'))
+    latest = {history.user_id: history.pk for history in histories}
+    entries = []
+    for history in histories:
+        version[history.user_id] = version.get(history.user_id, 0) + 1
+        history.version = version[history.user_id]
+        history.is_current = latest[history.user_id] == history.pk
+        history.save(update_fields=['version', 'is_current'])
+        for category, field in LEGACY_FIELDS.items():
+            for item in re.split(r'[\n,;]+', getattr(history, field) or ''):
+                item = item.strip()
+                if item:
+                    entries.append(MedicalHistoryEntry(
+                        history_id=history.pk,
+                        user_id=history.user_id,
+                        is_current=history.is_current,
+                        category=category,
+                        code=(slugify(item) or item)[:64].upper(),
+                        label=item[:255],
+                    ))
+    MedicalHistoryEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medics', '0001_initial'),
+        ('profiles', '0002_auth_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicalHistoryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_current', models.BooleanField(default=True)),
+                ('category', models.CharField(choices=[('diagnosis', 'Diagnosis'), ('allergy', 'Allergy'), ('medication', 'Medication'), ('immunization', 'Immunization')], max_length=20)),
+                ('code', models.CharField(max_length=64)),
+                ('label', models.CharField(max_length=255)),
+                ('notes', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='medicalhistory',
+            name='is_current',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='medicalhistory',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='medicalhistoryentry',
+            name='history',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='medics.medicalhistory'),
+        ),
+        migrations.AddField(
+            model_name='medicalhistoryentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='medical_entries', to='profiles.user'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalhistoryentry',
+            index=models.Index(fields=['category', 'code', 'is_current', 'user'], name='medical_entry_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalhistoryentry',
+            index=models.Index(fields=['user', 'is_current'], name='medical_entry_current_idx'),
+        ),
+        migrations.RunPython(version_existing_histories, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='medicalhistory',
+            constraint=models.UniqueConstraint(fields=('user', 'version'), name='medical_history_user_version'),
+        ),
+        migrations.AddConstraint(
+            model_name='medicalhistory',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('user',), name='medical_history_one_current'),
+        ),
+    ]
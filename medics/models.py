@@ -6,18 +6,67 @@ import uuid
 # Create your models here.
 
 class MedicalHistory(models.Model):
+    """
+    One append-only version of a user's medical history. Each version is a full
+    snapshot; exactly one version per user is current.
+    """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    version = models.PositiveIntegerField(default=1)
+    is_current = models.BooleanField(default=True)
+    # Free-text summaries kept for the admin and older clients; the structured
+    # data lives in MedicalHistoryEntry.
     past_diagnoses = models.TextField(blank=True, null=True)  # consider using standardized codes
     allergies = models.TextField(blank=True, null=True)
     medications = models.TextField(blank=True, null=True)
     immunizations = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'version'], name='medical_history_user_version'),
+            models.UniqueConstraint(fields=['user'], condition=models.Q(is_current=True), name='medical_history_one_current'),
+        ]
+
     def __str__(self):
         return f"{self.user.email}'s Medical History"
 
+class MedicalHistoryEntry(models.Model):
+    CATEGORY_CHOICES = [
+        ('diagnosis', 'Diagnosis'),
+        ('allergy', 'Allergy'),
+        ('medication', 'Medication'),
+        ('immunization', 'Immunization'),
+    ]
+
+    # Which legacy MedicalHistory text field summarizes each category.
+    LEGACY_FIELDS = {
+        'diagnosis': 'past_diagnoses',
+        'allergy': 'allergies',
+        'medication': 'medications',
+        'immunization': 'immunizations',
+    }
+
+    history = models.ForeignKey(MedicalHistory, related_name='entries', on_delete=models.CASCADE)
+    # Copied from the history so "who has code X" and "current history of user Y"
+    # are answered from this table's indexes alone.
+    user = models.ForeignKey(User, related_name='medical_entries', on_delete=models.CASCADE)
+    is_current = models.BooleanField(default=True)
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
+    code = models.CharField(max_length=64)  # e.g. ICD-10, SNOMED CT or CVX code
+    label = models.CharField(max_length=255)
+    notes = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'code', 'is_current', 'user'], name='medical_entry_code_idx'),
+            models.Index(fields=['user', 'is_current'], name='medical_entry_current_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_category_display()}: {self.label} ({self.code})"
+
 class EmergencyContact(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -28,4 +77,4 @@ class EmergencyContact(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.name} ({self.relationship}) - {self.phone_number}"
\ No newline at end of file
+        return f"{self.name} ({self.relationship}) - {self.phone_number}"
@@ -1,12 +1,45 @@
 from rest_framework import serializers
-from .models import MedicalHistory, EmergencyContact
+from timelycare.serializers import SparseFieldsMixin
+from .models import MedicalHistory, MedicalHistoryEntry, EmergencyContact
+
+
+def normalize_code(code):
+    # Codes are compared exactly, so store them in one canonical form.
+    return code.strip().upper()
+
+
+class MedicalHistoryEntrySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = MedicalHistoryEntry
+        fields = ['category', 'code', 'label', 'notes']
+
+    def validate_code(self, value):
+        return normalize_code(value)
+
+class MedicalHistorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    entries = MedicalHistoryEntrySerializer(many=True, read_only=True)
 
-class MedicalHistorySerializer(serializers.ModelSerializer):
     class Meta:
         model = MedicalHistory
         fields = '__all__'
 
-class EmergencyContactSerializer(serializers.ModelSerializer):
+class MedicalHistoryVersionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = MedicalHistory
+        fields = ['id', 'user', 'version', 'is_current', 'created_at']
+
+class AppendMedicalHistorySerializer(serializers.Serializer):
+    entries = MedicalHistoryEntrySerializer(many=True)
+
+    def validate_entries(self, entries):
+        keys = [(entry['category'], entry['code']) for entry in entries]
+        if len(keys) != len(set(keys)):
+            raise serializers.ValidationError("Each category/code pair may only appear once.")
+        return entries
+
+class EmergencyContactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = EmergencyContact
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        # Taken from the URL.
+        read_only_fields = ['user']
@@ -1,3 +1,79 @@
 from django.test import TestCase
+from django.urls import reverse
+
+from profiles.tests import create_user
+from .models import MedicalHistory, MedicalHistoryEntry
 
 # Create your tests here.
+
+PENICILLIN = {'category': 'allergy', 'code': 'snomed-91936005', 'label': 'Penicillin allergy'}
+ASTHMA = {'category': 'diagnosis', 'code': 'J45', 'label': 'Asthma'}
+
+
+class MedicalHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('patient@example.com', 'Patient')
+        cls.other = create_user('other@example.com', 'Patient')
+
+    def append(self, user, *entries):
+        return self.client.post(
+            reverse('medical_history', args=[user.pk]), {'entries': list(entries)}, content_type='application/json'
+        )
+
+    def test_appending_keeps_old_versions_and_one_current(self):
+        self.assertEqual(self.append(self.user, PENICILLIN).status_code, 201)
+        response = self.append(self.user, PENICILLIN, ASTHMA)
+        self.assertEqual(response.json()['version'], 2)
+        self.assertEqual(MedicalHistory.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(MedicalHistory.objects.filter(user=self.user, is_current=True).count(), 1)
+
+        with self.assertNumQueries(1):
+            current = self.client.get(reverse('medical_history', args=[self.user.pk])).json()
+        self.assertEqual([entry['code'] for entry in current['entries']], ['SNOMED-91936005', 'J45'])
+        old = self.client.get(reverse('medical_history', args=[self.user.pk]), {'version': 1}).json()
+        self.assertEqual(len(old['entries']), 1)
+        self.assertEqual(old['allergies'], 'Penicillin allergy')
+
+    def test_patients_by_code_only_matches_current_versions(self):
+        self.append(self.user, ASTHMA)
+        self.append(self.user, PENICILLIN)
+        self.append(self.other, ASTHMA)
+        response = self.client.get(reverse('patients_by_entry'), {'category': 'diagnosis', 'code': 'j45'})
+        self.assertEqual(response.json()['results'], [self.other.pk])
+        self.assertEqual(MedicalHistoryEntry.objects.filter(code='J45').count(), 2)
+
+    def test_non_positive_page_sizes_still_page(self):
+        self.append(self.user, ASTHMA)
+        self.append(self.other, ASTHMA)
+        first = self.client.get(reverse('patients_by_entry'), {'category': 'diagnosis', 'code': 'J45', 'page_size': 0}).json()
+        self.assertEqual(first, {'results': [self.user.pk], 'next_after': self.user.pk})
+        second = self.client.get(
+            reverse('patients_by_entry'), {'category': 'diagnosis', 'code': 'J45', 'page_size': -5, 'after': self.user.pk}
+        ).json()
+        self.assertEqual(second['results'], [self.other.pk])
+
+    def test_duplicate_codes_are_rejected(self):
+        self.assertEqual(self.append(self.user, ASTHMA, ASTHMA).status_code, 400)
+        self.assertEqual(self.client.get(reverse('medical_history', args=[self.user.pk])).status_code, 404)
+
+
+class EmergencyContactTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('patient@example.com', 'Patient')
+
+    def add(self, user_id, body):
+        return self.client.post(reverse('emergency_contacts', args=[user_id]), body, content_type='application/json')
+
+    def test_contacts_belong_to_the_user_in_the_url(self):
+        other = create_user('other@example.com', 'Patient')
+        response = self.add(self.user.pk, {'name': 'Mona', 'phone_number': '0100', 'user': other.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['user'], self.user.pk)
+        self.assertEqual(self.add(999, {'name': 'Mona', 'phone_number': '0100'}).status_code, 404)
+
+    def test_malformed_bodies_are_rejected(self):
+        for body in ([{'name': 'Mona'}], 'Mona', {'name': 'Mona'}):
+            with self.subTest(body=body):
+                self.assertEqual(self.add(self.user.pk, body).status_code, 400)
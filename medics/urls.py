@@ -2,4 +2,8 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path('history/patients/', views.patients_by_entry, name='patients_by_entry'),
+    path('history/<int:user_id>/', views.medical_history, name='medical_history'),
+    path('history/<int:user_id>/versions/', views.medical_history_versions, name='medical_history_versions'),
+    path('emergency-contacts/<int:user_id>/', views.emergency_contacts, name='emergency_contacts'),
 ]
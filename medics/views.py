@@ -1,7 +1,102 @@
 from django.shortcuts import render
-from django.shortcuts import render
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from profiles.models import User
+from .history import append_version, current_history, patients_with
+from .models import MedicalHistory, MedicalHistoryEntry, EmergencyContact
+from .serializers import (
+    AppendMedicalHistorySerializer,
+    EmergencyContactSerializer,
+    MedicalHistoryEntrySerializer,
+    MedicalHistorySerializer,
+    MedicalHistoryVersionSerializer,
+    normalize_code,
+)
 # Create your views here.
 
+MAX_PAGE_SIZE = 1000
+
+
+def history_payload(history, entries):
+    data = MedicalHistoryVersionSerializer(history).data
+    data['entries'] = MedicalHistoryEntrySerializer(entries, many=True).data
+    return data
+
+
+@api_view(['GET', 'POST'])
+def medical_history(request, user_id):
+    """
+    GET: the user's current medical history (or ?version=N).
+    POST: append a new version, a full snapshot given as {"entries": [...]}.
+    """
+    if request.method == 'POST':
+        if not User.objects.filter(pk=user_id).exists():
+            return Response({"message": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+        append_serializer = AppendMedicalHistorySerializer(data=request.data)
+        if not append_serializer.is_valid():
+            return Response(append_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        history, entries = append_version(user_id, append_serializer.validated_data['entries'])
+        return Response(history_payload(history, entries), status=status.HTTP_201_CREATED)
+
+    version = request.query_params.get('version')
+    if version is not None:
+        try:
+            history = MedicalHistory.objects.prefetch_related('entries').get(user_id=user_id, version=int(version))
+        except (ValueError, MedicalHistory.DoesNotExist):
+            return Response({"message": "Medical history version not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(MedicalHistorySerializer(history).data)
+
+    history, entries = current_history(user_id)
+    if history is None:
+        return Response({"message": "Medical history not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(history_payload(history, entries))
+
+
+@api_view(['GET'])
+def medical_history_versions(request, user_id):
+    """
+    List every version of a user's medical history, newest first.
+    """
+    histories = MedicalHistory.objects.filter(user_id=user_id).order_by('-version')
+    return Response(MedicalHistoryVersionSerializer(histories, many=True).data)
+
+
+@api_view(['GET'])
+def patients_by_entry(request):
+    """
+    Ids of users whose current history has ?category=<category>&code=<code>,
+    paged with ?after=<last user id> and ?page_size.
+    """
+    category = request.query_params.get('category')
+    code = request.query_params.get('code')
+    if category not in dict(MedicalHistoryEntry.CATEGORY_CHOICES) or not code:
+        return Response({"message": "A valid category and a code are required."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        after = request.query_params.get('after')
+        after = int(after) if after is not None else None
+        page_size = min(max(int(request.query_params.get('page_size', 100)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({"message": "after and page_size must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+    user_ids = patients_with(category, normalize_code(code), after, page_size)
+    next_after = user_ids[-1] if len(user_ids) == page_size else None
+    return Response({"results": user_ids, "next_after": next_after})
+
+
+@api_view(['GET', 'POST'])
+def emergency_contacts(request, user_id):
+    """
+    List or add a user's emergency contacts.
+    """
+    if request.method == 'GET':
+        contacts = EmergencyContact.objects.filter(user_id=user_id).order_by('created_at')
+        return Response(EmergencyContactSerializer(contacts, many=True).data)
+
+    if not User.objects.filter(pk=user_id).exists():
+        return Response({"message": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+    contact_serializer = EmergencyContactSerializer(data=request.data)
+    if contact_serializer.is_valid():
+        contact_serializer.save(user_id=user_id)
+        return Response(contact_serializer.data, status=status.HTTP_201_CREATED)
+    return Response(contact_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -3,6 +3,20 @@ from .models import User, Patient, Specialization, Specialist
 
 # Register your models here.
 admin.site.register(User)
-admin.site.register(Patient)
-admin.site.register(Specialization)
-admin.site.register(Specialist)
+
+
+@admin.register(Patient)
+class PatientAdmin(admin.ModelAdmin):
+    list_select_related = ('user',)
+
+
+@admin.register(Specialization)
+class SpecializationAdmin(admin.ModelAdmin):
+    def get_queryset(self, request):
+        # __str__ reads specialist.user, which the change form needs too.
+        return super().get_queryset(request).select_related('specialist__user')
+
+
+@admin.register(Specialist)
+class SpecialistAdmin(admin.ModelAdmin):
+    list_select_related = ('user',)
@@ -0,0 +1,136 @@
+"""
+Async variants of the profiles read endpoints.
+
+They use Django's async ORM directly, so under an ASGI server (uvicorn, daphne)
+a slow client holds a coroutine instead of one of sync_to_async's threads.
+Payloads, ?fields=/?expand=, the directory cache and conditional GET match the
+synchronous DRF views; responses are always JSON (no content negotiation or
+browsable API), and their ETags differ from the sync views' since the path is
+part of them.
+"""
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+
+from timelycare.conditional import aconditional_response, alist_version, row_version
+from timelycare.optimizers import optimize_queryset
+from timelycare.renderers import json_dumps
+from .cache import adirectory_response
+from .models import User, Patient, Specialization, Specialist
+from .serializers import UserSerializer, PatientSerializer, SpecializationSerializer, SpecialistSerializer
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(json_dumps(data), content_type='application/json', status=status)
+
+
+def sparse_serializer(request, serializer_class, **kwargs):
+    # Plain Django requests have no query_params for SparseFieldsMixin to read.
+    return serializer_class(fields=request.GET.get('fields'), expand=request.GET.get('expand'), **kwargs)
+
+
+async def _list(request, queryset, serializer_class):
+    serializer = sparse_serializer(request, serializer_class, many=True)
+    # Serializers only see already-loaded rows, so nothing below touches the DB.
+    serializer.instance = [row async for row in optimize_queryset(queryset, serializer)]
+    return serializer.data
+
+
+async def _first(request, queryset, serializer_class):
+    serializer = sparse_serializer(request, serializer_class)
+    serializer.instance = await optimize_queryset(queryset, serializer).afirst()
+    return serializer.data if serializer.instance is not None else None
+
+
+@require_GET
+async def users(request, user_id=None):
+    """
+    Retrieve users by user_id.
+    If no user ID is provided, return all users.
+    """
+    if user_id is None:
+        users = User.objects.all()
+
+        async def render():
+            return json_response(await _list(request, users, UserSerializer))
+
+        return await aconditional_response(request, await alist_version(users), render, last_modified=False)
+
+    user_serializer = sparse_serializer(request, UserSerializer)
+    try:
+        user = await optimize_queryset(User.objects.all(), user_serializer, required=('updated_at',)).aget(id=user_id)
+    except User.DoesNotExist:
+        return json_response({"message": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+    user_serializer.instance = user
+
+    async def render():
+        return json_response(user_serializer.data)
+
+    return await aconditional_response(request, row_version(user), render)
+
+
+@require_GET
+async def get_patient(request, user_id=None):
+    """
+    Retrieve patient by user_id.
+    If no user ID is provided, return all patients.
+    """
+    if user_id is None:
+        patients = Patient.objects.all()
+
+        async def render():
+            return json_response(await _list(request, patients, PatientSerializer))
+
+        version = await alist_version(patients, ('updated_at', 'user__updated_at'))
+        return await aconditional_response(request, version, render, last_modified=False)
+
+    patient_serializer = sparse_serializer(request, PatientSerializer)
+    patients = optimize_queryset(
+        Patient.objects.select_related('user'), patient_serializer, required=('updated_at', 'user__updated_at')
+    )
+    try:
+        patient = await patients.aget(user_id=user_id)
+    except Patient.DoesNotExist:
+        return json_response({"message": "Patient not found."}, status=status.HTTP_404_NOT_FOUND)
+    patient_serializer.instance = patient
+
+    async def render():
+        return json_response(patient_serializer.data)
+
+    return await aconditional_response(request, row_version(patient, ('updated_at', 'user.updated_at')), render)
+
+
+@require_GET
+async def get_specialization(request, specialization_id=None):
+    """
+    Retrieve specialization by id.
+    If no specialization ID is provided, return all specializations.
+    """
+    if specialization_id is None:
+        async def load():
+            return await _list(request, Specialization.objects.all(), SpecializationSerializer)
+
+        return await adirectory_response(request, 'specialization', 'all', load, "No specializations found.")
+
+    async def load():
+        return await _first(request, Specialization.objects.filter(id=specialization_id), SpecializationSerializer)
+
+    return await adirectory_response(request, 'specialization', specialization_id, load, "Specialization not found.")
+
+
+@require_GET
+async def get_specialist(request, user_id=None):
+    """
+    Retrieve specialist by user_id.
+    If user_id is not provided, return all specialists.
+    """
+    if user_id is not None:
+        async def load():
+            return await _first(request, Specialist.objects.filter(user_id=user_id), SpecialistSerializer)
+
+        return await adirectory_response(request, 'specialist', user_id, load, "Specialist not found.")
+
+    async def load():
+        return await _list(request, Specialist.objects.all(), SpecialistSerializer) or None
+
+    return await adirectory_response(request, 'specialist', 'all', load, "No specialists found.")
@@ -0,0 +1,57 @@
+import binascii
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from knox.auth import TokenAuthentication
+from knox.crypto import hash_token
+from rest_framework import exceptions
+
+from timelycare.routers import primary_reads
+
+from .models import AuthToken
+
+
+def token_cache_key(digest):
+    return f'profiles:token:{digest}'
+
+
+def forget_tokens(digests):
+    cache.delete_many([token_cache_key(digest) for digest in digests])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    knox token authentication against profiles.AuthToken.
+
+    The stored digest is the primary key, so a token is found with one
+    SHA-512 and one primary-key read, never a password hash. Successful lookups
+    are cached for TOKEN_CACHE_TIMEOUT seconds, so most requests do no DB work
+    at all for authentication. The cached user is loaded without its password
+    hash, which stays out of the shared cache.
+    """
+    model = AuthToken
+
+    def authenticate_credentials(self, token):
+        msg = _('Invalid token.')
+        try:
+            digest = hash_token(token.decode('utf-8'))
+        except (TypeError, UnicodeError, binascii.Error):
+            raise exceptions.AuthenticationFailed(msg)
+
+        key = token_cache_key(digest)
+        auth_token = cache.get(key)
+        if auth_token is None:
+            # From the primary, so a token issued a moment ago is already there.
+            with primary_reads():
+                auth_token = AuthToken.objects.select_related('user').defer('user__password').filter(digest=digest).first()
+            if auth_token is None:
+                raise exceptions.AuthenticationFailed(msg)
+            cache.set(key, auth_token, timeout=settings.TOKEN_CACHE_TIMEOUT)
+
+        if auth_token.expiry is not None and auth_token.expiry < timezone.now():
+            cache.delete(key)
+            AuthToken.objects.filter(digest=digest).delete()
+            raise exceptions.AuthenticationFailed(msg)
+        return self.validate_user(auth_token)
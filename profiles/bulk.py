@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, connection, transaction
+
+from .cache import invalidate_directory
+from .models import User, Patient, Specialist
+from .serializers import UserSerializer
+from .signals import users_bulk_created
+
+BATCH_SIZE = 1000
+
+
+class BulkUserSerializer(UserSerializer):
+    """
+    UserSerializer without the per-row email uniqueness query; import_users
+    checks a whole batch of emails with one query instead.
+    """
+    class Meta(UserSerializer.Meta):
+        extra_kwargs = {**UserSerializer.Meta.extra_kwargs, 'email': {'validators': []}}
+
+
+def read_rows(stream, import_format):
+    """
+    Return an iterator of one dict per user from a CSV (with a header row) or
+    JSON Lines text stream.
+    """
+    if import_format == 'csv':
+        # Empty CSV cells mean "not provided", not "empty string".
+        return (
+            {key: value for key, value in row.items() if value not in ('', None)}
+            for row in csv.DictReader(stream)
+        )
+    if import_format == 'jsonl':
+        return (_parse_json_line(line) for line in stream if line.strip())
+    raise ValueError(f"Unsupported import format: {import_format}")
+
+
+def _parse_json_line(line):
+    # A malformed line is passed on as-is and rejected by validation like any bad row.
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line
+
+
+def _init_worker():
+    # Spawned (non-forked) workers need their own app registry before hashing.
+    django.setup()
+
+
+def _hash_passwords(passwords, pool, chunksize):
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def _validate_batch(batch, start, errors):
+    """
+    Return the validated data of every acceptable row and record the rest in errors.
+    """
+    valid = []
+    for offset, row in enumerate(batch):
+        serializer = BulkUserSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((start + offset, serializer.validated_data))
+        else:
+            errors.append({"row": start + offset, "errors": serializer.errors})
+
+    emails = [User.objects.normalize_email(data['email']) for _, data in valid]
+    existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    seen = set()
+    accepted = []
+    for (row_number, data), email in zip(valid, emails):
+        if email in existing or email in seen:
+            errors.append({"row": row_number, "errors": {"email": ["user with this email already exists."]}})
+            continue
+        seen.add(email)
+        data['email'] = email
+        accepted.append((row_number, data))
+    return accepted
+
+
+def _insert_users(users):
+    """
+    Insert users and their Patient/Specialist rows. Must run inside a transaction.
+    """
+    created = User.objects.bulk_create(users)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        ids = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id'))
+        for user in created:
+            user.pk = ids[user.email]
+    Patient.objects.bulk_create([Patient(user=user) for user in created if user.user_type == 'Patient'])
+    Specialist.objects.bulk_create([Specialist(user=user) for user in created if user.user_type == 'Specialist'])
+    users_bulk_created.send(sender=User, users=created)
+    return created
+
+
+def _write_batch(accepted, errors):
+    users = [User(**data) for _, data in accepted]
+    try:
+        with transaction.atomic():
+            return _insert_users(users)
+    except IntegrityError:
+        pass
+
+    # Something in the batch clashed (e.g. an email inserted concurrently):
+    # retry row by row so only the offending rows are rejected.
+    created = []
+    for (row_number, _), user in zip(accepted, users):
+        user.pk = None
+        try:
+            with transaction.atomic():
+                created.extend(_insert_users([user]))
+        except IntegrityError as exc:
+            errors.append({"row": row_number, "errors": {"non_field_errors": [str(exc)]}})
+    return created
+
+
+def import_users(rows, batch_size=BATCH_SIZE, workers=1):
+    """
+    Validate, hash and insert users in batches.
+
+    Rows are numbered from 1. Invalid rows are reported in the returned errors
+    list and never abort the rest of the import. Passwords are hashed in a
+    process pool when workers > 1.
+    """
+    report = {"created": 0, "errors": []}
+    created_specialists = False
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    chunksize = max(1, batch_size // (workers * 4))
+    try:
+        batch = []
+        start = 1
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                created_specialists |= _import_batch(batch, start, pool, chunksize, report)
+                start += len(batch)
+                batch = []
+        if batch:
+            created_specialists |= _import_batch(batch, start, pool, chunksize, report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if created_specialists:
+        # bulk_create skips post_save, so the directory cache is not invalidated on its own.
+        transaction.on_commit(invalidate_directory)
+    report["errors"].sort(key=lambda error: error["row"])
+    return report
+
+
+def _import_batch(batch, start, pool, chunksize, report):
+    accepted = _validate_batch(batch, start, report["errors"])
+    if not accepted:
+        return False
+    passwords = _hash_passwords([data['password'] for _, data in accepted], pool, chunksize)
+    for (_, data), password in zip(accepted, passwords):
+        data['password'] = password
+    created = _write_batch(accepted, report["errors"])
+    report["created"] += len(created)
+    return any(user.user_type == 'Specialist' for user in created)
+
+
+def rows_from_upload(upload, import_format=None):
+    """
+    Read rows from an uploaded file, guessing the format from its extension.
+    """
+    import_format = import_format or upload.name.rsplit('.', 1)[-1].lower()
+    return read_rows(io.TextIOWrapper(upload.file, encoding='utf-8'), import_format)
@@ -0,0 +1,122 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from timelycare.renderers import json_dumps
+from timelycare.routers import primary_reads
+
+DIRECTORY_VERSION_KEY = 'profiles:directory:version'
+
+
+def directory_version():
+    """
+    Current version of the specialization/specialist directory.
+
+    Every cached read embeds the version in its key, so bumping it invalidates
+    them all at once. A fresh version is seeded from the clock so entries written
+    before the version key was evicted can never be matched again.
+    """
+    version = cache.get(DIRECTORY_VERSION_KEY)
+    if version is None:
+        cache.add(DIRECTORY_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(DIRECTORY_VERSION_KEY, time.time_ns())
+    return version
+
+
+async def adirectory_version():
+    version = await cache.aget(DIRECTORY_VERSION_KEY)
+    if version is None:
+        await cache.aadd(DIRECTORY_VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(DIRECTORY_VERSION_KEY, time.time_ns())
+    return version
+
+
+def invalidate_directory():
+    try:
+        cache.incr(DIRECTORY_VERSION_KEY)
+    except ValueError:
+        cache.set(DIRECTORY_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def directory_etag(name, key, version):
+    # Weak: CompressionMiddleware may send the same payload in several encodings.
+    return f'W/"{name}-{key}-{version}"'
+
+
+def directory_headers(etag):
+    # The directory is public reference data: shared caches may serve it for
+    # DIRECTORY_MAX_AGE seconds, then revalidate with the ETag.
+    return {'ETag': etag, 'Cache-Control': f'public, max-age={settings.DIRECTORY_MAX_AGE}'}
+
+
+def representation_key(request, key):
+    """
+    ?fields= and ?expand= change the payload, so they are part of its cache
+    key and ETag (hashed: ETags cannot contain commas).
+    """
+    fields, expand = request.GET.get('fields', ''), request.GET.get('expand', '')
+    if not fields and not expand:
+        return key
+    variant = hashlib.md5(f'{fields}|{expand}'.encode(), usedforsecurity=False).hexdigest()[:12]
+    return f'{key}-{variant}'
+
+
+def directory_response(request, name, key, loader, not_found_message):
+    """
+    Serve a directory read through the cache.
+
+    `loader` returns the serialized data, or None when nothing was found. A
+    matching If-None-Match is answered with 304 from the version alone, without
+    touching the database or the cached payload.
+    """
+    key = representation_key(request, key)
+    version = directory_version()
+    etag = directory_etag(name, key, version)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=directory_headers(etag))
+
+    cache_key = f'profiles:{name}:{key}:{version}'
+    cached = cache.get(cache_key)
+    if cached is None:
+        # Wrap the payload so a cached "not found" is distinguishable from a miss.
+        # It is read from the primary: a lagging replica would be cached for the
+        # whole version.
+        with primary_reads():
+            cached = (loader(),)
+        cache.set(cache_key, cached, timeout=settings.DIRECTORY_CACHE_TIMEOUT)
+
+    data = cached[0]
+    if data is None:
+        return Response({"message": not_found_message}, status=status.HTTP_404_NOT_FOUND)
+    return Response(data, headers=directory_headers(etag))
+
+
+async def adirectory_response(request, name, key, loader, not_found_message):
+    """
+    Async version of directory_response for plain Django async views.
+    `loader` is a coroutine function, and must apply ?fields=/?expand= like
+    the sync loaders: both share the cache entries and ETags.
+    """
+    key = representation_key(request, key)
+    version = await adirectory_version()
+    etag = directory_etag(name, key, version)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return HttpResponseNotModified(headers=directory_headers(etag))
+
+    cache_key = f'profiles:{name}:{key}:{version}'
+    cached = await cache.aget(cache_key)
+    if cached is None:
+        with primary_reads():
+            cached = (await loader(),)
+        await cache.aset(cache_key, cached, timeout=settings.DIRECTORY_CACHE_TIMEOUT)
+
+    data = cached[0]
+    if data is None:
+        return JsonResponse({"message": not_found_message}, status=status.HTTP_404_NOT_FOUND)
+    return HttpResponse(json_dumps(data), content_type='application/json', headers=directory_headers(etag))
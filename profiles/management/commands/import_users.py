@@ -0,0 +1,34 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from profiles.bulk import BATCH_SIZE, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import users (with their Patient/Specialist profiles) from a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row, or a JSON Lines file.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Password hashing processes.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+        try:
+            with open(path, encoding='utf-8', newline='') as stream:
+                report = import_users(
+                    read_rows(stream, import_format),
+                    batch_size=options['batch_size'],
+                    workers=options['workers'],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} users, rejected {len(report['errors'])} rows."
+        ))
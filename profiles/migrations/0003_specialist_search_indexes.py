@@ -0,0 +1,52 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:35
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+import profiles.models
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_auth_token'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='specialization',
+            index=models.Index(fields=['title', 'specialist'], name='specialization_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'id'], name='user_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('country'), django.db.models.functions.text.Lower('city'), models.F('id'), name='user_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('city'), models.F('id'), name='user_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('last_name'), name='user_last_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(models.F('user_type'), django.db.models.functions.text.Lower('first_name'), name='user_first_name_idx'),
+        ),
+        # Substring name search (?q=) only has an index on PostgreSQL; other
+        # databases filter the rows left by the indexed filters.
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='user',
+            index=profiles.models.TrigramIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('last_name'), name='gin_trgm_ops'), name='user_last_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=profiles.models.TrigramIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('first_name'), name='gin_trgm_ops'), name='user_first_name_trgm_idx'),
+        ),
+    ]
@@ -1,6 +1,29 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from knox import crypto
+from knox.settings import CONSTANTS, knox_settings
+
+class TrigramIndex(GinIndex):
+    """
+    GIN trigram index for substring search. Only PostgreSQL has one: on other
+    databases it is part of the model state but no index is created.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().remove_sql(model, schema_editor, **kwargs)
+
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -45,6 +68,17 @@ class User(AbstractBaseUser):
     country = models.CharField(max_length=255, blank=True, null=True)
     user_type = models.CharField(max_length=10, choices=USER_TYPES)
 
+    # Display name as last read from or written to the database, so signal
+    # handlers can tell a rename from other saves. None when unknown.
+    _loaded_name = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'first_name' in field_names and 'last_name' in field_names:
+            instance._loaded_name = (instance.first_name, instance.last_name)
+        return instance
+
     def save(self, *args, **kwargs):
         if self.password and not self.pk:
             self.password = make_password(self.password)
@@ -68,6 +102,20 @@ class User(AbstractBaseUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'date_of_birth', 'gender', 'phone_number', 'user_type']
 
+    class Meta:
+        indexes = [
+            # Specialist search filters on user_type and location and pages by id.
+            models.Index(fields=['user_type', 'id'], name='user_type_idx'),
+            models.Index(F('user_type'), Lower('country'), Lower('city'), F('id'), name='user_location_idx'),
+            models.Index(F('user_type'), Lower('city'), F('id'), name='user_city_idx'),
+            # Name prefix search is a range scan on the lowercased names.
+            models.Index(F('user_type'), Lower('last_name'), name='user_last_name_idx'),
+            models.Index(F('user_type'), Lower('first_name'), name='user_first_name_idx'),
+            # Name substring search (?q=), on PostgreSQL (see TrigramExtension in the migrations).
+            TrigramIndex(OpClass(Lower('last_name'), name='gin_trgm_ops'), name='user_last_name_trgm_idx'),
+            TrigramIndex(OpClass(Lower('first_name'), name='gin_trgm_ops'), name='user_first_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -147,5 +195,45 @@ class Specialization(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     specialist = models.ForeignKey(Specialist, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'specialist'], name='specialization_title_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.specialist.user.first_name} {self.specialist.user.last_name}"
+
+
+class AuthTokenManager(models.Manager):
+    def create(self, user, expiry=None):
+        """
+        Create a token for user and return (instance, token). Only a digest of
+        the token is stored, following django-rest-knox.
+        """
+        token = crypto.create_token_string()
+        if expiry is None:
+            expiry = knox_settings.TOKEN_TTL
+        instance = super().create(
+            token_key=token[:CONSTANTS.TOKEN_KEY_LENGTH],
+            digest=crypto.hash_token(token),
+            user=user,
+            expiry=timezone.now() + expiry if expiry else None,
+        )
+        return instance, token
+
+
+class AuthToken(models.Model):
+    """
+    knox-compatible token bound to profiles.User (knox's own AuthToken points at
+    the default auth user model).
+    """
+    digest = models.CharField(max_length=CONSTANTS.DIGEST_LENGTH, primary_key=True)
+    token_key = models.CharField(max_length=CONSTANTS.TOKEN_KEY_LENGTH, db_index=True)
+    user = models.ForeignKey(User, related_name='auth_tokens', on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+    expiry = models.DateTimeField(null=True, blank=True)
+
+    objects = AuthTokenManager()
+
+    def __str__(self):
+        return f"{self.token_key} : {self.user_id}"
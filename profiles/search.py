@@ -0,0 +1,68 @@
+from django.db.models import Exists, OuterRef, Q, prefetch_related_objects
+from django.db.models.functions import Lower
+
+from appointments.pagination import keyset_page
+from .models import User, Specialization
+from .serializers import SpecialistSerializer
+
+# The search runs on the user table, where every index it uses starts with
+# user_type and ends with id, so pages come back already in order.
+SEARCH_ORDERING = ('id',)
+SEARCH_PAGE_SIZE = 20
+
+
+def _prefix_range(prefix):
+    # 'smi' -> ('smi', 'smj'): a prefix match a btree index can answer as a range scan.
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _name_prefix(field, prefix):
+    low, high = _prefix_range(prefix)
+    return Q(**{f'{field}__gte': low, f'{field}__lt': high, f'{field}__startswith': prefix})
+
+
+def search_queryset(specialization=None, city=None, country=None, name=None, q=None):
+    """
+    Specialist users matching every given filter, case-insensitively.
+
+    Each filter is written to hit one of the search indexes: location and name
+    are compared as lower(column), name is a prefix of the first or last name,
+    and specialization is an EXISTS probe on (title, specialist). q is a
+    substring of either name, backed by trigram indexes on PostgreSQL only.
+    Users of type Specialist without a Specialist row are left out.
+    """
+    queryset = User.objects.filter(user_type='Specialist', specialist__isnull=False).select_related('specialist')
+    if specialization:
+        queryset = queryset.filter(
+            Exists(Specialization.objects.filter(title=specialization, specialist_id=OuterRef('pk')))
+        )
+    if city or country or name or q:
+        queryset = queryset.alias(
+            city_lower=Lower('city'),
+            country_lower=Lower('country'),
+            first_name_lower=Lower('first_name'),
+            last_name_lower=Lower('last_name'),
+        )
+    if city:
+        queryset = queryset.filter(city_lower=city.lower())
+    if country:
+        queryset = queryset.filter(country_lower=country.lower())
+    if name:
+        name = name.lower()
+        queryset = queryset.filter(_name_prefix('first_name_lower', name) | _name_prefix('last_name_lower', name))
+    if q:
+        q = q.lower()
+        queryset = queryset.filter(Q(first_name_lower__contains=q) | Q(last_name_lower__contains=q))
+    return queryset
+
+
+def search_specialists(filters, cursor=None, page_size=SEARCH_PAGE_SIZE):
+    """
+    Return (serialized specialists, next_cursor) for one page of search results.
+    """
+    users, next_cursor = keyset_page(search_queryset(**filters), cursor, page_size, ordering=SEARCH_ORDERING)
+    # select_related('specialist') also points each specialist back at its user,
+    # so serializing the page takes only one more query, for the specializations.
+    specialists = [user.specialist for user in users]
+    prefetch_related_objects(specialists, 'specialization_set')
+    return SpecialistSerializer(specialists, many=True).data, next_cursor
@@ -1,26 +1,45 @@
 from rest_framework import serializers
-from .models import User, Patient, Specialization, Specialist
+from timelycare.serializers import SparseFieldsMixin
+from .models import SPECIALIZATION_CHOICES, User, Patient, Specialization, Specialist
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+        extra_kwargs = {'password': {'write_only': True}}
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer()
 
     class Meta:
         model = Patient
         fields = '__all__'
 
-class SpecializationSerializer(serializers.ModelSerializer):
+class SpecializationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Specialization
         fields = '__all__'
 
-class SpecialistSerializer(serializers.ModelSerializer):
+class EmbeddedSpecializationSerializer(SpecializationSerializer):
+    """
+    A specialization nested under its specialist, without the redundant specialist id.
+    """
+    class Meta(SpecializationSerializer.Meta):
+        fields = None
+        exclude = ('specialist',)
+
+class SpecialistSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer()
+    specializations = EmbeddedSpecializationSerializer(source='specialization_set', many=True, read_only=True)
 
     class Meta:
         model = Specialist
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class SpecialistSearchSerializer(serializers.Serializer):
+    specialization = serializers.ChoiceField(choices=SPECIALIZATION_CHOICES, required=False)
+    city = serializers.CharField(required=False, max_length=255)
+    country = serializers.CharField(required=False, max_length=255)
+    name = serializers.CharField(required=False, max_length=255)
+    # Shorter substrings match too much to be worth a trigram index lookup.
+    q = serializers.CharField(required=False, min_length=3, max_length=255)
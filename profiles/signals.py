@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .authentication import forget_tokens, token_cache_key
+from .cache import invalidate_directory
+from .models import AuthToken, User, Specialization, Specialist
+
+# Sent with users=[...] for users inserted by bulk_create, which skips post_save.
+users_bulk_created = Signal()
+
+
+@receiver([post_save, post_delete], sender=Specialization)
+@receiver([post_save, post_delete], sender=Specialist)
+def specialist_directory_changed(sender, **kwargs):
+    # After commit: bumped earlier, a concurrent read could cache the
+    # uncommitted state under the new version.
+    transaction.on_commit(invalidate_directory)
+
+
+@receiver([post_save, post_delete], sender=User)
+def specialist_user_changed(sender, instance, **kwargs):
+    # Specialist payloads embed the user, patients are not part of the directory.
+    if instance.user_type == 'Specialist':
+        transaction.on_commit(invalidate_directory)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, **kwargs):
+    # Cached tokens carry a copy of the user; drop them so is_active etc. apply at once.
+    if not created:
+        forget_tokens(AuthToken.objects.filter(user=instance).values_list('digest', flat=True))
+
+
+@receiver(post_delete, sender=AuthToken)
+def forget_deleted_token(sender, instance, **kwargs):
+    cache.delete(token_cache_key(instance.digest))
@@ -1,3 +1,421 @@
-from django.test import TestCase
+import datetime
+import decimal
+import gzip
+import itertools
+import json
+import unittest
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from timelycare import renderers
+from timelycare.middleware import ReadReplicaMiddleware, accepted_encodings
+from timelycare.routers import ReplicaRouter, primary_reads
+from .authentication import CachedTokenAuthentication, token_cache_key
+from .bulk import import_users
+from .throttling import LoginEmailRateThrottle, LoginRateThrottle
+from .models import AuthToken, User, Patient, Specialization, Specialist
+
+
+def create_user(email, user_type, **extra):
+    fields = {
+        'password': 'secret',
+        'first_name': 'Test',
+        'last_name': 'User',
+        'date_of_birth': datetime.date(1990, 1, 1),
+        'gender': 'Male',
+        'phone_number': '0100000000',
+        'user_type': user_type,
+    }
+    fields.update(extra)
+    return User.objects.create(email=email, **fields)
+
+
+class ListQueryCountTests(TestCase):
+    """
+    Every list endpoint must issue a fixed number of queries whatever the row count.
+    Conditional lists spend one of them on the ETag/Last-Modified aggregate.
+    """
+    expected_queries = {
+        'users': 2,
+        'get_patient': 2,
+        'get_specialist': 2,
+        'get_specialization': 1,
+    }
+
+    def setUp(self):
+        cache.clear()
+
+    def seed(self, count):
+        start = User.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(start, start + count):
+                create_user(f'patient{i}@example.com', 'Patient')
+                user = create_user(f'specialist{i}@example.com', 'Specialist')
+                Specialization.objects.create(title='Dentist', description='Teeth', specialist=Specialist.objects.get(user=user))
+
+    def test_list_endpoints_do_not_scale_queries_with_rows(self):
+        for rows in (1, 5):
+            self.seed(rows)
+            for name, expected in self.expected_queries.items():
+                with self.subTest(endpoint=name, rows=rows), self.assertNumQueries(expected):
+                    response = self.client.get(reverse(name))
+                    self.assertEqual(response.status_code, 200)
+
+
+class DirectoryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = create_user('specialist@example.com', 'Specialist')
+        self.specialization = Specialization.objects.create(
+            title='Dentist', description='Teeth', specialist=Specialist.objects.get(user=user)
+        )
+
+    def test_reads_are_cached_until_a_profile_changes(self):
+        url = reverse('get_specialization', args=[self.specialization.id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['title'], 'Dentist')
+
+        self.specialization.title = 'Surgeon'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.specialization.save()
+        self.assertEqual(self.client.get(url).json()['title'], 'Surgeon')
+
+    def test_if_none_match_returns_304_without_queries(self):
+        response = self.client.get(reverse('get_specialist'))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=300')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('get_specialist'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Specialization.objects.create(title='Surgeon', description='Cuts', specialist=self.specialization.specialist)
+            # Not before the change is committed.
+            self.assertEqual(self.client.get(reverse('get_specialist'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(len(callbacks), 1)
+        response = self.client.get(reverse('get_specialist'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_sparse_fieldsets_are_cached_separately(self):
+        full = self.client.get(reverse('get_specialist'))
+        sparse = self.client.get(reverse('get_specialist'), {'fields': 'user.email'})
+        self.assertEqual(sparse.json(), [{'user': {'email': 'specialist@example.com'}}])
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+        self.assertIn('id', self.client.get(reverse('get_specialist')).json()[0]['user'])
+
+    def test_passwords_are_never_returned(self):
+        for name in ('users', 'get_specialist'):
+            with self.subTest(endpoint=name):
+                self.assertNotIn('password', self.client.get(reverse(name)).content.decode())
+
+    def test_missing_specialist_is_404(self):
+        response = self.client.get(reverse('get_specialist', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+
+class SpecialistProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.specialist = Specialist.objects.get(user=create_user('specialist@example.com', 'Specialist'))
+        for title in ('Dentist', 'Surgeon'):
+            Specialization.objects.create(title=title, description=title, specialist=self.specialist)
+        create_user('other@example.com', 'Specialist')
+
+    def test_detail_and_list_embed_specializations(self):
+        response = self.client.get(reverse('get_specialist', args=[self.specialist.pk]))
+        self.assertEqual([row['title'] for row in response.json()['specializations']], ['Dentist', 'Surgeon'])
+        self.assertNotIn('specialist', response.json()['specializations'][0])
+
+        with self.assertNumQueries(2):
+            rows = self.client.get(reverse('get_specialist')).json()
+        self.assertEqual({row['user']['email']: len(row['specializations']) for row in rows},
+                         {'specialist@example.com': 2, 'other@example.com': 0})
+
+    def test_search_results_embed_specializations(self):
+        response = self.client.get(reverse('search_specialist'), {'specialization': 'Dentist'})
+        self.assertEqual(len(response.json()['results'][0]['specializations']), 2)
+
+
+class ReplicaRoutingTests(TestCase):
+    def route(self, method, path):
+        """
+        Return the alias ReplicaRouter picks for a read inside the view, and outside it afterwards.
+        """
+        router = ReplicaRouter()
+        seen = []
+
+        def get_response(request):
+            seen.append(router.db_for_read(User))
+            with primary_reads():
+                seen.append(router.db_for_read(User))
+            return HttpResponse()
+
+        middleware = ReadReplicaMiddleware(get_response)
+        middleware(getattr(RequestFactory(), method)(path))
+        return seen + [router.db_for_read(User)]
+
+    def test_get_requests_to_listed_views_read_from_the_replica(self):
+        self.assertEqual(self.route('get', reverse('users')), ['replica', None, None])
+        self.assertEqual(self.route('post', reverse('users')), [None, None, None])
+        self.assertEqual(self.route('get', reverse('medical_history', args=[1])), [None, None, None])
+        self.assertEqual(self.route('get', '/no-such-page/'), [None, None, None])
+
+    async def test_sync_views_see_the_replica_under_asgi(self):
+        router = ReplicaRouter()
+        seen = []
+
+        @sync_to_async
+        def view(request):
+            # Like a sync view called from the async handler, in a thread.
+            seen.append(router.db_for_read(User))
+            return HttpResponse()
+
+        async def get_response(request):
+            return await view(request)
+
+        middleware = ReadReplicaMiddleware(get_response)
+        await middleware(RequestFactory().get(reverse('users')))
+        self.assertEqual(seen + [router.db_for_read(User)], ['replica', None])
+
+        for url in (reverse('users'), reverse('get_patient'), reverse('appointments')):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_writes_and_migrations_stay_on_the_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(User), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'profiles'))
+        self.assertTrue(router.allow_migrate('default', 'profiles'))
+
+
+class ResponseEncodingTests(TestCase):
+    def setUp(self):
+        for i in range(20):
+            create_user(f'patient{i}@example.com', 'Patient')
+
+    def test_fast_renderer_matches_drf(self):
+        data = {
+            'when': timezone.now(), 'day': datetime.date(2024, 5, 1), 'id': uuid.uuid4(), 'fee': decimal.Decimal('1.50'),
+            'label': gettext_lazy('Patient'), 'text': 'line\u2028break é', 'rows': [1, None, True], 7: 'int key',
+        }
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_large_responses_are_compressed_for_clients_that_accept_it(self):
+        plain = self.client.get(reverse('users'))
+        self.assertNotIn('Content-Encoding', plain)
+
+        response = self.client.get(reverse('users'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+
+        refused = self.client.get(reverse('users'), HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', refused)
+
+    @override_settings(COMPRESSION_MIN_SIZE=100000)
+    def test_small_responses_are_sent_as_they_are(self):
+        response = self.client.get(reverse('users'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_accept_encoding_parsing(self):
+        self.assertEqual(accepted_encodings('br;q=0.5, GZIP , *;q=0'), {'br': 0.5, 'gzip': 1.0, '*': 0.0})
+
+    @unittest.skipUnless(renderers.msgpack, "msgpack is not installed")
+    def test_msgpack_output(self):
+        response = self.client.get(reverse('users'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(len(renderers.msgpack.unpackb(response.content)), 20)
+
+
+class BulkImportTests(TestCase):
+    def row(self, email, user_type='Patient', **extra):
+        return {
+            'email': email,
+            'password': 'secret',
+            'first_name': 'Bulk',
+            'last_name': 'User',
+            'date_of_birth': '1990-01-01',
+            'gender': 'Female',
+            'phone_number': '0100000000',
+            'user_type': user_type,
+            **extra,
+        }
+
+    def test_bad_rows_are_reported_without_aborting_the_batch(self):
+        create_user('taken@example.com', 'Patient')
+        rows = [
+            self.row('a@example.com'),
+            self.row('taken@example.com'),
+            self.row('b@example.com', 'Specialist'),
+            self.row('a@example.com'),
+            self.row('c@example.com', gender='Other'),
+        ]
+        report = import_users(rows, batch_size=2)
+        self.assertEqual(report['created'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [2, 4, 5])
+
+        user = User.objects.get(email='b@example.com')
+        self.assertTrue(user.check_password('secret'))
+        self.assertTrue(Specialist.objects.filter(user=user).exists())
+        self.assertTrue(Patient.objects.filter(user__email='a@example.com').exists())
+
+    def test_endpoint_accepts_jsonl_upload(self):
+        upload = SimpleUploadedFile(
+            'users.jsonl',
+            (json.dumps(self.row('d@example.com')) + '\n{not json\n').encode(),
+        )
+        response = self.client.post(reverse('bulk_add_users'), {'file': upload})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['errors'][0]['row'], 2)
+
+
+class SpecialistSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        people = [
+            ('smith@example.com', 'Anna', 'Smith', 'Cairo', 'Dentist'),
+            ('smythe@example.com', 'Omar', 'Smythe', 'cairo', 'Doctor'),
+            ('salah@example.com', 'Smita', 'Salah', 'Giza', 'Dentist'),
+            ('hassan@example.com', 'Laila', 'Hassan', 'Cairo', 'Dentist'),
+        ]
+        cls.ids = {}
+        for email, first_name, last_name, city, title in people:
+            user = create_user(email, 'Specialist', first_name=first_name, last_name=last_name, city=city, country='Egypt')
+            Specialization.objects.create(title=title, description='', specialist_id=user.pk)
+            cls.ids[last_name] = user.pk
+        create_user('patient@example.com', 'Patient', last_name='Smith', city='Cairo')
+
+    def search(self, **params):
+        response = self.client.get(reverse('search_specialist'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['user']['last_name'] for row in response.json()['results']]
+
+    def test_filters_combine(self):
+        self.assertEqual(self.search(city='CAIRO'), ['Smith', 'Smythe', 'Hassan'])
+        self.assertEqual(self.search(city='cairo', specialization='Dentist'), ['Smith', 'Hassan'])
+        self.assertEqual(self.search(name='sm'), ['Smith', 'Smythe', 'Salah'])
+        self.assertEqual(self.search(name='smy', country='egypt'), ['Smythe'])
+        self.assertEqual(self.search(q='ssa'), ['Hassan'])
+
+    def test_pages_are_stable(self):
+        first = self.client.get(reverse('search_specialist'), {'page_size': 2}).json()
+        second = self.client.get(reverse('search_specialist'), {'page_size': 2, 'cursor': first['next_cursor']}).json()
+        seen = [row['user']['id'] for row in first['results'] + second['results']]
+        self.assertEqual(seen, sorted(self.ids.values()))
+        self.assertIsNone(second['next_cursor'])
+
+    def test_specialists_without_a_profile_are_skipped(self):
+        user = create_user('orphan@example.com', 'Specialist', last_name='Smart', city='Cairo')
+        Specialist.objects.filter(user=user).delete()
+        self.assertEqual(self.search(name='sm'), ['Smith', 'Smythe', 'Salah'])
+
+    def test_invalid_parameters(self):
+        for params in ({'specialization': 'Wizard'}, {'q': 'ab'}, {'cursor': 'garbage'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('search_specialist'), params).status_code, 400)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.patient_id = create_user('patient@example.com', 'Patient').id
+        user = create_user('specialist@example.com', 'Specialist')
+        self.specialization = Specialization.objects.create(
+            title='Dentist', description='Teeth', specialist=Specialist.objects.get(user=user)
+        )
+        self.specialist_id = user.id
+
+    def test_async_views_match_sync_views(self):
+        pairs = [
+            ('users', []),
+            ('get_patient', []),
+            ('get_patient', [self.patient_id]),
+            ('get_specialist', []),
+            ('get_specialist', [self.specialist_id]),
+            ('get_specialization', []),
+            ('get_specialization', [self.specialization.id]),
+            ('get_specialization', [999]),
+        ]
+        queries = [{}, {'fields': 'id,user.email'}, {'fields': 'user.email', 'expand': 'specialist'}]
+        for (name, args), query in itertools.product(pairs, queries):
+            with self.subTest(endpoint=name, args=args, query=query):
+                # Async first: its cached payload must be what the sync view would have cached.
+                cache.clear()
+                response = self.client.get(reverse(f'async_{name}', args=args), query)
+                expected = self.client.get(reverse(name, args=args), query)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.json(), expected.json())
+                cache.clear()
+                self.assertEqual(self.client.get(reverse(name, args=args), query).json(), expected.json())
+
+    def test_async_views_answer_conditional_gets(self):
+        for name, args in (('users', []), ('get_patient', []), ('get_patient', [self.patient_id])):
+            with self.subTest(endpoint=name, args=args):
+                url = reverse(f'async_{name}', args=args)
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                self.assertNotEqual(self.client.get(url, {'fields': 'id'})['ETag'], etag)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('patient@example.com', 'Patient')
+
+    def login(self, password='secret', email='patient@example.com'):
+        return self.client.post(
+            reverse('login'), {'email': email, 'password': password, 'user_type': 'Patient'}, content_type='application/json'
+        )
+
+    def test_login_issues_a_token_whose_lookup_is_cached(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        token = response.json()['token'].encode()
+
+        authentication = CachedTokenAuthentication()
+        user, _ = authentication.authenticate_credentials(token)
+        self.assertEqual(user.pk, self.user.pk)
+        with self.assertNumQueries(0):
+            authentication.authenticate_credentials(token)
+        digest = AuthToken.objects.get(user=self.user).digest
+        self.assertIn('password', cache.get(token_cache_key(digest)).user.get_deferred_fields())
+
+    def test_logout_revokes_the_token(self):
+        token = self.login().json()['token']
+        response = self.client.post(reverse('logout'), HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, 204)
+        response = self.client.post(reverse('logout'), HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_attempts_are_throttled_per_email(self):
+        with mock.patch.dict(LoginEmailRateThrottle.THROTTLE_RATES, {'login_email': '2/min'}):
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            self.assertEqual(self.login(password='wrong').status_code, 400)
+            self.assertEqual(self.login().status_code, 429)
+
+    def test_forwarded_for_headers_do_not_reset_the_ip_limit(self):
+        def login_from(address):
+            return self.client.post(
+                reverse('login'), {'email': 'patient@example.com', 'password': 'wrong', 'user_type': 'Patient'},
+                content_type='application/json', HTTP_X_FORWARDED_FOR=address,
+            )
+
+        with mock.patch.dict(LoginRateThrottle.THROTTLE_RATES, {'login': '2/min'}):
+            self.assertEqual(login_from('198.51.100.1').status_code, 400)
+            self.assertEqual(login_from('198.51.100.2').status_code, 400)
+            self.assertEqual(login_from('198.51.100.3').status_code, 429)
@@ -1,11 +1,13 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
    path('', views.index, name='index'),
    path('users/', views.users, name='users'),
    path('user/add/', views.add_user, name='add_user'),
+   path('user/bulk/', views.bulk_add_users, name='bulk_add_users'),
    path('user/update/<int:user_id>/', views.update_user, name='update_user'),
+   path('specialist/search/', views.search_specialist, name='search_specialist'),
    path('specialist/', views.get_specialist, name='get_specialist'),
    path('specialist/<int:user_id>/', views.get_specialist, name='get_specialist'),
    path('patient/', views.get_patient, name='get_patient'),
@@ -13,5 +15,13 @@ urlpatterns = [
    path('specialization/', views.get_specialization, name='get_specialization'),
    path('specialization/<int:specialization_id>/', views.get_specialization, name='get_specialization'),
    path('login/', views.login, name='login'),
+   path('logout/', views.logout, name='logout'),
+   path('async/users/', async_views.users, name='async_users'),
+   path('async/specialist/', async_views.get_specialist, name='async_get_specialist'),
+   path('async/specialist/<int:user_id>/', async_views.get_specialist, name='async_get_specialist'),
+   path('async/patient/', async_views.get_patient, name='async_get_patient'),
+   path('async/patient/<int:user_id>/', async_views.get_patient, name='async_get_patient'),
+   path('async/specialization/', async_views.get_specialization, name='async_get_specialization'),
+   path('async/specialization/<int:specialization_id>/', async_views.get_specialization, name='async_get_specialization'),
    
 ]
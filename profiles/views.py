@@ -1,10 +1,19 @@
 from django.shortcuts import render
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, authentication_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
-from .models import User, Patient, Specialization, Specialist
-from .serializers import UserSerializer, PatientSerializer, SpecializationSerializer, SpecialistSerializer
+from .models import AuthToken, User, Patient, Specialization, Specialist
+from .serializers import UserSerializer, PatientSerializer, SpecializationSerializer, SpecialistSerializer, SpecialistSearchSerializer
 from django.db import transaction
+from timelycare.conditional import conditional_response, list_version, row_version
+from timelycare.optimizers import optimize_queryset
+from timelycare.serializers import serialize_list
+from .cache import directory_response
+from .bulk import import_users, rows_from_upload
+from .search import SEARCH_PAGE_SIZE, search_specialists
+from appointments.pagination import InvalidCursor, parse_page_size
+from .throttling import LoginEmailRateThrottle, LoginRateThrottle
+from django.conf import settings
 
 @api_view(['GET'])
 def index(request):
@@ -18,18 +27,24 @@ def users(request, user_id=None):
     """
     Retrieve users by user_id.
     If no user ID is provided, return all users.
+    Answers If-None-Match (and, for one user, If-Modified-Since) with 304
+    before serializing.
     """
     if user_id is None:
         users = User.objects.all()
-        user_serializer = UserSerializer(users, many=True)
-        return Response(user_serializer.data)
+
+        def render():
+            return Response(serialize_list(users, UserSerializer, {'request': request}))
+
+        return conditional_response(request, list_version(users), render, last_modified=False)
     
     try:
-        user = User.objects.get(id=user_id)
-        user_serializer = UserSerializer(user)
-        return Response(user_serializer.data)
+        user_serializer = UserSerializer(context={'request': request})
+        user = optimize_queryset(User.objects.all(), user_serializer, required=('updated_at',)).get(id=user_id)
     except User.DoesNotExist:
         return Response({"message": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+    user_serializer.instance = user
+    return conditional_response(request, row_version(user), lambda: Response(user_serializer.data))
 
 
 @api_view(['POST'])
@@ -63,23 +78,57 @@ def add_user(request):
 
         return Response(user_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+def bulk_add_users(request):
+    """
+    Create many users at once from a JSON list, or from an uploaded CSV/JSONL
+    `file` (format taken from ?format= or the file extension).
+    Rows that fail validation are reported without aborting the others.
+    """
+    upload = request.FILES.get('file')
+    try:
+        if upload is not None:
+            rows = rows_from_upload(upload, request.query_params.get('format'))
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response({"message": "Send a list of users or a CSV/JSONL file."}, status=status.HTTP_400_BAD_REQUEST)
+        report = import_users(rows, batch_size=settings.BULK_IMPORT_BATCH_SIZE, workers=settings.BULK_IMPORT_WORKERS)
+    except ValueError as exc:
+        return Response({"message": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if report["errors"]:
+        return Response(report, status=status.HTTP_207_MULTI_STATUS)
+    return Response(report, status=status.HTTP_201_CREATED)
+
 @api_view(['GET'])
 def get_patient(request, user_id=None):
     """
     Retrieve patient by user_id.
     If no user ID is provided, return all patients.
+    Answers If-None-Match (and, for one patient, If-Modified-Since) with 304
+    before serializing.
     """
+    # A patient's payload embeds its user, so both modification times count.
     if user_id is None:
         patients = Patient.objects.all()
-        patient_serializer = PatientSerializer(patients, many=True)
-        return Response(patient_serializer.data)
+
+        def render():
+            return Response(serialize_list(patients, PatientSerializer, {'request': request}))
+
+        return conditional_response(request, list_version(patients, ('updated_at', 'user__updated_at')), render, last_modified=False)
     
     try:
-        patient = Patient.objects.get(user_id=user_id)
-        patient_serializer = PatientSerializer(patient)
-        return Response(patient_serializer.data)
+        patient_serializer = PatientSerializer(context={'request': request})
+        patients = optimize_queryset(
+            Patient.objects.select_related('user'), patient_serializer, required=('updated_at', 'user__updated_at')
+        )
+        patient = patients.get(user_id=user_id)
     except Patient.DoesNotExist:
         return Response({"message": "Patient not found."}, status=status.HTTP_404_NOT_FOUND)
+    patient_serializer.instance = patient
+    version = row_version(patient, ('updated_at', 'user.updated_at'))
+    return conditional_response(request, version, lambda: Response(patient_serializer.data))
 
 
 @api_view(['GET'])
@@ -88,17 +137,18 @@ def get_specialization(request, specialization_id=None):
     Retrieve specialization by id.
     If no specialization ID is provided, return all specializations.
     """
+    context = {'request': request}
     if specialization_id is None:
-        specializations = Specialization.objects.all()
-        specialization_serializer = SpecializationSerializer(specializations, many=True)
-        return Response(specialization_serializer.data)
-    
-    try:
-        specialization = Specialization.objects.get(id=specialization_id)
-        specialization_serializer = SpecializationSerializer(specialization)
-        return Response(specialization_serializer.data)
-    except Specialization.DoesNotExist:
-        return Response({"message": "Specialization not found."}, status=status.HTTP_404_NOT_FOUND)
+        def load():
+            return serialize_list(Specialization.objects.all(), SpecializationSerializer, context)
+
+        return directory_response(request, 'specialization', 'all', load, "No specializations found.")
+
+    def load():
+        specialization = Specialization.objects.filter(id=specialization_id).first()
+        return SpecializationSerializer(specialization, context=context).data if specialization else None
+
+    return directory_response(request, 'specialization', specialization_id, load, "Specialization not found.")
 
 
 @api_view(['GET'])
@@ -107,20 +157,40 @@ def get_specialist(request, user_id=None):
     Retrieve specialist by user_id.
     If user_id is not provided, return all specialists.
     """
+    context = {'request': request}
     if user_id is not None:
-        try:
-            specialist = Specialist.objects.get(user_id=user_id)
-            specialist_serializer = SpecialistSerializer(specialist)
-            return Response(specialist_serializer.data)
-        except Specialist.DoesNotExist:
-            return Response({"message": "Specialist not found."}, status=status.HTTP_404_NOT_FOUND)
-    else:
-        specialists = Specialist.objects.all()
-        if specialists.exists():
-            specialist_serializer = SpecialistSerializer(specialists, many=True)
-            return Response(specialist_serializer.data)
-        else:
-            return Response({"message": "No specialists found."}, status=status.HTTP_404_NOT_FOUND)
+        def load():
+            specialist_serializer = SpecialistSerializer(context=context)
+            specialist = optimize_queryset(Specialist.objects.all(), specialist_serializer).filter(user_id=user_id).first()
+            specialist_serializer.instance = specialist
+            return specialist_serializer.data if specialist else None
+
+        return directory_response(request, 'specialist', user_id, load, "Specialist not found.")
+
+    def load():
+        # An empty directory is reported as not found, without a separate exists() query.
+        return serialize_list(Specialist.objects.all(), SpecialistSerializer, context) or None
+
+    return directory_response(request, 'specialist', 'all', load, "No specialists found.")
+
+
+@api_view(['GET'])
+def search_specialist(request):
+    """
+    Search specialists by ?specialization=, ?city=, ?country=, a ?name= prefix
+    or a ?q= name substring, paged with ?page_size= and ?cursor=.
+    """
+    search_serializer = SpecialistSearchSerializer(data=request.query_params)
+    if not search_serializer.is_valid():
+        return Response(search_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page_size = parse_page_size(request.query_params.get('page_size'), SEARCH_PAGE_SIZE)
+        results, next_cursor = search_specialists(
+            search_serializer.validated_data, request.query_params.get('cursor'), page_size
+        )
+    except InvalidCursor as exc:
+        return Response({"message": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"results": results, "next_cursor": next_cursor})
 
 
 @api_view(['PUT'])
@@ -141,32 +211,42 @@ def update_user(request, user_id):
 
 
 @api_view(['POST'])
+@authentication_classes([])
+@throttle_classes([LoginRateThrottle, LoginEmailRateThrottle])
 def login(request):
     """
     Login endpoint for the profiles app.
+    Returns a token to send as "Authorization: Token <token>" on later calls,
+    so the password is only hashed once per session.
     """
     email = request.data.get('email')
     password = request.data.get('password')
     user_type = request.data.get('user_type')
 
     try:
-        user = User.objects.get(email=email)
+        user = User.objects.only('id', 'email', 'password', 'user_type', 'is_active').get(email=email)
     except User.DoesNotExist:
         return Response({"message": "User not found."}, status=status.HTTP_404_NOT_FOUND)
 
     if user.check_password(password):
-        if user_type == 'Specialist':
-            specialist_info = {
-                "id": user.id
-            }
-            return Response({"user_info": specialist_info})
-        elif user_type == 'Patient':
-            patient_info = {
-                "id": user.id
-            }
-            return Response({"user_info": patient_info})
-        else:
+        if user_type not in ('Specialist', 'Patient'):
             return Response({"message": "Invalid user type."}, status=status.HTTP_400_BAD_REQUEST)
+        auth_token, token = AuthToken.objects.create(user)
+        return Response({
+            "user_info": {"id": user.id},
+            "token": token,
+            "expiry": auth_token.expiry,
+        })
     else:
         return Response({"message": "Incorrect password."}, status=status.HTTP_400_BAD_REQUEST)
-    
+
+
+@api_view(['POST'])
+def logout(request):
+    """
+    Revoke the token used to authenticate this request.
+    """
+    if not isinstance(request.auth, AuthToken):
+        return Response({"message": "Token authentication required."}, status=status.HTTP_401_UNAUTHORIZED)
+    request.auth.delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
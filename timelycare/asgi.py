@@ -11,10 +11,11 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 from django_nextjs.proxy import NextJSProxyHttpConsumer, NextJSProxyWebsocketConsumer
 
 from django.conf import settings
+from appointments.routing import websocket_urlpatterns as appointment_websocket_routes
 
 # put your custom routes here if you need
 http_routes = [re_path(r"", django_asgi_app)]
-websocket_routers = []
+websocket_routers = [*appointment_websocket_routes]
 
 if settings.DEBUG:
     http_routes.insert(0, re_path(r"^(?:_next|__next|next).*", NextJSProxyHttpConsumer.as_asgi()))
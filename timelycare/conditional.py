@@ -0,0 +1,131 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+# Responses about individual users: browsers may keep them but must revalidate,
+# shared caches must not store them.
+PRIVATE = {'private': True, 'no_cache': True}
+
+
+def public(max_age):
+    """
+    Cache-Control for reference data that a CDN or reverse proxy may serve for max_age seconds.
+    """
+    return {'public': True, 'max_age': max_age}
+
+
+def list_version(queryset, fields=('updated_at',)):
+    """
+    (count, latest modification) of the rows of a queryset, from one aggregate
+    query. `fields` are the modification times to watch, including those of
+    joined rows that are part of the payload (e.g. 'user__updated_at').
+
+    Any insert, delete or auto_now save changes the result, so it identifies
+    the state of the whole list without reading it.
+    """
+    return _list_version(queryset.order_by().aggregate(**_version_aggregates(fields)))
+
+
+async def alist_version(queryset, fields=('updated_at',)):
+    return _list_version(await queryset.order_by().aaggregate(**_version_aggregates(fields)))
+
+
+def _version_aggregates(fields):
+    return {'count': Count('pk'), **{f'latest_{index}': Max(field) for index, field in enumerate(fields)}}
+
+
+def _list_version(result):
+    latest = [value for key, value in result.items() if key != 'count' and value is not None]
+    return result['count'], max(latest, default=None)
+
+
+def row_version(instance, fields=('updated_at',)):
+    """
+    (primary key, latest modification) of one loaded row; dotted `fields`
+    such as 'user.updated_at' follow relations already loaded with it.
+    """
+    latest = []
+    for path in fields:
+        value = instance
+        for name in path.split('.'):
+            value = getattr(value, name)
+        latest.append(value)
+    return instance.pk, max(latest)
+
+
+def expanded(request):
+    """
+    Whether ?expand= embeds related rows whose changes a version would not see.
+    """
+    return bool(request.GET.get('expand'))
+
+
+def page_version(rows, fields=('updated_at',)):
+    """
+    Version of a page of loaded rows: which rows it holds and when the latest
+    of them changed.
+    """
+    versions = [row_version(row, fields) for row in rows]
+    return tuple(pk for pk, _ in versions), max((latest for _, latest in versions), default=None)
+
+
+def conditional_response(request, version, render, cache_control=PRIVATE, last_modified=True):
+    """
+    Answer a GET from a version (see list_version and row_version): 304 when
+    the client's If-None-Match or If-Modified-Since still matches, otherwise
+    render() the response. Either way the ETag, Last-Modified and
+    Cache-Control headers are set.
+
+    Pass last_modified=False for list and page versions: deleting a row does
+    not move their latest modification time, so only the ETag, which covers
+    the row count or ids, can tell. Last-Modified is then neither sent nor
+    honoured.
+
+    The ETag also covers the path, query string and negotiated media type, so
+    ?fields=, ?cursor= and so on get their own. It is weak because
+    compression middleware may re-encode the body. A version of None (the
+    payload depends on rows it does not cover) just renders the response.
+    """
+    if version is None:
+        response = render()
+        patch_cache_control(response, **cache_control)
+        return response
+    etag, last_modified = _validators(request, version, last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render()
+    return _with_validators(response, etag, last_modified, cache_control)
+
+
+async def aconditional_response(request, version, render, cache_control=PRIVATE, last_modified=True):
+    """
+    conditional_response for plain Django async views: `render` is a
+    coroutine function returning an HttpResponse.
+    """
+    if version is None:
+        response = await render()
+        patch_cache_control(response, **cache_control)
+        return response
+    etag, last_modified = _validators(request, version, last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await render()
+    return _with_validators(response, etag, last_modified, cache_control)
+
+
+def _validators(request, version, last_modified):
+    latest = version[-1]
+    key = repr((request.path, request.GET.urlencode(), getattr(request, 'accepted_media_type', None), *version))
+    etag = 'W/' + quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+    return etag, int(latest.timestamp()) if last_modified and latest is not None else None
+
+
+def _with_validators(response, etag, last_modified, cache_control):
+    if 200 <= response.status_code < 300 or response.status_code == 304:
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, **cache_control)
+    return response
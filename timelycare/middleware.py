@@ -0,0 +1,178 @@
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.urls import Resolver404, get_resolver
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+from .routers import replica_reads
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Media types worth compressing; anything else (images, archives) already is.
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/msgpack', 'application/javascript')
+
+
+class ReadReplicaMiddleware:
+    """
+    Let GET and HEAD requests to views in settings.REPLICA_VIEW_MODULES read
+    from the replica. Only has an effect when ReplicaRouter is installed.
+
+    The view is resolved here rather than in process_view(): the replica flag
+    is a context variable, and it has to be set in the frame that calls the
+    rest of the stack to reach the view, including through the thread hop
+    to a sync view under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.modules = set(getattr(settings, 'REPLICA_VIEW_MODULES', ()))
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.reads_from_replica(request):
+            return self.get_response(request)
+        with replica_reads():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not self.reads_from_replica(request):
+            return await self.get_response(request)
+        with replica_reads():
+            return await self.get_response(request)
+
+    def reads_from_replica(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        try:
+            match = get_resolver(getattr(request, 'urlconf', None)).resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.func.__module__ in self.modules
+
+def accepted_encodings(header):
+    """
+    Parse Accept-Encoding into {coding: q}.
+    """
+    accepted = {}
+    for item in header.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def chunk(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+
+    def chunk(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with brotli (when the brotli package is installed) or
+    gzip, whichever the client prefers in Accept-Encoding.
+
+    Bodies shorter than settings.COMPRESSION_MIN_SIZE and media types that
+    are not in COMPRESSIBLE_TYPES (or text/*) are sent as they are.
+    Streaming responses are always compressed, flushing after every chunk so
+    that clients still receive rows as they are produced. Like Django's
+    GZipMiddleware, strong ETags are made weak.
+    """
+
+    def select_encoding(self, request):
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        default = accepted.get('*', 0.0)
+        available = ('br', 'gzip') if brotli is not None else ('gzip',)
+        # Ties go to the first available coding, i.e. brotli.
+        best = max(available, key=lambda coding: accepted.get(coding, default))
+        return best if accepted.get(best, default) > 0 else None
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not 200 <= response.status_code < 300:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not (content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.select_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            stream = _BrotliStream() if encoding == 'br' else _GzipStream()
+            response.streaming_content = (
+                self._acompress(stream, response.streaming_content)
+                if response.is_async
+                else self._compress(stream, response.streaming_content)
+            )
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+            else:
+                # Django's gzip, with its random header padding against BREACH.
+                compressed = compress_string(response.content, max_random_bytes=100)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _compress(stream, chunks):
+        for chunk in chunks:
+            if chunk:
+                yield stream.chunk(chunk)
+        yield stream.finish()
+
+    @staticmethod
+    async def _acompress(stream, chunks):
+        async for chunk in chunks:
+            if chunk:
+                yield stream.chunk(chunk)
+        yield stream.finish()
@@ -0,0 +1,114 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.relations import ManyRelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def optimize_queryset(queryset, serializer, required=()):
+    """
+    Add the select_related/prefetch_related/only calls a serializer needs to
+    render every row of `queryset` without lazy per-row queries.
+
+    Nested serializers on forward foreign keys and one-to-one fields become
+    select_related joins. Nested many=True serializers and many-related fields
+    become Prefetch objects, whose querysets are optimized the same way. When
+    every field maps to a model field, only those columns (plus `required`)
+    are loaded.
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+
+    selects, prefetches, columns = _related_lookups(serializer, queryset.model)
+    if selects:
+        queryset = queryset.select_related(*selects)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if columns is not None:
+        # `required` may be an ordering, e.g. ('-sent_at', 'id').
+        queryset = queryset.only(*columns, *(name.lstrip('-') for name in required))
+    return queryset
+
+
+def get_model_field(model, name):
+    """
+    Like model._meta.get_field(), but also accepts reverse accessor names such
+    as 'specialization_set', which is what a serializer's source holds.
+    """
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        for related in model._meta.related_objects:
+            if related.get_accessor_name() == name:
+                return related
+        raise
+
+
+def _related_lookups(serializer, model, prefix=''):
+    """
+    Return (select_related lookups, prefetches, columns). columns is None when
+    some field reads something other than a model field.
+    """
+    selects, prefetches, columns = [], [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            columns = None
+            continue
+
+        name = field.source.split('.')[0]
+        try:
+            model_field = get_model_field(model, name)
+        except FieldDoesNotExist:
+            # Properties and SerializerMethodFields are out of reach.
+            columns = None
+            continue
+        lookup = prefix + name
+        if not model_field.is_relation:
+            if columns is not None:
+                columns.append(lookup)
+            continue
+
+        related_model = model_field.related_model
+        if model_field.many_to_many or model_field.one_to_many:
+            related_queryset = related_model._default_manager.all()
+            if isinstance(field, ListSerializer):
+                # The prefetch matches rows back through the related model's foreign key.
+                required = (model_field.field.name,) if model_field.one_to_many else ()
+                related_queryset = optimize_queryset(related_queryset, field.child, required)
+            prefetches.append(Prefetch(lookup, queryset=related_queryset))
+        elif isinstance(field, ManyRelatedField):
+            prefetches.append(lookup)
+        elif isinstance(field, BaseSerializer):
+            selects.append(lookup)
+            nested_selects, nested_prefetches, nested_columns = _related_lookups(field, related_model, lookup + '__')
+            selects.extend(nested_selects)
+            prefetches.extend(nested_prefetches)
+            if columns is not None and nested_columns is not None:
+                columns.extend([lookup, *nested_columns])
+            else:
+                columns = None
+        elif '.' in field.source:
+            selects.append(_dotted_lookup(model, field.source.split('.'), prefix))
+            columns = None
+        elif columns is not None:
+            # A plain PrimaryKeyRelatedField reads the local *_id column: no join needed.
+            columns.append(lookup)
+    return selects, prefetches, columns
+
+
+def _dotted_lookup(model, parts, prefix):
+    # Follow source='a.b.c' through forward relations only: 'a__b'.
+    path = []
+    for part in parts:
+        try:
+            model_field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            break
+        if not model_field.is_relation or model_field.many_to_many or model_field.one_to_many:
+            break
+        path.append(part)
+        model = model_field.related_model
+    return prefix + '__'.join(path)
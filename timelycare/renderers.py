@@ -0,0 +1,79 @@
+"""
+Renderers for API responses.
+
+FastJSONRenderer produces the same JSON as DRF's JSONRenderer, through orjson
+when it is installed; MessagePackRenderer needs the msgpack package and is
+only enabled when it is installed (see REST_FRAMEWORK in settings).
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Everything orjson does not handle itself goes through DRF's encoder, and
+# datetimes too so that UTC is written as 'Z' like DRF does.
+_ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_default = JSONEncoder().default
+_stdlib_encoder = JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+
+def json_dumps(data):
+    """
+    Encode data as compact UTF-8 JSON bytes, the way JSONRenderer does by default.
+    """
+    if orjson is None:
+        ret = _stdlib_encoder.encode(data)
+        return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+    ret = orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+    # Like JSONRenderer, escape the separators that are invalid in JavaScript strings.
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Indented output (the browsable API, or `; indent=` in the Accept header)
+    and the non-default UNICODE_JSON/COMPACT_JSON/STRICT_JSON settings are
+    left to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            orjson is None
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            or not (api_settings.UNICODE_JSON and api_settings.COMPACT_JSON)
+            or not api_settings.STRICT_JSON
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return json_dumps(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack output for internal service clients (Accept: application/msgpack).
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Values msgpack has no type for (UUIDs, dates, decimals) are sent as
+        # the strings they are in JSON.
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
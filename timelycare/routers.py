@@ -0,0 +1,44 @@
+import contextlib
+from contextvars import ContextVar
+
+REPLICA_ALIAS = 'replica'
+
+# Set by ReadReplicaMiddleware for the duration of a request that may read from the replica.
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@contextlib.contextmanager
+def replica_reads(enabled=True):
+    """
+    Route reads in the block to the replica (or, with enabled=False, back to
+    the primary, e.g. for data that is about to be cached).
+    """
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def primary_reads():
+    return replica_reads(False)
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica inside replica_reads(), and everything else,
+    including all writes and migrations, to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return REPLICA_ALIAS if _use_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
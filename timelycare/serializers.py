@@ -0,0 +1,206 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields as drf_fields
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+from .optimizers import get_model_field, optimize_queryset
+
+
+def parse_fieldset(value):
+    """
+    Turn 'id,email,user.first_name' into {'id': {}, 'email': {}, 'user': {'first_name': {}}}.
+    An empty tree under a name keeps that field whole.
+    """
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for part in filter(None, path.strip().split('.')):
+            node = node.setdefault(part, {})
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets.
+
+    `fields` ('id,user.email') keeps only the named fields, narrowing nested
+    serializers with dotted names. `expand` ('specialist') renders the
+    relations listed in Meta.expandable_fields with their nested serializer
+    instead of a primary key. Both default to the ?fields= and ?expand= query
+    parameters of the request in the serializer context.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None and request is not None:
+            fields = request.query_params.get('fields')
+        if expand is None and request is not None:
+            expand = request.query_params.get('expand')
+        self._expand(parse_fieldset(expand) if isinstance(expand, str) else expand or {})
+        self._narrow(parse_fieldset(fields) if isinstance(fields, str) else fields or {})
+
+    def _expand(self, expand):
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand:
+            if name in expandable and name in self.fields:
+                self.fields[name] = expandable[name](read_only=True)
+
+    def _narrow(self, fields):
+        if not fields:
+            return
+        for name in list(self.fields):
+            if name not in fields:
+                self.fields.pop(name)
+                continue
+            nested = self.fields[name]
+            if isinstance(nested, ListSerializer):
+                nested = nested.child
+            if fields[name] and isinstance(nested, SparseFieldsMixin):
+                nested._narrow(fields[name])
+
+
+# DRF fields whose output for a model value is the value itself (or what the
+# JSON renderer makes of it), so values() rows can be rendered as they are.
+PASSTHROUGH_FIELDS = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.ChoiceField,
+    drf_fields.FloatField,
+    drf_fields.IntegerField,
+    drf_fields.JSONField,
+    drf_fields.ReadOnlyField,
+    drf_fields.UUIDField,
+    PrimaryKeyRelatedField,
+)
+
+
+class _Children:
+    """
+    A nested many=True serializer on a reverse foreign key, loaded with one
+    extra values() query for all parent rows.
+    """
+
+    def __init__(self, related, plan):
+        self.model = related.related_model
+        self.foreign_key = related.field.attname
+        self.plan = plan
+        self.groups = {}
+
+    def load(self, parent_ids):
+        rows = self.model._default_manager.filter(**{f'{self.foreign_key}__in': parent_ids})
+        rows = list(rows.values(self.foreign_key, *_lookups(self.plan)))
+        _load_children(self.plan, rows)
+        for row in rows:
+            self.groups.setdefault(row[self.foreign_key], []).append(_render(self.plan, row))
+
+
+def _plan(serializer, model, prefix=''):
+    """
+    Return [(key, lookup, convert, nested plan or _Children)] for rendering
+    the serializer from values() rows, or None if some field needs the full
+    DRF path.
+    """
+    plan = []
+    for key, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source:
+            return None
+        try:
+            model_field = get_model_field(model, field.source)
+        except FieldDoesNotExist:
+            return None
+        lookup = prefix + field.source
+        if isinstance(field, ListSerializer):
+            # Reverse foreign keys to the primary key only: the parent rows carry that value.
+            if not model_field.one_to_many or not model_field.field.target_field.primary_key:
+                return None
+            nested = _plan(field.child, model_field.related_model)
+            if nested is None:
+                return None
+            plan.append((key, prefix + model._meta.pk.name, None, _Children(model_field, nested)))
+        elif isinstance(field, BaseSerializer):
+            if not model_field.is_relation or model_field.many_to_many or model_field.one_to_many:
+                return None
+            nested = _plan(field, model_field.related_model, lookup + '__')
+            if nested is None:
+                return None
+            plan.append((key, lookup, None, nested))
+        elif model_field.many_to_many or model_field.one_to_many:
+            return None
+        elif isinstance(field, (drf_fields.DateTimeField, drf_fields.DateField, drf_fields.TimeField)):
+            # These honour the configured DATE/TIME formats.
+            plan.append((key, lookup, field.to_representation, None))
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            if isinstance(field, PrimaryKeyRelatedField) and field.pk_field is not None:
+                return None
+            plan.append((key, lookup, None, None))
+        else:
+            return None
+    return plan
+
+
+def _lookups(plan):
+    for key, lookup, convert, nested in plan:
+        yield lookup
+        if isinstance(nested, list):
+            yield from _lookups(nested)
+
+
+def _load_children(plan, rows):
+    for key, lookup, convert, nested in plan:
+        if isinstance(nested, list):
+            _load_children(nested, rows)
+        elif nested is not None:
+            nested.load({row[lookup] for row in rows if row[lookup] is not None})
+
+
+def _render(plan, row):
+    data = {}
+    for key, lookup, convert, nested in plan:
+        value = row[lookup]
+        if isinstance(nested, _Children):
+            data[key] = nested.groups.get(value, [])
+        elif nested is not None:
+            # A missing related row renders as None, like the nested serializer.
+            data[key] = None if value is None else _render(nested, row)
+        elif convert is not None and value is not None:
+            data[key] = convert(value)
+        else:
+            data[key] = value
+    return data
+
+
+def fast_data(queryset, serializer):
+    """
+    Serialize a queryset for reading from values() queries, skipping DRF's
+    per-field to_representation calls.
+
+    Plain model fields, primary-key relations, nested serializers on forward
+    relations and nested many=True serializers on reverse foreign keys (one
+    extra query each) are supported; returns None for anything else so the
+    caller can fall back to serializer.data.
+    """
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    plan = _plan(serializer, queryset.model)
+    if plan is None:
+        return None
+    rows = list(queryset.values(*_lookups(plan)))
+    _load_children(plan, rows)
+    return [_render(plan, row) for row in rows]
+
+
+def serialize_list(queryset, serializer_class, context=None, **kwargs):
+    """
+    Serialize a list for reading: apply ?fields=/?expand=, load only the
+    columns and relations the output needs, and use the values() fast path
+    when the serializer allows it.
+    """
+    serializer = serializer_class(many=True, context=context or {}, **kwargs)
+    data = fast_data(queryset, serializer)
+    if data is not None:
+        return data
+    serializer.instance = optimize_queryset(queryset, serializer)
+    return serializer.data
@@ -10,8 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
+import importlib.util
 import os 
+import tempfile
+import warnings
+import django
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -57,6 +62,9 @@ INSTALLED_APPS = [
     'profiles',
     'appointments',
     'medics',
+    'dashboard',
+    'jobs',
+    'diagnostics',
     'allauth',
     'allauth.account',
     'allauth.socialaccount',
@@ -66,6 +74,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'diagnostics.middleware.RequestMetricsMiddleware',
+    'timelycare.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,8 +84,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'timelycare.middleware.ReadReplicaMiddleware',
 ]
 
 # For Django admin site
@@ -118,6 +128,20 @@ CORS_ORIGIN_ALLOW_ALL = True
 
 
 WSGI_APPLICATION = 'timelycare.wsgi.application'
+ASGI_APPLICATION = 'timelycare.asgi.application'
+
+# Channels
+# In-memory layer by default (and in tests); set CHANNEL_LAYER_BACKEND, e.g.
+# channels_redis.core.RedisChannelLayer, and CHANNEL_LAYER_URL to share groups
+# between worker processes.
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': os.getenv('CHANNEL_LAYER_BACKEND', 'channels.layers.InMemoryChannelLayer'),
+    }
+}
+if os.getenv('CHANNEL_LAYER_URL'):
+    CHANNEL_LAYERS['default']['CONFIG'] = {'hosts': [os.getenv('CHANNEL_LAYER_URL')]}
 
 
 # Database
@@ -134,8 +158,155 @@ DATABASES = {
    }
 }
 
-DATABASES['default'] = dj_database_url.parse(os.getenv('DATABASE_URL'))
-# 
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them after
+# every request) and checked before reuse. Under ASGI, Django advises
+# DB_CONN_MAX_AGE=0 with DB_POOL=true (Django's psycopg 3 pool, Django 5.1+)
+# or an external pooler such as PgBouncer.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 600))
+DB_POOL = os.getenv('DB_POOL', '').lower() in ('1', 'true', 'yes')
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+
+
+def database_config(url):
+    config = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    if DB_POOL and config['ENGINE'] == 'django.db.backends.postgresql':
+        if django.VERSION >= (5, 1):
+            # A pooled connection is returned to the pool after each request instead.
+            config['CONN_MAX_AGE'] = 0
+            config.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+            }
+        else:
+            warnings.warn("DB_POOL needs Django 5.1+; using persistent connections instead.")
+    return config
+
+
+DATABASES['default'] = database_config(os.getenv('DATABASE_URL'))
+
+# Optional read replica. GET requests to the views in REPLICA_VIEW_MODULES read
+# from it (see timelycare.routers); everything else uses the primary. Tests
+# read the primary through it.
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = {**database_config(os.getenv('DATABASE_REPLICA_URL')), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_ROUTERS = ['timelycare.routers.ReplicaRouter']
+REPLICA_VIEW_MODULES = ['profiles.views', 'appointments.views']
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory by default (and in tests); point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend such as django.core.cache.backends.redis.RedisCache in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'timelycare'),
+    }
+}
+
+# Seconds a cached specialization/specialist directory read may live.
+DIRECTORY_CACHE_TIMEOUT = int(os.getenv('DIRECTORY_CACHE_TIMEOUT', 60 * 60))
+# Seconds a CDN or reverse proxy may serve a directory response before
+# revalidating it, i.e. how stale a public directory read may get.
+DIRECTORY_MAX_AGE = int(os.getenv('DIRECTORY_MAX_AGE', 5 * 60))
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'profiles.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'timelycare.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        *(['timelycare.renderers.MessagePackRenderer'] if importlib.util.find_spec('msgpack') else []),
+    ],
+    # Reverse proxies in front of the app: throttles take the client IP from
+    # that many X-Forwarded-For entries. With 0 the header is ignored, as it
+    # is set by the client when nothing in front of us rewrites it.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.getenv('LOGIN_RATE_PER_IP', '30/min'),
+        'login_email': os.getenv('LOGIN_RATE_PER_EMAIL', '10/min'),
+    },
+}
+
+REST_KNOX = {
+    'TOKEN_TTL': timedelta(hours=int(os.getenv('TOKEN_TTL_HOURS', 10))),
+}
+
+# Seconds an authenticated token lookup is cached before it is checked against the DB again.
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', 60))
+
+# Seconds a cached unread-notification count may drift before it is recounted.
+UNREAD_COUNT_TIMEOUT = int(os.getenv('UNREAD_COUNT_TIMEOUT', 5 * 60))
+
+# iCal feeds cover appointments from ICAL_PAST_DAYS ago to ICAL_FUTURE_DAYS
+# ahead, as ICAL_EVENT_MINUTES-long events. A rendered feed is cached for
+# ICAL_CACHE_TIMEOUT seconds, or until one of the user's appointments changes.
+ICAL_PAST_DAYS = int(os.getenv('ICAL_PAST_DAYS', 30))
+ICAL_FUTURE_DAYS = int(os.getenv('ICAL_FUTURE_DAYS', 365))
+ICAL_EVENT_MINUTES = int(os.getenv('ICAL_EVENT_MINUTES', 30))
+ICAL_CACHE_TIMEOUT = int(os.getenv('ICAL_CACHE_TIMEOUT', 60 * 60))
+# Seconds a user's feed modification marker is kept after its last change or
+# first poll; an expired marker only costs clients one full download.
+ICAL_MARKER_TIMEOUT = int(os.getenv('ICAL_MARKER_TIMEOUT', 7 * 24 * 60 * 60))
+
+# Bulk user import: rows per transaction, and password-hashing processes used by
+# the HTTP endpoint (the import_users command takes --workers instead).
+BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', 1000))
+BULK_IMPORT_WORKERS = int(os.getenv('BULK_IMPORT_WORKERS', 1))
+
+# Background jobs (see the run_jobs command): jobs claimed per poll, seconds
+# between polls when idle, seconds before a running job counts as abandoned,
+# and the retry backoff (doubling from JOB_RETRY_BACKOFF up to the max).
+JOB_BATCH_SIZE = int(os.getenv('JOB_BATCH_SIZE', 100))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1))
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', 10 * 60))
+JOB_RETRY_BACKOFF = int(os.getenv('JOB_RETRY_BACKOFF', 30))
+JOB_RETRY_BACKOFF_MAX = int(os.getenv('JOB_RETRY_BACKOFF_MAX', 60 * 60))
+
+# Appointment reminders (see the send_reminders command): hours before the start
+# of a confirmed appointment, and seconds between scheduler ticks.
+REMINDER_LEAD_HOURS = int(os.getenv('REMINDER_LEAD_HOURS', 24))
+REMINDER_INTERVAL = float(os.getenv('REMINDER_INTERVAL', 60))
+
+# Request metrics, served at /metrics to METRICS_ALLOWED_IPS (the scraper's
+# address as Django sees it), for the views in these modules.
+METRICS_VIEW_MODULES = [
+    'profiles.views', 'profiles.async_views', 'appointments.views', 'appointments.async_views',
+    'medics.views', 'dashboard.views',
+]
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# Sampling profiler: this fraction of requests runs under PROFILER (cprofile or
+# pyinstrument), and the traces of those slower than PROFILE_SLOW_MS are saved
+# in PROFILE_DIR.
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', 500))
+PROFILER = os.getenv('PROFILER', 'cprofile')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'timelycare-profiles'))
+
+# Slow-query log: statements taking at least SLOW_QUERY_MS are logged and, when
+# SLOW_QUERY_LOG names a file, appended to it for the analyze_queries command.
+# Only normalized SQL is written unless SLOW_QUERY_LOG_PARAMS is set: query
+# parameters contain personal and medical data.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS')) if os.getenv('SLOW_QUERY_MS') else None
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG')
+SLOW_QUERY_LOG_PARAMS = os.getenv('SLOW_QUERY_LOG_PARAMS', 'false').lower() == 'true'
+
+# Response compression: bodies of at least COMPRESSION_MIN_SIZE bytes are sent
+# with brotli (when the brotli package is installed) or gzip, whichever the
+# client prefers. Brotli quality goes from 0 to 11; 4 compresses better than
+# gzip at about the same CPU cost.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 4))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -22,4 +22,6 @@ urlpatterns = [
     path('appointments/', include('appointments.urls')),
     path('admin/', admin.site.urls),
     path('medics/', include('medics.urls')),
+    path('dashboard/', include('dashboard.urls')),
+    path('', include('diagnostics.urls')),
 ]